@@ -14,13 +14,21 @@ Usage:
     python backtester.py --ticker NVDA --optimize
     python backtester.py --ticker MSFT --period 2y --verbose
     python backtester.py --ticker AAPL --optimize --params wall_wick fuel_wick displacement
+    python backtester.py --ticker AAPL --optimize --trade-log grid_trades.csv
+    python backtester.py --ticker AAPL --optimize --sim-cache sim_cache/
 """
 import argparse
 import itertools
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
+import numpy as np
 import yfinance as yf
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from profiling import add_profile_args, start_profiling
+from sim_cache import SimulationCache
+from trade_log import SIMULATE_COLUMNS, TradeLog
 
 
 # ─────────────────────────────────────────────────────────────
@@ -127,103 +135,243 @@ def compute_htf_pools(daily_df: pd.DataFrame, wall_wick_pct: float, fuel_wick_pc
     return pools
 
 
+_OHLC_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last"}
+
+
+def _wall_flags(o, h, l, c, wall_wick_pct: float, fuel_wick_pct: float) -> tuple[np.ndarray, np.ndarray]:
+    """Array form of the high/low wall conditions in compute_htf_pools."""
+    body = np.abs(c - o)
+    body = np.where(body == 0, 0.001, body)
+    high_wall = (c < o) & (h - o <= body * wall_wick_pct) & (c - l > body * fuel_wick_pct)
+    low_wall = (c > o) & (o - l <= body * wall_wick_pct) & (h - c > body * fuel_wick_pct)
+    return high_wall, low_wall
+
+
+def compute_htf_pools_history(daily_df: pd.DataFrame, wall_wick_pct: float,
+                              fuel_wick_pct: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    compute_htf_pools for every prefix daily_df.iloc[:i + 1] in one pass.
+
+    Returns (levels, tps, ready): [N, L] wall levels and wall-candle targets in
+    RECLAIM_LEVELS order (NaN when the level is not a wall), and a [N] mask that
+    is False where compute_htf_pools would return {}. The previous week/month of
+    prefix i is the last non-empty period before the one containing row i, so
+    one weekly and one monthly resample of the full frame cover every day.
+    """
+    n = len(daily_df)
+    ohlc = daily_df[list(_OHLC_AGG)].to_numpy(dtype=float)
+    candles = {"PD": np.vstack([np.full((1, 4), np.nan), ohlc[:-1]]) if n else ohlc}
+
+    for prefix, freq in (("PW", "W"), ("PM", "ME")):
+        grouped = daily_df[list(_OHLC_AGG)].groupby(pd.Grouper(freq=freq))
+        bins = grouped.agg(_OHLC_AGG).to_numpy(dtype=float)
+        kept = np.flatnonzero(~np.isnan(bins).any(axis=1))
+        rank = np.searchsorted(kept, grouped.ngroup().to_numpy())
+        prev = np.full((n, 4), np.nan)
+        has_prev = rank >= 1
+        prev[has_prev] = bins[kept[rank[has_prev] - 1]]
+        candles[prefix] = prev
+
+    levels = np.full((n, len(RECLAIM_LEVELS)), np.nan)
+    tps = np.full((n, len(RECLAIM_LEVELS)), np.nan)
+    for k, (code, l_type, _) in enumerate(RECLAIM_LEVELS):
+        o, h, l, c = candles[code[:2]].T
+        high_wall, low_wall = _wall_flags(o, h, l, c, wall_wick_pct, fuel_wick_pct)
+        if l_type == "bearish":
+            levels[high_wall, k], tps[high_wall, k] = h[high_wall], l[high_wall]
+        else:
+            levels[low_wall, k], tps[low_wall, k] = l[low_wall], h[low_wall]
+
+    return levels, tps, np.arange(n) >= 4
+
+
 # ─────────────────────────────────────────────────────────────
 # RECLAIM DETECTION (mirrors update_signal_lifecycle)
 # ─────────────────────────────────────────────────────────────
 
+# Levels in priority order: (code, direction, diamond score)
+RECLAIM_LEVELS = [
+    ("PMH", "bearish", "A+++"), ("PML", "bullish", "A+++"),
+    ("PWH", "bearish", "A++"),  ("PWL", "bullish", "A++"),
+    ("PDH", "bearish", "A+"),   ("PDL", "bullish", "A+"),
+]
+RECLAIM_LOOKBACK = 23   # 1H candles before the current one (iloc[-24:-1])
+AVG_BODY_BARS    = 10   # displacement baseline: mean body of the preceding candles
+
+_LEVEL_IS_BEAR = np.array([d == "bearish" for _, d, _ in RECLAIM_LEVELS])
+
+
+def _reclaim_mask(o, h, l, c, valid, levels, tps, current_price, params: ScannerParams) -> np.ndarray:
+    """
+    Qualifying reclaim candles for a batch of windows, all levels at once.
+
+    o/h/l/c/valid: [B, W] right-aligned lookback windows (valid marks real candles)
+    levels/tps:    [B, L] wall level and wall-candle target (NaN when inactive)
+    current_price: [B]
+    Returns a [B, L, W] mask with the same gates as the original per-candle loop:
+    reclaim, displacement vs the rolling mean body, opposite wick, proximity,
+    SL/TP sanity and non-zero distances.
+    """
+    n_batch, width = o.shape
+    body = np.where(valid, np.abs(c - o), 0.0)
+
+    # Rolling mean body of up to AVG_BODY_BARS valid candles before each position
+    padded = np.concatenate([np.zeros((n_batch, AVG_BODY_BARS)), body], axis=1)
+    counts = np.concatenate([np.zeros((n_batch, AVG_BODY_BARS)), valid.astype(float)], axis=1)
+    prev_sum = sliding_window_view(padded, AVG_BODY_BARS, axis=1)[:, :width].sum(axis=2)
+    prev_cnt = sliding_window_view(counts, AVG_BODY_BARS, axis=1)[:, :width].sum(axis=2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_body = np.where(prev_cnt > 0, prev_sum / prev_cnt, 0.001)
+    avg_body = np.where(avg_body == 0, 0.001, avg_body)
+
+    displaced = valid & (body > avg_body * params.displacement_mult)
+    bear_wick = (h - np.maximum(o, c)) < body * params.opposite_wick_tol
+    bull_wick = (np.minimum(o, c) - l) < body * params.opposite_wick_tol
+
+    lv = levels[:, :, None]
+    tp = tps[:, :, None]
+    cp = current_price[:, None, None]
+    o_, h_, l_, c_ = o[:, None, :], h[:, None, :], l[:, None, :], c[:, None, :]
+    is_bear = _LEVEL_IS_BEAR[None, :, None]
+
+    bear_ok = (h_ > lv) & (c_ < lv) & (c_ < o_) & bear_wick[:, None, :]
+    bull_ok = (l_ < lv) & (c_ > lv) & (c_ > o_) & bull_wick[:, None, :]
+    mask = np.where(is_bear, bear_ok, bull_ok) & displaced[:, None, :]
+
+    # Proximity filter (chasing prevention)
+    mask &= np.where(is_bear, ~(cp < lv * (1 - params.proximity_filter_pct)),
+                     ~(cp > lv * (1 + params.proximity_filter_pct)))
+
+    # Dynamic SL behind the reclaim candle + sanity checks
+    sl = np.where(is_bear, h_ * (1 + params.sl_buffer_pct), l_ * (1 - params.sl_buffer_pct))
+    mask &= ~np.isnan(tp)
+    mask &= np.where(is_bear, ~(cp >= sl) & ~(cp <= tp), ~(cp <= sl) & ~(cp >= tp))
+    mask &= (np.abs(lv - sl) != 0) & (np.abs(lv - tp) != 0)
+    return mask
+
+
+def _pick_reclaim(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    For each window: first level (priority order) with a qualifying candle, and its
+    most recent qualifying candle. Returns (level index, window position), -1 if none.
+    """
+    n_batch, n_levels, width = mask.shape
+    has = mask.any(axis=2)
+    last_pos = width - 1 - mask[:, :, ::-1].argmax(axis=2)
+    level = np.where(has.any(axis=1), has.argmax(axis=1), -1)
+    pos = np.where(level >= 0, last_pos[np.arange(n_batch), np.maximum(level, 0)], -1)
+    return level, pos
+
+
+def _pool_level_arrays(pools: dict) -> tuple[np.ndarray, np.ndarray]:
+    levels = np.full(len(RECLAIM_LEVELS), np.nan)
+    tps = np.full(len(RECLAIM_LEVELS), np.nan)
+    for k, (code, l_type, _) in enumerate(RECLAIM_LEVELS):
+        lv_val = pools.get(code)
+        if not pools.get(f"{code}_WALL") or lv_val is None:
+            continue
+        levels[k] = lv_val
+        tp = pools.get(f"{code}_CANDLE", {}).get("l" if l_type == "bearish" else "h")
+        if tp is not None:
+            tps[k] = tp
+    return levels, tps
+
+
 def find_reclaim(pools: dict, hourly_window: pd.DataFrame, current_price: float, params: ScannerParams) -> dict | None:
     """
     Scans a 1H window (last 24 candles) for a valid reclaim of any HTF wall.
     Returns a signal dict or None.
-    Mirrors the FASE 3 (ENTRY) block in update_signal_lifecycle().
+    Mirrors the FASE 3 (ENTRY) block in update_signal_lifecycle(): levels in
+    priority order, most recent qualifying candle first — evaluated for all
+    levels and candles in one vectorized pass.
     """
-    levels = []
-    for code, l_type, score in [
-        ("PMH", "bearish", "A+++"), ("PML", "bullish", "A+++"),
-        ("PWH", "bearish", "A++"),  ("PWL", "bullish", "A++"),
-        ("PDH", "bearish", "A+"),   ("PDL", "bullish", "A+"),
-    ]:
-        if not pools.get(f"{code}_WALL"):
-            continue
-        lv_val = pools.get(code)
-        if lv_val is None:
-            continue
-        levels.append((code, l_type, score, lv_val))
+    levels, tps = _pool_level_arrays(pools)
+    if np.isnan(levels).all():
+        return None
 
-    for code, l_type, d_score, lv_val in levels:
-        lookback_window = hourly_window.iloc[-min(24, len(hourly_window) - 1):-1]
-        if lookback_window.empty:
-            continue
+    # Same candles as hourly_window.iloc[-min(24, n - 1):-1]
+    n = len(hourly_window)
+    if n < 3:
+        return None
+    start, stop = n - min(RECLAIM_LOOKBACK + 1, n - 1), n - 1
+
+    o = hourly_window["Open"].to_numpy(dtype=float)[None, start:stop]
+    h = hourly_window["High"].to_numpy(dtype=float)[None, start:stop]
+    l = hourly_window["Low"].to_numpy(dtype=float)[None, start:stop]
+    c = hourly_window["Close"].to_numpy(dtype=float)[None, start:stop]
+    mask = _reclaim_mask(o, h, l, c, np.ones_like(o, dtype=bool), levels[None, :], tps[None, :],
+                         np.array([float(current_price)]), params)
+    level, pos = _pick_reclaim(mask)
+    if level[0] < 0:
+        return None
 
-        for i in range(len(lookback_window) - 1, -1, -1):
-            c = lookback_window.iloc[i]
-            c_o, c_c = float(c["Open"]), float(c["Close"])
-            c_h, c_l = float(c["High"]), float(c["Low"])
-
-            # Reclaim bearish
-            if l_type == "bearish" and c_h > lv_val and c_c < lv_val and c_c < c_o:
-                pass
-            # Reclaim bullish
-            elif l_type == "bullish" and c_l < lv_val and c_c > lv_val and c_c > c_o:
-                pass
-            else:
-                continue
+    k, i = int(level[0]), int(pos[0])
+    code, l_type, d_score = RECLAIM_LEVELS[k]
+    return _reclaim_signal(code, l_type, d_score, levels[k], tps[k],
+                           h[0, i], l[0, i], str(hourly_window.index[start + i]), params)
 
-            # Displacement check
-            c_body = abs(c_c - c_o)
-            prev_slice = lookback_window.iloc[max(0, i - 10):i]
-            avg_body = (prev_slice["Close"] - prev_slice["Open"]).abs().mean() if not prev_slice.empty else 0.001
-            avg_body = avg_body or 0.001
 
-            has_displacement = c_body > avg_body * params.displacement_mult
-            if l_type == "bearish":
-                has_displacement = has_displacement and (c_h - max(c_o, c_c) < c_body * params.opposite_wick_tol)
-            else:
-                has_displacement = has_displacement and (min(c_o, c_c) - c_l < c_body * params.opposite_wick_tol)
-
-            if not has_displacement:
-                continue
-
-            # Proximity filter
-            if l_type == "bullish" and current_price > lv_val * (1 + params.proximity_filter_pct):
-                continue
-            if l_type == "bearish" and current_price < lv_val * (1 - params.proximity_filter_pct):
-                continue
-
-            entry = lv_val
-            sl = (c_h * (1 + params.sl_buffer_pct)) if l_type == "bearish" else (c_l * (1 - params.sl_buffer_pct))
-            wall_candle = pools.get(f"{code}_CANDLE", {})
-            tp = wall_candle.get("l") if l_type == "bearish" else wall_candle.get("h")
-            if tp is None:
-                continue
-
-            # Sanity checks
-            if l_type == "bullish" and current_price <= sl:
-                continue
-            if l_type == "bearish" and current_price >= sl:
-                continue
-            if l_type == "bearish" and current_price <= tp:
-                continue
-            if l_type == "bullish" and current_price >= tp:
-                continue
-
-            sl_dist = abs(entry - sl)
-            tp_dist = abs(entry - tp)
-            if sl_dist == 0 or tp_dist == 0:
-                continue
-
-            return {
-                "direction": l_type,
-                "tier": code,
-                "diamond_score": d_score,
-                "entry": entry,
-                "stop": sl,
-                "target": tp,
-                "rr": round(tp_dist / sl_dist, 2),
-                "reclaim_candle_time": str(c.name),
-            }
-
-    return None
+def _reclaim_signal(code: str, l_type: str, d_score: str, lv_val: float, tp: float,
+                    c_h: float, c_l: float, candle_time: str, params: ScannerParams) -> dict:
+    entry = float(lv_val)
+    sl = (c_h * (1 + params.sl_buffer_pct)) if l_type == "bearish" else (c_l * (1 - params.sl_buffer_pct))
+    sl_dist = abs(entry - sl)
+    tp_dist = abs(entry - tp)
+    return {
+        "direction": l_type,
+        "tier": code,
+        "diamond_score": d_score,
+        "entry": entry,
+        "stop": float(sl),
+        "target": float(tp),
+        "rr": round(float(tp_dist / sl_dist), 2),
+        "reclaim_candle_time": candle_time,
+    }
+
+
+def find_reclaims_batch(levels: np.ndarray, tps: np.ndarray, current_price: np.ndarray,
+                        hourly_df: pd.DataFrame, end_pos: np.ndarray, params: ScannerParams,
+                        chunk: int = 4096) -> list[dict | None]:
+    """
+    find_reclaim for many days at once. Row b is find_reclaim over
+    hourly_df.iloc[:end_pos[b]].tail(RECLAIM_LOOKBACK + 2) with levels[b]/tps[b]
+    (see compute_htf_pools_history) and current_price[b]. Windows are gathered
+    right-aligned from the hourly arrays and evaluated `chunk` days per pass.
+    """
+    n_days = len(end_pos)
+    signals: list[dict | None] = [None] * n_days
+    if not n_days:
+        return signals
+
+    o_all = hourly_df["Open"].to_numpy(dtype=float)
+    h_all = hourly_df["High"].to_numpy(dtype=float)
+    l_all = hourly_df["Low"].to_numpy(dtype=float)
+    c_all = hourly_df["Close"].to_numpy(dtype=float)
+    end_pos = np.asarray(end_pos, dtype=np.int64)
+    current_price = np.asarray(current_price, dtype=float)
+
+    # Same candles as window.iloc[-min(24, n - 1):-1] with n = min(25, end)
+    n_win = np.minimum(end_pos, RECLAIM_LOOKBACK + 2)
+    stop = end_pos - 1
+    start = end_pos - np.minimum(RECLAIM_LOOKBACK + 1, n_win - 1)
+    active = (n_win >= 3) & ~np.isnan(levels).all(axis=1)
+    offsets = np.arange(-RECLAIM_LOOKBACK, 0)
+
+    rows = np.flatnonzero(active)
+    for lo in range(0, len(rows), chunk):
+        sel = rows[lo:lo + chunk]
+        idx = stop[sel, None] + offsets[None, :]
+        valid = idx >= start[sel, None]
+        idx = np.maximum(idx, 0)
+        mask = _reclaim_mask(o_all[idx], h_all[idx], l_all[idx], c_all[idx], valid,
+                             levels[sel], tps[sel], current_price[sel], params)
+        level, pos = _pick_reclaim(mask)
+        for b in np.flatnonzero(level >= 0):
+            k, bar = int(level[b]), int(idx[b, pos[b]])
+            code, l_type, d_score = RECLAIM_LEVELS[k]
+            signals[sel[b]] = _reclaim_signal(code, l_type, d_score, levels[sel[b], k], tps[sel[b], k],
+                                              h_all[bar], l_all[bar], str(hourly_df.index[bar]), params)
+    return signals
 
 
 # ─────────────────────────────────────────────────────────────
@@ -231,16 +379,23 @@ def find_reclaim(pools: dict, hourly_window: pd.DataFrame, current_price: float,
 # ─────────────────────────────────────────────────────────────
 
 def simulate(ticker: str, daily_df: pd.DataFrame, hourly_df: pd.DataFrame,
-             params: ScannerParams, verbose: bool = False) -> list:
+             params: ScannerParams, verbose: bool = False, start_day=None) -> TradeLog:
     """
     Sliding window backtest: advances one day at a time, recomputes HTF walls,
     searches for reclaim in the 24 preceding 1H candles, then simulates the trade.
+    Trades are recorded in a columnar TradeLog.
+    With start_day (date), only days from start_day on are evaluated; their
+    trades are the same as in a full run (incremental re-optimization).
     """
-    trades = []
+    trades = TradeLog()
     h_tz = hourly_df.index.tz
 
     # Need at least 30 daily candles for monthly resampling
-    for i in range(30, len(daily_df)):
+    first = 30
+    if start_day is not None:
+        local_days = pd.DatetimeIndex(daily_df.index).tz_localize(None).normalize()
+        first = max(first, int(local_days.searchsorted(pd.Timestamp(start_day))) + 1)
+    for i in range(first, len(daily_df)):
         daily_window = daily_df.iloc[:i]
 
         # Compute HTF walls on this window
@@ -294,19 +449,19 @@ def simulate(ticker: str, daily_df: pd.DataFrame, hourly_df: pd.DataFrame,
                 result, close_ts = "WIN", ts
                 break
 
-        trades.append({
-            "ticker": ticker,
-            "day": str(daily_window.index[-1].date()),
-            "tier": signal["tier"],
-            "direction": direction,
-            "diamond_score": signal["diamond_score"],
-            "entry": round(entry, 4),
-            "stop": round(stop, 4),
-            "target": round(target, 4),
-            "rr": rr,
-            "result": result,
-            "close_ts": str(close_ts) if close_ts else None,
-        })
+        trades.append(
+            ticker=ticker,
+            day=str(daily_window.index[-1].date()),
+            tier=signal["tier"],
+            direction=direction,
+            diamond_score=signal["diamond_score"],
+            entry=round(entry, 4),
+            stop=round(stop, 4),
+            target=round(target, 4),
+            rr=rr,
+            result=result,
+            close_ts=str(close_ts) if close_ts else None,
+        )
 
         if verbose:
             icon = "WIN" if result == "WIN" else ("LOSS" if result == "LOSS" else "...")
@@ -320,31 +475,27 @@ def simulate(ticker: str, daily_df: pd.DataFrame, hourly_df: pd.DataFrame,
 # STATISTICS
 # ─────────────────────────────────────────────────────────────
 
-def compute_stats(trades: list) -> dict | None:
-    closed = [t for t in trades if t["result"] in ("WIN", "LOSS")]
-    if not closed:
+def compute_stats(trades: TradeLog | list) -> dict | None:
+    """Win/loss, R and per-tier breakdown, aggregated column-wise from the trade log."""
+    log = trades if isinstance(trades, TradeLog) else TradeLog.from_records(trades)
+    agg = log.aggregate()
+    wins, losses = agg["wins"], agg["losses"]
+    total = wins + losses
+    if not total:
         return None
-    wins   = [t for t in closed if t["result"] == "WIN"]
-    losses = [t for t in closed if t["result"] == "LOSS"]
-    total  = len(closed)
-    total_r = sum(t["rr"] for t in wins) - len(losses)
+    total_r = agg["win_rr"] - losses
 
     # Breakdown by tier
-    tier_stats = {}
-    for t in closed:
-        tier = t["tier"]
-        if tier not in tier_stats:
-            tier_stats[tier] = {"win": 0, "loss": 0}
-        tier_stats[tier][t["result"].lower()] += 1
+    tier_stats = {tier: {"win": w, "loss": lo} for tier, (w, lo) in agg["tiers"].items()}
 
     return {
         "total":      total,
-        "wins":       len(wins),
-        "losses":     len(losses),
-        "winrate":    round(len(wins) / total * 100, 1),
+        "wins":       wins,
+        "losses":     losses,
+        "winrate":    round(wins / total * 100, 1),
         "total_r":    round(total_r, 2),
         "expectancy": round(total_r / total, 3),
-        "avg_rr":     round(sum(t["rr"] for t in wins) / len(wins), 2) if wins else 0.0,
+        "avg_rr":     round(agg["win_rr"] / wins, 2) if wins else 0.0,
         "tier_stats": tier_stats,
     }
 
@@ -379,10 +530,18 @@ def print_report(stats: dict | None, ticker: str, params: ScannerParams):
 # ─────────────────────────────────────────────────────────────
 
 def grid_search(ticker: str, daily_df: pd.DataFrame, hourly_df: pd.DataFrame,
-                param_keys: list | None = None) -> dict | None:
+                param_keys: list | None = None, trade_log_path: str | None = None,
+                cache=None, stop=None) -> dict | None:
     """
     Grid search over the specified param_keys (default: all 6).
     Returns the best parameter dict sorted by expectancy.
+    With trade_log_path, every combo's trades are streamed to that CSV
+    (tagged with the combo's parameter values) for later analysis.
+    With a sim_cache.SimulationCache, combos already simulated on the same
+    data are not re-run; an incremental_sim.IncrementalSimStore only
+    simulates the sessions added since its previous run.
+    `stop` (a threading/multiprocessing Event) is checked between combos;
+    once it is set the search gives up and returns None.
     """
     if param_keys is None:
         param_keys = list(PARAM_GRID.keys())
@@ -395,8 +554,15 @@ def grid_search(ticker: str, daily_df: pd.DataFrame, hourly_df: pd.DataFrame,
     # Default values for params not in the grid
     defaults = ScannerParams()
     rows = []
+    sink = (TradeLog(columns=SIMULATE_COLUMNS + tuple(PARAM_GRID), sink=trade_log_path)
+            if trade_log_path else None)
 
     for idx, combo in enumerate(combos, 1):
+        if stop is not None and stop.is_set():
+            print(f"\n  Stopped after {idx - 1}/{len(combos)} combos.")
+            if sink is not None:
+                sink.close()
+            return None
         print(f"  [{idx}/{len(combos)}] testing {dict(zip(keys, combo))}...", end="\r", flush=True)
         kw = {k: v for k, v in zip(keys, combo)}
         p = ScannerParams(
@@ -407,11 +573,20 @@ def grid_search(ticker: str, daily_df: pd.DataFrame, hourly_df: pd.DataFrame,
             sl_buffer_pct        = kw.get("sl_buffer_pct",        defaults.sl_buffer_pct),
             proximity_filter_pct = kw.get("proximity_filter_pct", defaults.proximity_filter_pct),
         )
-        trades = simulate(ticker, daily_df, hourly_df, p)
-        stats  = compute_stats(trades)
+        if cache is not None:
+            trades, stats = cache.evaluate(ticker, daily_df, hourly_df, p)
+        else:
+            trades = simulate(ticker, daily_df, hourly_df, p)
+            stats  = compute_stats(trades)
+        if sink is not None:
+            sink.extend_log(trades, **asdict(p))
         if stats and stats["total"] >= MIN_TRADES:
             rows.append({**kw, **stats})
 
+    if sink is not None:
+        sink.close()
+        print(f"\n  Trade log streamed to {trade_log_path}")
+
     if not rows:
         print(f"  No combo produced >= {MIN_TRADES} closed trades.")
         return None
@@ -458,6 +633,10 @@ def main():
                         choices=list(PARAM_GRID.keys()),
                         help="Which params to optimize (default: all)")
     parser.add_argument("--verbose",    action="store_true",          help="Print each trade")
+    parser.add_argument("--trade-log",  type=str,   default=None,
+                        help="Stream trades to this CSV (analyse later without re-simulating)")
+    parser.add_argument("--sim-cache",  type=str,   default=None, metavar="DIR",
+                        help="Reuse simulate() results stored in DIR (sim_cache.py)")
     # Single-run param overrides
     parser.add_argument("--wall-wick",     type=float, default=0.001)
     parser.add_argument("--fuel-wick",     type=float, default=0.40)
@@ -465,7 +644,9 @@ def main():
     parser.add_argument("--opp-wick",      type=float, default=0.30)
     parser.add_argument("--sl-buffer",     type=float, default=0.001)
     parser.add_argument("--proximity",     type=float, default=0.01)
+    add_profile_args(parser)
     args = parser.parse_args()
+    start_profiling(args)
 
     ticker = args.ticker.upper()
     print(f"\n[*] CRT Flow Backtester v3 (scanner.py logic) — {ticker}")
@@ -479,8 +660,10 @@ def main():
 
     print(f"[+] Daily: {len(daily_df)} candles | 1H: {len(hourly_df)} candles\n")
 
+    cache = SimulationCache(args.sim_cache) if args.sim_cache else None
     if args.optimize:
-        grid_search(ticker, daily_df, hourly_df, param_keys=args.params)
+        grid_search(ticker, daily_df, hourly_df, param_keys=args.params, trade_log_path=args.trade_log,
+                    cache=cache)
     else:
         params = ScannerParams(
             wall_wick_pct        = args.wall_wick,
@@ -490,9 +673,18 @@ def main():
             sl_buffer_pct        = args.sl_buffer,
             proximity_filter_pct = args.proximity,
         )
-        trades = simulate(ticker, daily_df, hourly_df, params, verbose=args.verbose)
-        stats  = compute_stats(trades)
+        if cache is not None and not args.verbose:
+            trades, stats = cache.evaluate(ticker, daily_df, hourly_df, params)
+        else:
+            trades = simulate(ticker, daily_df, hourly_df, params, verbose=args.verbose)
+            stats  = compute_stats(trades)
+        if args.trade_log:
+            sink = TradeLog(sink=args.trade_log)
+            sink.extend_log(trades)
+            sink.close()
         print_report(stats, ticker, params)
+    if cache is not None:
+        print(f"\n[*] {cache.summary()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,287 @@
+"""
+CRT Flow 3C Backtester — aligned with strategy.wick_retrace_3c (production scanner)
+
+Replays the signals scanner.py emits (bullish_wick_3c / bearish_wick_3c):
+  - Every historical C3 tagged in one vectorized pass (compute_pattern_masks)
+  - Entry / SL / TP built with the same rules as _build_pattern_result
+  - Outcomes resolved in bulk on the 4H / 1H / 15M frames (SL wins same-bar ties)
+  - Stats reported in the backtester.compute_stats format (tier = timeframe)
+
+Usage:
+    python backtester_3c.py --tickers AAPL NVDA
+    python backtester_3c.py --universe-file tickers.txt --workers 8
+    python backtester_3c.py --tickers TSLA --timeframes 1H 15M --verbose
+    python backtester_3c.py --universe-file tickers.txt --trade-log trades_3c.csv
+"""
+import argparse
+import concurrent.futures
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from backtester import compute_stats
+from market_data import clean_df, resample_to_4h
+from strategy.config import MIN_BARS_4H, MIN_BARS_1H, MIN_BARS_15M, SL_BUFFER_PCT, TP_RR_RATIO
+from strategy.wick_retrace_3c import compute_pattern_masks
+from trade_log import TradeLog
+
+# yfinance caps intraday history: 730d for 1h, 60d for 15m
+HISTORY_PERIOD_1H  = "730d"
+HISTORY_PERIOD_15M = "60d"
+
+TIMEFRAMES = ("4H", "1H", "15M")
+MIN_BARS   = {"4H": MIN_BARS_4H, "1H": MIN_BARS_1H, "15M": MIN_BARS_15M}
+
+RESOLVE_BLOCK = 256  # bars examined per trade per vectorized resolution pass
+
+WIN, LOSS, OPEN = 1, -1, 0
+_RESULT_LABELS = np.array(["LOSS", "OPEN", "WIN"], dtype=object)  # indexed by outcome + 1
+
+TRADE_COLUMNS = (
+    "ticker", "timestamp", "tier", "direction",
+    "entry", "stop", "target", "rr", "result", "close_ts",
+)
+
+
+# ─────────────────────────────────────────────────────────────
+# DATA
+# ─────────────────────────────────────────────────────────────
+
+def fetch_history_frames(ticker: str) -> dict[str, pd.DataFrame | None]:
+    """Longest intraday history yfinance serves, shaped like market_data.fetch_mtf_frames."""
+    try:
+        stock  = yf.Ticker(ticker)
+        df_1h  = stock.history(period=HISTORY_PERIOD_1H, interval="1h", auto_adjust=True)
+        df_15m = stock.history(period=HISTORY_PERIOD_15M, interval="15m", auto_adjust=True)
+    except Exception:
+        return {tf: None for tf in TIMEFRAMES}
+
+    df_1h  = clean_df(df_1h.dropna() if df_1h is not None else None)
+    df_15m = clean_df(df_15m.dropna() if df_15m is not None else None)
+    df_4h  = resample_to_4h(df_1h) if df_1h is not None and not df_1h.empty else None
+    return {"4H": df_4h, "1H": df_1h, "15M": df_15m}
+
+
+# ─────────────────────────────────────────────────────────────
+# ENTRY / SL / TP (mirrors _build_pattern_result)
+# ─────────────────────────────────────────────────────────────
+
+def build_pattern_trades(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per historical C3 with entry/stop/target computed as in
+    _build_pattern_result (SL behind C1–C3 extreme + buffer, TP at TP_RR_RATIO).
+    Rows with non-positive risk are dropped (the live adapter would emit no trade).
+    """
+    cols = ["bar", "direction", "entry", "stop", "target", "rr"]
+    if df is None or "Volume" not in df.columns:
+        return pd.DataFrame(columns=cols)
+
+    bull, bear = compute_pattern_masks(df)
+    idx = np.flatnonzero(bull | bear)
+    if idx.size == 0:
+        return pd.DataFrame(columns=cols)
+
+    low  = df["Low"].to_numpy(dtype=float)
+    high = df["High"].to_numpy(dtype=float)
+    close = df["Close"].to_numpy(dtype=float)
+
+    is_long = bull[idx]
+    entry   = close[idx]
+    buffer  = entry * SL_BUFFER_PCT
+    c1_c3_low  = np.minimum.reduce([low[idx - 2], low[idx - 1], low[idx]])
+    c1_c3_high = np.maximum.reduce([high[idx - 2], high[idx - 1], high[idx]])
+
+    stop = np.where(is_long, c1_c3_low - buffer, c1_c3_high + buffer)
+    risk = np.where(is_long, entry - stop, stop - entry)
+    target = np.where(is_long, entry + risk * TP_RR_RATIO, entry - risk * TP_RR_RATIO)
+
+    entry, stop, target = np.round(entry, 4), np.round(stop, 4), np.round(target, 4)
+    sl_dist = np.abs(entry - stop)
+    tp_dist = np.abs(target - entry)
+    keep = (risk > 0) & (sl_dist > 0) & (tp_dist > 0)
+
+    return pd.DataFrame({
+        "bar":       idx[keep],
+        "direction": np.where(is_long[keep], "BULLISH", "BEARISH"),
+        "entry":     entry[keep],
+        "stop":      stop[keep],
+        "target":    target[keep],
+        "rr":        np.round(tp_dist[keep] / sl_dist[keep], 2),
+    })
+
+
+# ─────────────────────────────────────────────────────────────
+# BULK OUTCOME RESOLUTION
+# ─────────────────────────────────────────────────────────────
+
+def resolve_outcomes(high: np.ndarray, low: np.ndarray, entry_bar: np.ndarray,
+                     is_long: np.ndarray, stop: np.ndarray, target: np.ndarray,
+                     block: int = RESOLVE_BLOCK) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Resolve every trade at once on the bars after its entry bar.
+    Each pass checks the next `block` bars of all still-open trades as a 2D array;
+    trades without a hit advance to the next block. SL wins same-bar ties (as simulate).
+    Returns (outcome WIN/LOSS/OPEN, exit bar index or -1).
+    """
+    n = len(high)
+    m = len(entry_bar)
+    outcome  = np.full(m, OPEN, dtype=np.int8)
+    exit_bar = np.full(m, -1, dtype=np.int64)
+    steps    = np.arange(block)
+
+    pending = np.flatnonzero(entry_bar + 1 < n)
+    offset  = 1
+    while pending.size:
+        pos   = entry_bar[pending, None] + offset + steps[None, :]
+        valid = pos < n
+        pos   = np.minimum(pos, n - 1)
+        h, l  = high[pos], low[pos]
+
+        long_ = is_long[pending, None]
+        sl    = stop[pending, None]
+        tp    = target[pending, None]
+        sl_hit = np.where(long_, l <= sl, h >= sl) & valid
+        tp_hit = np.where(long_, h >= tp, l <= tp) & valid
+
+        hit     = sl_hit | tp_hit
+        any_hit = hit.any(axis=1)
+        first   = hit.argmax(axis=1)
+
+        rows = np.flatnonzero(any_hit)
+        done = pending[rows]
+        exit_bar[done] = entry_bar[done] + offset + first[rows]
+        outcome[done]  = np.where(sl_hit[rows, first[rows]], LOSS, WIN)
+
+        offset += block
+        pending = pending[~any_hit]
+        pending = pending[entry_bar[pending] + offset < n]
+
+    return outcome, exit_bar
+
+
+# ─────────────────────────────────────────────────────────────
+# BACKTEST
+# ─────────────────────────────────────────────────────────────
+
+def backtest_frame(ticker: str, df: pd.DataFrame | None, timeframe: str) -> TradeLog:
+    """All 3C trades on one timeframe, as a columnar TradeLog."""
+    log = TradeLog(columns=TRADE_COLUMNS)
+    if df is None or len(df) < MIN_BARS[timeframe]:
+        return log
+    setups = build_pattern_trades(df)
+    if setups.empty:
+        return log
+
+    bar = setups["bar"].to_numpy(dtype=np.int64)
+    outcome, exit_bar = resolve_outcomes(
+        df["High"].to_numpy(dtype=float),
+        df["Low"].to_numpy(dtype=float),
+        bar,
+        (setups["direction"] == "BULLISH").to_numpy(),
+        setups["stop"].to_numpy(dtype=float),
+        setups["target"].to_numpy(dtype=float),
+    )
+
+    index = df.index.astype(str).to_numpy()
+    log.extend(
+        {
+            "timestamp": index[bar],
+            "direction": setups["direction"].to_numpy(),
+            "entry":     setups["entry"].to_numpy(),
+            "stop":      setups["stop"].to_numpy(),
+            "target":    setups["target"].to_numpy(),
+            "rr":        setups["rr"].to_numpy(),
+            "result":    _RESULT_LABELS[outcome + 1],
+            "close_ts":  np.where(exit_bar >= 0, index[exit_bar], None),
+        },
+        ticker=ticker,
+        tier=timeframe,
+    )
+    return log
+
+
+def backtest_ticker(ticker: str, frames: dict[str, pd.DataFrame | None],
+                    timeframes: tuple = TIMEFRAMES, verbose: bool = False) -> TradeLog:
+    trades = TradeLog(columns=TRADE_COLUMNS)
+    for tf in timeframes:
+        trades.extend_log(backtest_frame(ticker, frames.get(tf), tf))
+
+    if verbose:
+        for t in trades:
+            print(f"  {t['timestamp']}  {t['tier']:3s}  {t['direction']:8s}  RR={t['rr']:.1f}  "
+                  f"entry={t['entry']:.2f}  SL={t['stop']:.2f}  TP={t['target']:.2f}  → {t['result']}")
+    return trades
+
+
+def print_summary(stats: dict | None, label: str):
+    print(f"\n{'='*60}")
+    print(f"  {label}")
+    print(f"{'='*60}")
+    if not stats:
+        print("  No closed trades found.")
+        return
+    print(f"  Trades     : {stats['total']}  ({stats['wins']}W / {stats['losses']}L)")
+    print(f"  Winrate    : {stats['winrate']}%")
+    print(f"  Total R    : {stats['total_r']:+.2f} R")
+    print(f"  Expectancy : {stats['expectancy']:+.3f} R/trade")
+    print(f"  Avg Win RR : {stats['avg_rr']:.2f} R")
+    if stats["tier_stats"]:
+        print(f"\n  By Timeframe:")
+        for tf, s in sorted(stats["tier_stats"].items()):
+            total_t = s["win"] + s["loss"]
+            wr = round(s["win"] / total_t * 100, 1) if total_t else 0
+            print(f"    {tf:4s}: {total_t} trades  {wr}% WR")
+
+
+# ─────────────────────────────────────────────────────────────
+# ENTRY POINT
+# ─────────────────────────────────────────────────────────────
+
+def load_universe_file(path: str) -> list[str]:
+    """Tickers from a one-per-line file, upper-cased; blank and '#' comment lines are skipped."""
+    with open(path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [s.upper() for s in lines if s and not s.startswith("#")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRT Flow 3C Backtester — aligned with strategy.wick_retrace_3c")
+    parser.add_argument("--tickers",       nargs="+", default=None, help="Tickers (e.g. AAPL NVDA)")
+    parser.add_argument("--universe-file", type=str,  default=None, help="One ticker per line (e.g. tickers.txt)")
+    parser.add_argument("--timeframes",    nargs="+", default=list(TIMEFRAMES), choices=list(TIMEFRAMES))
+    parser.add_argument("--workers",       type=int,  default=8,    help="Thread pool size for downloads")
+    parser.add_argument("--verbose",       action="store_true",     help="Print each trade")
+    parser.add_argument("--trade-log",     type=str,  default=None, help="Stream trades to this CSV")
+    args = parser.parse_args()
+
+    tickers = [t.upper() for t in (args.tickers or [])]
+    if args.universe_file:
+        tickers += load_universe_file(args.universe_file)
+    tickers = list(dict.fromkeys(tickers)) or ["AAPL"]
+    timeframes = tuple(args.timeframes)
+
+    print(f"\n[*] CRT Flow 3C Backtester — {len(tickers)} ticker(s), timeframes: {', '.join(timeframes)}")
+    print(f"[*] Downloading {HISTORY_PERIOD_1H} 1H + {HISTORY_PERIOD_15M} 15M data...")
+
+    all_trades = TradeLog(columns=TRADE_COLUMNS, sink=args.trade_log)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(fetch_history_frames, t): t for t in tickers}
+        for future in concurrent.futures.as_completed(futures):
+            ticker = futures[future]
+            try:
+                frames = future.result()
+            except Exception as e:
+                print(f"  Error on {ticker}: {e}")
+                continue
+            trades = backtest_ticker(ticker, frames, timeframes, verbose=args.verbose)
+            all_trades.extend_log(trades)
+            if len(tickers) == 1 or args.verbose:
+                print_summary(compute_stats(trades), ticker)
+
+    all_trades.close()
+    print_summary(compute_stats(all_trades), f"UNIVERSE — {len(tickers)} ticker(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+CRT Flow micro-benchmarks for the strategy and simulation kernels.
+
+    python -m benchmarks run --out bench/baseline.json
+    python -m benchmarks run --out bench/current.json --filter simulate grid_search
+    python -m benchmarks compare bench/baseline.json bench/current.json --threshold 0.15
+"""
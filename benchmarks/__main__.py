@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import argparse
+import sys
+
+from benchmarks.cases import CASES
+from benchmarks.runner import DEFAULT_THRESHOLD, compare, format_seconds, load, run_suite, save
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="CRT Flow kernel benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Time the kernels and write a JSON report")
+    run.add_argument("--out", type=str, default="bench/current.json")
+    run.add_argument("--filter", nargs="+", default=None, choices=list(CASES), metavar="CASE",
+                     help=f"Only these cases ({', '.join(CASES)})")
+    run.add_argument("--sizes", nargs="+", type=int, default=None,
+                     help="Override the history lengths for every selected case")
+    run.add_argument("--repeat", type=int, default=5)
+    run.add_argument("--min-time", type=float, default=0.05, help="Minimum seconds per timing sample")
+    run.add_argument("--seed", type=int, default=0)
+
+    cmp_ = sub.add_parser("compare", help="Flag regressions against a saved baseline")
+    cmp_.add_argument("baseline")
+    cmp_.add_argument("current")
+    cmp_.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                      help="Relative slowdown of the median counted as a regression (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        sizes = {name: tuple(args.sizes) for name in CASES} if args.sizes else None
+        report = run_suite(
+            args.filter, sizes, seed=args.seed, repeat=args.repeat, min_time=args.min_time,
+            progress=lambda r: print(f"  {r['case']:<24} {r['size']:>6}  {format_seconds(r['median_s']):>10}"
+                                     f"  (±{format_seconds(r['stdev_s'])}, {r['loops']} loops)"),
+        )
+        save(report, args.out)
+        print(f"Saved {len(report['results'])} results to {args.out}")
+        return 0
+
+    rows = compare(load(args.baseline), load(args.current), args.threshold)
+    for r in rows:
+        flag = {"regression": "❌", "improved": "✅", "ok": "  "}[r["status"]]
+        print(f"{flag} {r['case']:<24} {r['size']:>6}  {format_seconds(r['baseline_s']):>10} → "
+              f"{format_seconds(r['current_s']):>10}  x{r['ratio']:.2f}")
+    regressions = [r for r in rows if r["status"] == "regression"]
+    print(f"{len(rows)} compared, {len(regressions)} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
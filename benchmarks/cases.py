@@ -0,0 +1,107 @@
+"""
+Benchmark cases: name -> (sizes, setup). setup(size, seed) builds the inputs
+once and returns the zero-argument callable that is timed.
+
+Intraday kernels are sized in 15m bars, backtester kernels in daily sessions
+(seven 1H bars each). grid_search runs a two-parameter grid (4 combos) so
+that its cost tracks simulate rather than the grid width.
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+
+import pandas as pd
+
+from backtester import ScannerParams, compute_htf_pools, find_reclaim, grid_search, simulate
+from benchmarks.synthetic import PATTERN_3C_BARS, make_daily_hourly, make_intraday
+from strategy.candles import latest_engulfing
+from strategy.heikin_ashi import to_heikin_ashi
+from strategy.indicators import compute_rsi
+from strategy.wick_retrace_3c import compute_pattern_signals, detect_latest_pattern
+
+BAR_SIZES = (500, 2000, 8000)
+DAY_SIZES = (60, 120, 250)
+GRID_KEYS = ["displacement_mult", "proximity_filter_pct"]
+
+
+def _intraday(size: int, seed: int):
+    df, planted = make_intraday(size, seed, every=max(PATTERN_3C_BARS + 6, min(120, size // 2)))
+    # End on a planted block so detect_latest_pattern takes its full path
+    last = max(planted["3c_bullish"] + planted["3c_bearish"])
+    return df.iloc[:last + 1]
+
+
+def _pattern_signals(size, seed):
+    df = _intraday(size, seed)
+    return lambda: compute_pattern_signals(df)
+
+
+def _detect_latest(size, seed):
+    df = _intraday(size, seed)
+    return lambda: detect_latest_pattern(df, "15M")
+
+
+def _heikin_ashi(size, seed):
+    df = _intraday(size, seed)
+    return lambda: to_heikin_ashi(df)
+
+
+def _rsi(size, seed):
+    close = _intraday(size, seed)["Close"]
+    return lambda: compute_rsi(close)
+
+
+def _engulfing(size, seed):
+    df = _intraday(size, seed)
+    return lambda: latest_engulfing(df, lookback=size)
+
+
+def _htf_pools(size, seed):
+    daily, _ = make_daily_hourly(size, seed)
+    return lambda: compute_htf_pools(daily, 0.001, 0.40)
+
+
+def _find_reclaim(size, seed):
+    """
+    One find_reclaim per session (pools and windows prepared in setup). The
+    1H window runs through the session after the wall day, as in the live
+    scanner, so the planted PDH reclaims are found.
+    """
+    daily, hourly = make_daily_hourly(size, seed)
+    params = ScannerParams()
+    inputs = []
+    for i in range(30, len(daily)):
+        window = daily.iloc[:i]
+        pools = compute_htf_pools(window, params.wall_wick_pct, params.fuel_wick_pct)
+        prior = hourly[hourly.index < window.index[-1] + pd.Timedelta(days=1)].tail(25)
+        inputs.append((pools, prior, float(window["Close"].iat[-1])))
+    return lambda: [find_reclaim(p, hw, price, params) for p, hw, price in inputs]
+
+
+def _simulate(size, seed):
+    daily, hourly = make_daily_hourly(size, seed)
+    params = ScannerParams()
+    return lambda: simulate("BENCH", daily, hourly, params)
+
+
+def _grid_search(size, seed):
+    daily, hourly = make_daily_hourly(size, seed)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return grid_search("BENCH", daily, hourly, param_keys=GRID_KEYS)
+    return run
+
+
+CASES = {
+    "compute_pattern_signals": (BAR_SIZES, _pattern_signals),
+    "detect_latest_pattern": (BAR_SIZES, _detect_latest),
+    "to_heikin_ashi": (BAR_SIZES, _heikin_ashi),
+    "compute_rsi": (BAR_SIZES, _rsi),
+    "latest_engulfing": (BAR_SIZES, _engulfing),
+    "compute_htf_pools": (DAY_SIZES, _htf_pools),
+    "find_reclaim": (DAY_SIZES, _find_reclaim),
+    "simulate": (DAY_SIZES, _simulate),
+    "grid_search": (DAY_SIZES, _grid_search),
+}
@@ -0,0 +1,128 @@
+"""
+Benchmark runner and baseline comparison.
+
+Each (case, size) is set up once, called once to warm up, then timed
+`repeat` times; every sample runs the kernel enough times (timeit-style
+autorange) to last at least `min_time` seconds, and the per-call time is
+recorded. Comparisons use the median, which is robust to one noisy sample.
+"""
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.cases import CASES
+
+DEFAULT_THRESHOLD = 0.15
+
+
+def _loops_for(fn, min_time: float) -> int:
+    loops = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - t0 >= min_time or loops >= 1_000_000:
+            return loops
+        loops *= 10 if time.perf_counter() - t0 < min_time / 10 else 2
+
+
+def time_callable(fn, repeat: int = 5, min_time: float = 0.05) -> dict:
+    fn()                                            # warm-up (imports, caches)
+    loops = _loops_for(fn, min_time)
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - t0) / loops)
+    return {
+        "loops": loops,
+        "repeat": repeat,
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(names: list[str] | None = None, sizes: dict[str, tuple] | None = None, seed: int = 0,
+              repeat: int = 5, min_time: float = 0.05, progress=None) -> dict:
+    """Time the selected cases; `sizes` overrides the default sizes per case."""
+    results = []
+    for name, (default_sizes, setup) in CASES.items():
+        if names and name not in names:
+            continue
+        for size in (sizes or {}).get(name, default_sizes):
+            timing = time_callable(setup(size, seed), repeat, min_time)
+            results.append({"case": name, "size": size, **timing})
+            if progress:
+                progress(results[-1])
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": f"{platform.system()} {platform.machine()}",
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def save(report: dict, path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """
+    One row per (case, size) present in both reports; status is "regression"
+    when the current median is more than `threshold` slower than the
+    baseline, "improved" when it is that much faster, else "ok".
+    """
+    base = {(r["case"], r["size"]): r for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        b = base.get((r["case"], r["size"]))
+        if b is None:
+            continue
+        ratio = r["median_s"] / b["median_s"] if b["median_s"] > 0 else float("inf")
+        status = "regression" if ratio > 1 + threshold else "improved" if ratio < 1 - threshold else "ok"
+        rows.append({"case": r["case"], "size": r["size"], "baseline_s": b["median_s"],
+                     "current_s": r["median_s"], "ratio": ratio, "status": status})
+    return rows
+
+
+def format_seconds(s: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("µs", 1e-6)):
+        if s >= scale:
+            return f"{s / scale:.2f} {unit}"
+    return f"{s / 1e-9:.0f} ns"
@@ -0,0 +1,130 @@
+"""
+Seeded synthetic OHLCV with planted patterns.
+
+Random-walk bars are overwritten at chosen positions with scaled copies of
+the setups the strategies look for, so every kernel has real work to do on
+any history length (and the tests can check the plants are detected):
+
+  3c          20 structure bars + C0..C3 wick-retrace block (bullish/bearish)
+  engulfing   red bar followed by a green bar engulfing its body (and the
+              bearish mirror)
+  reclaim     bearish daily candle opening at its high (clean PDH wall)
+              followed, in the next session, by a 1H bar that sweeps the
+              level and closes back below it with a large body
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+OHLCV = ["Open", "High", "Low", "Close", "Volume"]
+
+# Bars relative to a price of 100 (same geometry as the detector tests)
+_BULL_3C = (
+    [(p, p + 0.5, 96.5, p + 0.2, 1000) for p in (100.0 + (i % 3) * 0.1 for i in range(20))]
+    + [(102, 102.5, 94.0, 100, 1000), (100, 101.1, 98.0, 101, 1000),
+       (101, 102.1, 99.5, 102, 1200), (102, 103.1, 101.5, 103, 2000)]
+)
+_BEAR_3C = (
+    [(p, 103.5, p - 0.5, p - 0.2, 1000) for p in (100.0 - (i % 3) * 0.1 for i in range(20))]
+    + [(98, 106.0, 97.5, 100, 1000), (100, 102.0, 98.9, 99, 1000),
+       (99, 100.5, 97.9, 98, 1200), (98, 98.5, 96.9, 97, 2000)]
+)
+PATTERN_3C_BARS = len(_BULL_3C)
+
+
+def random_walk(n: int, seed: int = 0, freq: str = "15min", start: str = "2024-01-02 14:30",
+                price: float = 100.0, vol: float = 0.003) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = price * np.exp(np.cumsum(rng.normal(0, vol, n)))
+    open_ = np.r_[price, close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.exponential(vol / 2, n))
+    low = np.minimum(open_, close) * (1 - rng.exponential(vol / 2, n))
+    volume = rng.integers(50_000, 500_000, n).astype(float)
+    index = pd.date_range(start, periods=n, freq=freq, tz="UTC")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+
+
+def plant_3c(df: pd.DataFrame, end: int, direction: str = "BULLISH"):
+    """Overwrite bars end-23 .. end with a 3C block scaled to the local price; C3 is bar `end`."""
+    template = np.array(_BULL_3C if direction == "BULLISH" else _BEAR_3C, dtype=float)
+    scale = float(df["Close"].iat[end - PATTERN_3C_BARS]) / 100.0
+    template[:, :4] *= scale
+    df.iloc[end - PATTERN_3C_BARS + 1:end + 1, :5] = template
+
+
+def plant_engulfing(df: pd.DataFrame, at: int, direction: str = "BULLISH"):
+    """Bars at-1 / at become an engulfing pair around the local price."""
+    p = float(df["Close"].iat[at - 1])
+    if direction == "BULLISH":
+        prev, curr = (p * 1.004, p * 1.005, p * 0.997, p * 0.998), (p * 0.997, p * 1.008, p * 0.996, p * 1.006)
+    else:
+        prev, curr = (p * 0.998, p * 1.003, p * 0.995, p * 1.004), (p * 1.005, p * 1.006, p * 0.992, p * 0.996)
+    df.iloc[at - 1, :4] = prev
+    df.iloc[at, :4] = curr
+
+
+def make_intraday(n: int, seed: int = 0, every: int = 120) -> tuple[pd.DataFrame, dict[str, list[int]]]:
+    """
+    15m bars with a 3C block (alternating direction) every `every` bars and
+    an engulfing pair half-way between blocks. Returns (bars, planted
+    positions by pattern: C3 bar for 3c, engulfing bar for engulfing).
+    """
+    df = random_walk(n, seed)
+    planted: dict[str, list[int]] = {"3c_bullish": [], "3c_bearish": [], "engulfing": []}
+    for k, end in enumerate(range(every, n, every)):
+        direction = "BULLISH" if k % 2 == 0 else "BEARISH"
+        plant_3c(df, end, direction)
+        planted[f"3c_{direction.lower()}"].append(end)
+        at = end + every // 2
+        if at < n - 1:
+            plant_engulfing(df, at, "BULLISH" if k % 2 else "BEARISH")
+            planted["engulfing"].append(at)
+    return df, planted
+
+
+def make_daily_hourly(days: int, seed: int = 0, reclaim_every: int = 5) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Seven 1H bars per session with random clean-wall days (open at the high
+    or low); every `reclaim_every`-th session is forced into a bearish wall
+    day and the next session gets a 1H bar that sweeps the wall's high and
+    closes back below it.
+    Returns (daily, hourly), daily resampled from the hourly bars.
+    """
+    rng = np.random.default_rng(seed)
+    sessions = pd.bdate_range("2022-01-03", periods=days)
+    index = pd.DatetimeIndex(
+        [d + pd.Timedelta(hours=14 + k, minutes=30) for d in sessions for k in range(7)], tz="UTC"
+    )
+    n = len(index)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.006, n)))
+    open_ = np.r_[100, close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.exponential(0.002, n))
+    low = np.minimum(open_, close) * (1 - rng.exponential(0.002, n))
+
+    for d in range(days):
+        s, e = d * 7, d * 7 + 7
+        if rng.random() < 0.4 and close[e - 1] < open_[s]:
+            open_[s] = high[s] = high[s:e].max()
+        elif rng.random() < 0.4 and close[e - 1] > open_[s]:
+            open_[s] = low[s] = low[s:e].min()
+
+    for d in range(reclaim_every, days - 1, reclaim_every):
+        s, e = d * 7, d * 7 + 7
+        # Bearish wall day: opens at its high, closes lower, with a lower wick (fuel) of 0.6x the body
+        level = high[s:e].max()
+        open_[s] = high[s] = level
+        close[e - 1] = min(close[e - 1], level * 0.99)
+        body = level - close[e - 1]
+        low[s + 3] = min(low[s + 3], close[e - 1] - 0.6 * body)
+        # 4th bar of the next session sweeps the level and closes back below it; the session
+        # then drifts just under the level (inside the proximity filter)
+        b = e + 3
+        open_[b], high[b], low[b], close[b] = level * 1.004, level * 1.005, level * 0.994, level * 0.995
+        rest = slice(b + 1, e + 7)
+        open_[rest] = close[rest] = level * 0.995
+        high[rest], low[rest] = level * 0.9955, level * 0.9945
+
+    hourly = pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": 1e5}, index=index)
+    agg = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    return hourly.resample("1D").agg(agg).dropna(), hourly
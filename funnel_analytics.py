@@ -0,0 +1,95 @@
+"""
+CRT Flow Funnel Analytics — historical funnel conversion for the MTF strategies
+
+Classifies every historical LTF bar with evaluate_funnel_history (one vectorized
+pass per ticker) and reports stage counts and signal timestamps, so lookbacks
+like ITF_ENGULF_LOOKBACK can be tuned against the full history.
+
+Usage:
+    python funnel_analytics.py --tickers AAPL NVDA
+    python funnel_analytics.py --strategy ha_rsi --universe-file tickers.txt
+    python funnel_analytics.py --tickers TSLA --itf-lookback 2 4 6 8 --out funnel.json
+"""
+import argparse
+import concurrent.futures
+import json
+
+from backtester_3c import fetch_history_frames, load_universe_file
+from strategy import engulfing_mtf, ha_rsi_mtf
+from strategy.config import HTF_ENGULF_LOOKBACK, ITF_ENGULF_LOOKBACK
+from strategy.funnel import summarize_funnel
+
+
+def funnel_for_ticker(frames: dict, strategy: str, htf_lookback: int, itf_lookback: int) -> dict:
+    if strategy == "ha_rsi":
+        history = ha_rsi_mtf.evaluate_funnel_history(frames["4H"], frames["1H"], frames["15M"])
+    else:
+        history = engulfing_mtf.evaluate_funnel_history(
+            frames["4H"], frames["1H"], frames["15M"],
+            htf_lookback=htf_lookback, itf_lookback=itf_lookback,
+        )
+    return summarize_funnel(history)
+
+
+def print_funnel(ticker: str, label: str, summary: dict):
+    counts = summary["stage_counts"]
+    stages = " | ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+    print(f"  {ticker:6s} {label:12s} bars={summary['bars']:6d} | {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRT Flow historical funnel analytics")
+    parser.add_argument("--strategy",      choices=["engulfing", "ha_rsi"], default="engulfing")
+    parser.add_argument("--tickers",       nargs="+", default=None)
+    parser.add_argument("--universe-file", type=str,  default=None, help="One ticker per line (e.g. tickers.txt)")
+    parser.add_argument("--htf-lookback",  nargs="+", type=int, default=[HTF_ENGULF_LOOKBACK])
+    parser.add_argument("--itf-lookback",  nargs="+", type=int, default=[ITF_ENGULF_LOOKBACK])
+    parser.add_argument("--workers",       type=int,  default=8, help="Thread pool size for downloads")
+    parser.add_argument("--out",           type=str,  default=None, help="Write per-ticker results as JSON")
+    args = parser.parse_args()
+
+    tickers = [t.upper() for t in (args.tickers or [])]
+    if args.universe_file:
+        tickers += load_universe_file(args.universe_file)
+    tickers = list(dict.fromkeys(tickers)) or ["AAPL"]
+
+    if args.strategy == "ha_rsi":
+        combos = [(None, None)]
+    else:
+        combos = [(h, i) for h in args.htf_lookback for i in args.itf_lookback]
+
+    print(f"\n[*] Funnel analytics ({args.strategy}) — {len(tickers)} ticker(s), {len(combos)} lookback combo(s)")
+
+    results: dict = {}
+    totals: dict = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(fetch_history_frames, t): t for t in tickers}
+        for future in concurrent.futures.as_completed(futures):
+            ticker = futures[future]
+            try:
+                frames = future.result()
+            except Exception as e:
+                print(f"  Error on {ticker}: {e}")
+                continue
+            for htf_lb, itf_lb in combos:
+                label = "default" if htf_lb is None else f"htf={htf_lb} itf={itf_lb}"
+                summary = funnel_for_ticker(frames, args.strategy, htf_lb, itf_lb)
+                results.setdefault(ticker, {})[label] = summary
+                print_funnel(ticker, label, summary)
+                agg = totals.setdefault(label, {})
+                for stage, n in summary["stage_counts"].items():
+                    agg[stage] = agg.get(stage, 0) + n
+
+    print(f"\n  TOTALS:")
+    for label, counts in totals.items():
+        stages = " | ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+        print(f"    {label:12s} {stages}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n[+] Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Incremental simulate() results for the weekly re-optimization.
+
+Each week the optimizer re-runs the same grid on the same tickers with a few
+more sessions of data. Days already evaluated give the same trades as last
+week as long as their bars did not change, so every (ticker, ScannerParams)
+combo keeps its trades on disk together with:
+
+  - last_day     the last daily session simulate() evaluated
+  - last_hourly  the last 1H bar the outcomes were resolved against
+  - resume_day   the day after last_day, or the day of the oldest trade that
+    was still OPEN, whichever is earlier
+  - warmup_from  the first bar simulate(start_day=resume_day) reads: the
+    first of the month two calendar months earlier (the monthly pool looks
+    back one full month)
+  - fingerprints (sim_cache.frame_fingerprint) of the daily bars from
+    warmup_from to last_day and of the 1H bars from warmup_from to last_hourly
+
+On the next run, when the engine and both fingerprints still match, trades
+before resume_day are kept and simulate() only evaluates resume_day onwards,
+on the bars from warmup_from. Re-simulating from the oldest OPEN trade
+resolves it against the new 1H bars exactly as a full run would. The merged
+trades are then summarised with compute_stats(), so the weekly cost follows
+the new sessions rather than the whole history.
+
+Only the warm-up region is fingerprinted because the download windows
+(BACKTEST_PERIOD daily, 730d 1H) move forward every week: sessions that
+drop out of them keep their stored trades, so the stats are cumulative over
+every session seen. When the warm-up bars changed (split/dividend
+re-adjustment, a partial bar that has since closed) or backtester.py was
+edited, the combo is simulated in full and its entry rewritten.
+
+Entries are JSON files under <root>/<TICKER>/<params hash>.json, written
+atomically; each optimizer process works on its own tickers.
+
+Usage:
+    store = IncrementalSimStore("sim_incremental")
+    trades, stats = store.evaluate("AAPL", daily_df, hourly_df, ScannerParams())
+
+    python optimizer_agent.py --incremental sim_incremental
+    python incremental_sim.py info --root sim_incremental
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict
+
+import pandas as pd
+
+from sim_cache import engine_version, frame_fingerprint
+from trade_log import SIMULATE_COLUMNS, TradeLog
+
+DEFAULT_ROOT = "sim_incremental"
+MIN_WINDOW = 30          # simulate() skips the first 30 daily candles
+WARMUP_MONTHS = 2        # calendar months of bars kept before resume_day
+
+
+def params_key(params) -> str:
+    payload = json.dumps(asdict(params), sort_keys=True)
+    return hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+
+def _local(index) -> pd.DatetimeIndex:
+    """Wall-clock timestamps (the dates simulate() records trades under)."""
+    index = pd.DatetimeIndex(index)
+    return index.tz_localize(None) if index.tz is not None else index
+
+
+def warmup_start(daily_df: pd.DataFrame, start_day) -> pd.Timestamp | None:
+    """
+    First bar simulate(start_day=...) needs to match a full run: the first day
+    of the month WARMUP_MONTHS before start_day. None when that would leave
+    fewer than MIN_WINDOW candles ahead of start_day (the whole frame is needed).
+    """
+    start = pd.Timestamp(start_day)
+    cut = (start - pd.DateOffset(months=WARMUP_MONTHS)).replace(day=1)
+    daily_local = _local(daily_df.index)
+    if int(((daily_local >= cut) & (daily_local < start)).sum()) < MIN_WINDOW:
+        return None
+    return cut
+
+
+def _since(df: pd.DataFrame, first) -> pd.DataFrame:
+    return df if first is None else df[_local(df.index) >= pd.Timestamp(first)]
+
+
+def warmup_slices(daily_df: pd.DataFrame, hourly_df: pd.DataFrame,
+                  start_day) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """The daily and 1H bars from warmup_start() on."""
+    cut = warmup_start(daily_df, start_day)
+    return _since(daily_df, cut), _since(hourly_df, cut)
+
+
+class IncrementalSimStore:
+    """
+    store = IncrementalSimStore(root)
+    trades, stats = store.evaluate(ticker, daily_df, hourly_df, params)   # simulate + compute_stats
+    store.full, store.incremental, store.days_simulated, store.days_total
+
+    Same evaluate() interface as sim_cache.SimulationCache, so it plugs into
+    grid_search(cache=...) and the optimizer unchanged.
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT):
+        self.root = root
+        self._lock = threading.Lock()
+        self.reset_counters()
+        os.makedirs(root, exist_ok=True)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        # A copy in a worker process reports only its own work (see add_counters)
+        self.reset_counters()
+
+    # ── counters ─────────────────────────────────────────────
+    def reset_counters(self):
+        self.full = 0
+        self.incremental = 0
+        self.days_simulated = 0
+        self.days_total = 0
+
+    def counters(self) -> dict:
+        return {"full": self.full, "incremental": self.incremental,
+                "days_simulated": self.days_simulated, "days_total": self.days_total}
+
+    def add_counters(self, counters: dict):
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def summary(self) -> str:
+        share = f" ({self.days_simulated / self.days_total:.0%} of sessions)" if self.days_total else ""
+        return (f"incremental sim: {self.incremental} resumed / {self.full} full, "
+                f"{self.days_simulated} of {self.days_total} session-evaluations simulated{share}")
+
+    # ── storage ──────────────────────────────────────────────
+    def _path(self, ticker: str, params) -> str:
+        safe = ticker.replace(os.sep, "_")
+        return os.path.join(self.root, safe, params_key(params) + ".json")
+
+    def load(self, ticker: str, params) -> dict | None:
+        try:
+            with open(self._path(ticker, params), encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, ticker: str, params, entry: dict):
+        path = self._path(ticker, params)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(entry, fh)
+        os.replace(tmp, path)
+
+    # ── simulate ─────────────────────────────────────────────
+    @staticmethod
+    def _fingerprints(daily_df: pd.DataFrame, hourly_df: pd.DataFrame, first,
+                      last_day, last_hourly) -> tuple[str, str]:
+        """Fingerprints of the daily bars first..last_day and the 1H bars first..last_hourly."""
+        daily = _since(daily_df, first)
+        hourly = _since(hourly_df, first)
+        daily = daily[_local(daily.index).normalize() <= pd.Timestamp(last_day)]
+        hourly = hourly[hourly.index <= last_hourly]
+        return frame_fingerprint(daily), frame_fingerprint(hourly)
+
+    def resume_day(self, entry: dict | None, daily_df: pd.DataFrame, hourly_df: pd.DataFrame):
+        """Day to resume simulate() from, or None when the entry cannot be reused."""
+        if not entry or entry.get("engine") != engine_version():
+            return None
+        last_hourly = pd.Timestamp(entry["last_hourly"])
+        if hourly_df.empty or hourly_df.index[-1] < last_hourly:
+            return None
+        fingerprints = self._fingerprints(daily_df, hourly_df, entry["warmup_from"],
+                                          entry["last_day"], last_hourly)
+        if fingerprints != (entry["daily_fp"], entry["hourly_fp"]):
+            return None
+        return pd.Timestamp(entry["resume_day"]).date()
+
+    def evaluate(self, ticker: str, daily_df: pd.DataFrame, hourly_df: pd.DataFrame,
+                 params) -> tuple[TradeLog, dict | None]:
+        """simulate() + compute_stats(), re-simulating only the days not covered by the stored entry."""
+        from backtester import compute_stats, simulate
+
+        days = _local(daily_df.index).normalize()
+        if len(days) <= MIN_WINDOW or hourly_df.empty:
+            trades = simulate(ticker, daily_df, hourly_df, params)
+            return trades, compute_stats(trades)
+
+        entry = self.load(ticker, params)
+        start_day = self.resume_day(entry, daily_df, hourly_df)
+        trades = TradeLog()
+        if start_day is None:
+            new = simulate(ticker, daily_df, hourly_df, params)
+            simulated = len(days) - MIN_WINDOW
+            with self._lock:
+                self.full += 1
+        else:
+            kept = entry["trades"]
+            keep = [i for i, day in enumerate(kept["day"]) if pd.Timestamp(day).date() < start_day]
+            trades.extend({c: [kept[c][i] for i in keep] for c in kept if c != "ticker"}, ticker=ticker)
+            daily_in, hourly_in = warmup_slices(daily_df, hourly_df, start_day)
+            new = simulate(ticker, daily_in, hourly_in, params, start_day=start_day)
+            # simulate() evaluates the day of every candle but the last
+            simulated = int((days[:-1] >= pd.Timestamp(start_day)).sum())
+            with self._lock:
+                self.incremental += 1
+        trades.extend_log(new)
+        with self._lock:
+            self.days_simulated += simulated
+            self.days_total += len(days) - MIN_WINDOW
+
+        self.save(ticker, params, self._entry(trades, daily_df, hourly_df, params))
+        return trades, compute_stats(trades)
+
+    def _entry(self, trades: TradeLog, daily_df: pd.DataFrame, hourly_df: pd.DataFrame, params) -> dict:
+        arrays = trades.arrays()
+        last_day = _local(daily_df.index)[-2].date()
+        last_hourly = hourly_df.index[-1]
+        resume = pd.Timestamp(last_day) + pd.Timedelta(days=1)
+        open_days = [pd.Timestamp(d) for d, r in zip(arrays["day"], arrays["result"]) if r == "OPEN"]
+        if open_days:
+            resume = min(resume, min(open_days))
+        first = warmup_start(daily_df, resume)
+        daily_fp, hourly_fp = self._fingerprints(daily_df, hourly_df, first, last_day, last_hourly)
+        return {
+            "engine":      engine_version(),
+            "params":      asdict(params),
+            "last_day":    str(last_day),
+            "last_hourly": last_hourly.isoformat(),
+            "resume_day":  str(resume.date()),
+            "warmup_from": str(first.date()) if first is not None else None,
+            "daily_fp":    daily_fp,
+            "hourly_fp":   hourly_fp,
+            "trades":      {c: arrays[c].tolist() for c in SIMULATE_COLUMNS if c in arrays},
+        }
+
+    def simulate(self, ticker: str, daily_df: pd.DataFrame, hourly_df: pd.DataFrame, params) -> TradeLog:
+        return self.evaluate(ticker, daily_df, hourly_df, params)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRT Flow incremental simulate() store")
+    parser.add_argument("command", choices=["info", "clear"])
+    parser.add_argument("--root", type=str, default=DEFAULT_ROOT)
+    args = parser.parse_args()
+
+    entries = []
+    for dirpath, _, names in os.walk(args.root):
+        entries += [os.path.join(dirpath, n) for n in names if n.endswith(".json")]
+    if args.command == "info":
+        tickers = {os.path.basename(os.path.dirname(p)) for p in entries}
+        size = sum(os.path.getsize(p) for p in entries)
+        print(f"{args.root}: {len(entries)} combos over {len(tickers)} tickers, {size / 1e6:.1f} MB "
+              f"(engine {engine_version()})")
+    else:
+        for path in entries:
+            os.remove(path)
+        print(f"Removed {len(entries)} entries from {args.root}")
+
+
+if __name__ == "__main__":
+    main()
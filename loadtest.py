@@ -0,0 +1,344 @@
+"""
+CRT Flow Load Test — the scanner at universe scale, offline
+
+Runs the real scan orchestration (scanner.run_scan: thread pool or
+--pipeline, dedup, market caps, batched crt_signals writes, system_logs
+handler) with the two external services swapped for local stand-ins:
+
+  market data   SyntheticMarket: per-ticker 4H/1H/15m frames drawn from a
+                small set of seeded templates (with planted 3C setups) or from
+                recorded bars (replay.py record), with configurable latency and
+                error rate
+  Supabase      local_supabase.PostgrestServer: an HTTP endpoint speaking
+                PostgREST, reached through a real supabase-py client, with its
+                own latency and error rate
+
+Every (universe size, workers) combination is run once against a fresh sink
+and reported: throughput, peak RSS (including --pipeline worker processes)
+and p50/p95/p99 per stage from scanner_metrics.
+
+Usage:
+    python loadtest.py --tickers 2500 10000 --workers 8 16 32
+    python loadtest.py --tickers 2500 --workers 16 --pipeline --fetch-latency 0.3 --fetch-error-rate 0.02
+    python loadtest.py --data-dir replay_bars/ --tickers 2500 --db-latency 0.02 --out loadtest.json
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import resource
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from supabase import create_client
+
+import scanner
+from benchmarks.synthetic import make_intraday
+from local_supabase import LocalSupabase, PostgrestServer
+from market_data import resample_to_4h
+from profiling import add_profile_args, start_profiling
+from replay import discover_symbols, load_bars
+from scanner_metrics import METRICS
+
+LOCAL_KEY = "loadtest-local-key"
+BARS_15M = 60 * 26          # YF_PERIOD_15M of regular-session bars
+
+
+# ─────────────────────────────────────────────────────────────
+# MARKET DATA
+# ─────────────────────────────────────────────────────────────
+
+def synthetic_frames(seed: int, with_signal: bool) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """fetch_mtf_frames-shaped frames; with_signal ends the 15m history on a planted 3C C3 bar."""
+    df_15m, planted = make_intraday(BARS_15M, seed)
+    if with_signal:
+        end = planted["3c_bullish" if seed % 2 == 0 else "3c_bearish"][-1]
+        df_15m = df_15m.iloc[:end + 1]
+    agg = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    df_1h = df_15m.resample("1h").agg(agg).dropna()
+    return resample_to_4h(df_1h), df_1h, df_15m
+
+
+def recorded_frames(data_dir: str, symbol: str) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame] | None:
+    df_1h = load_bars(data_dir, symbol, "1h")
+    df_15m = load_bars(data_dir, symbol, "15m")
+    if df_1h is None or df_15m is None:
+        return None
+    return resample_to_4h(df_1h), df_1h, df_15m
+
+
+class SyntheticMarket:
+    """
+    Stand-in for fetch_mtf_frames / get_market_cap. Each ticker maps (stable
+    hash) onto one of a few template frame sets and gets its own copy, so a
+    10,000-ticker universe costs no more to build than the templates. Every
+    call sleeps an exponentially distributed latency with mean `latency` and
+    fails with probability `error_rate` — returning no frames, as
+    fetch_mtf_frames does when yfinance raises.
+    """
+
+    def __init__(self, templates: list[tuple], latency: float = 0.0, error_rate: float = 0.0,
+                 mcap_latency: float | None = None, seed: int = 0):
+        if not templates:
+            raise ValueError("SyntheticMarket needs at least one template")
+        self.templates = templates
+        self.latency = latency
+        self.error_rate = error_rate
+        self.mcap_latency = latency if mcap_latency is None else mcap_latency
+        self.fetches = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def generated(cls, count: int = 64, signal_rate: float = 0.1, seed: int = 0, **kwargs) -> "SyntheticMarket":
+        signals = max(1, round(count * signal_rate)) if signal_rate > 0 else 0
+        templates = [synthetic_frames(seed + i, with_signal=i < signals) for i in range(count)]
+        return cls(templates, seed=seed, **kwargs)
+
+    @classmethod
+    def recorded(cls, data_dir: str, **kwargs) -> "SyntheticMarket":
+        frames = [recorded_frames(data_dir, s) for s in discover_symbols(data_dir)]
+        return cls([f for f in frames if f is not None], **kwargs)
+
+    def _template(self, ticker: str) -> tuple:
+        digest = hashlib.blake2b(ticker.encode(), digest_size=8).digest()
+        return self.templates[int.from_bytes(digest, "big") % len(self.templates)]
+
+    def _wait(self, mean: float) -> bool:
+        """Sleep one simulated round trip; True when the call should fail."""
+        with self._lock:
+            delay = self._rng.expovariate(1 / mean) if mean > 0 else 0.0
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        return fail
+
+    def fetch(self, ticker: str):
+        with self._lock:
+            self.fetches += 1
+        if self._wait(self.latency):
+            with self._lock:
+                self.errors += 1
+            return None, None, None
+        return tuple(df.copy() for df in self._template(ticker))
+
+    def market_cap(self, ticker: str) -> int | None:
+        if self._wait(self.mcap_latency):
+            return None
+        digest = hashlib.blake2b(ticker.encode(), digest_size=4).digest()
+        return 50_000_000 + int.from_bytes(digest, "big") * 10
+
+
+def universe(size: int) -> list[str]:
+    return [f"LT{i:05d}" for i in range(size)]
+
+
+# ─────────────────────────────────────────────────────────────
+# MEMORY
+# ─────────────────────────────────────────────────────────────
+
+def _rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+class MemoryMonitor:
+    """
+    Peak resident memory of this process plus its multiprocessing children
+    (--pipeline workers), sampled on a thread. Without /proc the peak falls
+    back to getrusage's maxrss, which covers the whole process lifetime.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.baseline_mb = 0.0
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def sample(self) -> float:
+        return _rss_mb(os.getpid()) + sum(_rss_mb(p.pid) for p in multiprocessing.active_children())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, self.sample())
+
+    def __enter__(self) -> "MemoryMonitor":
+        self.baseline_mb = self.peak_mb = self.sample()
+        self._thread = threading.Thread(target=self._run, name="memory-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, self.sample())
+        if not self.peak_mb:
+            self.peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# ─────────────────────────────────────────────────────────────
+# RUN
+# ─────────────────────────────────────────────────────────────
+
+def _ms(values: list[float], q: float) -> float:
+    return round(float(np.percentile(values, q)) * 1000, 2) if values else 0.0
+
+
+def run_load(
+    tickers: list[str],
+    market: SyntheticMarket,
+    workers: int = 8,
+    pipeline: bool = False,
+    cpu_workers: int | None = None,
+    enrich_workers: int = 4,
+    queue_size: int = 64,
+    db_latency: float = 0.0,
+    db_error_rate: float = 0.0,
+    seed: int = 0,
+) -> dict:
+    """
+    One scanner.run_scan over `tickers` with persistence on, against a fresh
+    PostgrestServer; the writers are drained before the clock stops.
+    """
+    args = argparse.Namespace(
+        persist=True, workers=workers, pipeline=pipeline, cpu_workers=cpu_workers,
+        enrich_workers=enrich_workers, queue_size=queue_size,
+    )
+    db = LocalSupabase(latency=db_latency, fail_rate=db_error_rate, seed=seed)
+    fetch_errors = market.errors
+    previous = scanner.supabase
+
+    with PostgrestServer(db) as server:
+        client = create_client(server.url, LOCAL_KEY)
+        log_handler = scanner.SupabaseLoggingHandler(client)
+        log_handler.setFormatter(scanner.formatter)
+        scanner.supabase = client
+        scanner.logger.addHandler(log_handler)
+        try:
+            with MemoryMonitor() as memory:
+                started = time.perf_counter()
+                scanner.start_signal_deduper(None)
+                writer = scanner.start_signal_writer()
+                stats = scanner.run_scan(args, tickers, fetch_frames=market.fetch,
+                                         market_cap_lookup=market.market_cap)
+                scanner.stop_signal_writer()
+                scanner.logger.removeHandler(log_handler)
+                log_handler.close()
+                elapsed = time.perf_counter() - started
+        finally:
+            scanner.logger.removeHandler(log_handler)
+            scanner.supabase = previous
+            scanner.signal_deduper = None
+        timings = dict(server.timings)
+
+    stages = METRICS.to_dict()["stages"]
+    return {
+        "tickers":        len(tickers),
+        "workers":        workers,
+        "mode":           "pipeline" if pipeline else "threads",
+        "scan_s":         stats["elapsed_s"],
+        "elapsed_s":      round(elapsed, 3),
+        "tickers_per_s":  round(len(tickers) / elapsed, 1) if elapsed else 0.0,
+        "signals":        stats["signals"],
+        "funnel":         stats["funnel"],
+        "fetch_errors":   market.errors - fetch_errors,
+        "rows":           {table: len(db.rows(table)) for table in ("crt_signals", "system_logs")},
+        "crt_signals":    writer.summary.as_dict(),
+        "system_logs":    log_handler.stats(),
+        "peak_rss_mb":    round(memory.peak_mb, 1),
+        "rss_growth_mb":  round(memory.peak_mb - memory.baseline_mb, 1),
+        "stages": {
+            name: {
+                "count": s["count"], "errors": s["errors"], "p50_ms": round(s["p50_s"] * 1000, 2),
+                "p95_ms": round(s["p95_s"] * 1000, 2), "p99_ms": round(s["p99_s"] * 1000, 2),
+                "max_ms": round(s["max_s"] * 1000, 2),
+            }
+            for name, s in stages.items()
+        },
+        "http": {
+            table: {"requests": len(v), "p50_ms": _ms(v, 50), "p99_ms": _ms(v, 99)}
+            for table, v in sorted(timings.items())
+        },
+    }
+
+
+def _p99(report: dict, prefix: str) -> float:
+    return max((s["p99_ms"] for name, s in report["stages"].items() if name.startswith(prefix)), default=0.0)
+
+
+def print_header():
+    print(f"\n  {'tickers':>7} {'workers':>7} {'mode':<8} {'wall s':>8} {'tick/s':>8} {'signals':>7} "
+          f"{'errors':>6} {'peak MB':>8} {'fetch p99':>10} {'detect p99':>10} {'write p99':>10}")
+
+
+def print_row(r: dict):
+    print(f"  {r['tickers']:>7} {r['workers']:>7} {r['mode']:<8} {r['elapsed_s']:>8.2f} {r['tickers_per_s']:>8.1f} "
+          f"{r['signals']:>7} {r['fetch_errors']:>6} {r['peak_rss_mb']:>8.1f} {_p99(r, 'fetch'):>8.1f}ms "
+          f"{_p99(r, 'detect_'):>8.1f}ms {_p99(r, 'write_'):>8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRT Flow scanner load test with local market data and Supabase")
+    parser.add_argument("--tickers", nargs="+", type=int, default=[500], help="Universe sizes to run")
+    parser.add_argument("--workers", nargs="+", type=int, default=[8], help="Worker counts to run (--workers of scanner)")
+    parser.add_argument("--pipeline", action="store_true", help="Use the staged pipeline (scanner --pipeline)")
+    parser.add_argument("--cpu-workers", type=int, default=None)
+    parser.add_argument("--enrich-workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--fetch-latency", type=float, default=0.05, help="Mean seconds per market-data call")
+    parser.add_argument("--fetch-error-rate", type=float, default=0.0, help="Fraction of fetches returning no data")
+    parser.add_argument("--mcap-latency", type=float, default=None, help="Mean seconds per market-cap call (default: --fetch-latency)")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="Seconds added to each sink request")
+    parser.add_argument("--db-error-rate", type=float, default=0.0, help="Fraction of sink requests answered with 503")
+    parser.add_argument("--data-dir", type=str, default=None, help="Serve recorded bars (replay.py record) instead of synthetic ones")
+    parser.add_argument("--templates", type=int, default=64, help="Distinct synthetic frame sets")
+    parser.add_argument("--signal-rate", type=float, default=0.1, help="Fraction of synthetic templates ending on a 3C setup")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=str, default=None, help="Write every run's report to this JSON file")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_profiling(args)
+
+    market_opts = {"latency": args.fetch_latency, "error_rate": args.fetch_error_rate, "mcap_latency": args.mcap_latency}
+    if args.data_dir:
+        market = SyntheticMarket.recorded(args.data_dir, seed=args.seed, **market_opts)
+        source = f"{len(market.templates)} recorded symbol(s) from {args.data_dir}"
+    else:
+        market = SyntheticMarket.generated(args.templates, args.signal_rate, args.seed, **market_opts)
+        source = f"{len(market.templates)} synthetic templates"
+    print(f"[*] Load test: {source}, fetch latency {args.fetch_latency * 1000:.0f}ms, "
+          f"db latency {args.db_latency * 1000:.0f}ms")
+
+    reports = []
+    print_header()
+    for size in args.tickers:
+        for workers in args.workers:
+            report = run_load(
+                universe(size), market, workers, args.pipeline, args.cpu_workers, args.enrich_workers,
+                args.queue_size, args.db_latency, args.db_error_rate, args.seed,
+            )
+            reports.append(report)
+            print_row(report)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(reports, fh, indent=2)
+        print(f"\nSaved {len(reports)} run(s) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+In-memory stand-in for the subset of the supabase-py client this repo uses.
+
+Used by the replay/load-test harnesses and the tests to drive the production
+persistence paths without touching a real PostgREST endpoint. Supports
+table().insert/upsert/update/select with eq/in_/is_/gte/lte/lt/gt filters,
+order and limit, rpc() against registered Python functions, plus
+configurable latency, failure injection and a declared column schema that
+raises PGRST204 like PostgREST's schema cache does.
+
+PostgrestServer serves the same store over HTTP in PostgREST's wire format,
+so a real supabase-py client (and its connection pool, JSON encoding and
+error parsing) can be pointed at it.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from postgrest.exceptions import APIError
+
+
+@dataclass
+class LocalResponse:
+    data: list[dict] = field(default_factory=list)
+    count: int | None = None
+
+
+class LocalSupabase:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        fail_rate: float = 0.0,
+        schema: dict[str, set[str]] | None = None,
+        seed: int | None = None,
+        functions: dict[str, Callable[["LocalSupabase", dict], list[dict]]] | None = None,
+    ):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.schema = schema or {}
+        self.functions = dict(functions or {})
+        self.tables: dict[str, list[dict]] = {}
+        self.requests: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+    def table(self, name: str) -> "LocalQuery":
+        return LocalQuery(self, name)
+
+    def rpc(self, fn: str, params: dict | None = None) -> "LocalQuery":
+        """Call a function registered in `functions` as fn(client, params) -> rows."""
+        query = LocalQuery(self, fn)
+        query._op = "rpc"
+        query._payload = [params or {}]
+        return query
+
+    def rows(self, name: str) -> list[dict]:
+        with self._lock:
+            return [dict(r) for r in self.tables.get(name, [])]
+
+    # ── request plumbing ─────────────────────────────────────
+    def _request(self, table: str) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests[table] = self.requests.get(table, 0) + 1
+            fail = self.fail_rate and self._rng.random() < self.fail_rate
+        if fail:
+            raise APIError({"code": "503", "message": "Service Unavailable (injected)"})
+
+    def _check_columns(self, table: str, rows: list[dict]) -> None:
+        allowed = self.schema.get(table)
+        if not allowed:
+            return
+        for row in rows:
+            for col in row:
+                if col not in allowed:
+                    raise APIError({
+                        "code": "PGRST204",
+                        "message": f"Could not find the '{col}' column of '{table}' in the schema cache",
+                    })
+
+
+_FILTERS: dict[str, Callable[[Any, Any], bool]] = {
+    "eq":  lambda v, x: v == x,
+    "neq": lambda v, x: v != x,
+    "gt":  lambda v, x: v is not None and v > x,
+    "gte": lambda v, x: v is not None and v >= x,
+    "lt":  lambda v, x: v is not None and v < x,
+    "lte": lambda v, x: v is not None and v <= x,
+    "in":  lambda v, x: v in x,
+    "is":  lambda v, x: v is None if x in (None, "null") else v is x,
+}
+
+
+class LocalQuery:
+    def __init__(self, client: LocalSupabase, table: str):
+        self.client = client
+        self.table = table
+        self._op = "select"
+        self._payload: list[dict] = []
+        self._on_conflict: list[str] = []
+        self._ignore_duplicates = False
+        self._columns: list[str] | None = None
+        self._filters: list[tuple[str, str, Any]] = []
+        self._order: list[tuple[str, bool]] = []
+        self._limit: int | None = None
+
+    # ── builders ─────────────────────────────────────────────
+    def select(self, columns: str = "*", **_kwargs) -> "LocalQuery":
+        self._op = "select"
+        cols = [c.strip() for c in columns.split(",") if c.strip()]
+        self._columns = None if cols in ([], ["*"]) else cols
+        return self
+
+    def insert(self, rows, **_kwargs) -> "LocalQuery":
+        self._op = "insert"
+        self._payload = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: str = "", ignore_duplicates: bool = False, **_kwargs) -> "LocalQuery":
+        self._op = "upsert"
+        self._payload = rows if isinstance(rows, list) else [rows]
+        self._on_conflict = [c.strip() for c in on_conflict.split(",") if c.strip()]
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, values: dict, **_kwargs) -> "LocalQuery":
+        self._op = "update"
+        self._payload = [values]
+        return self
+
+    def _filter(self, op: str, column: str, value: Any) -> "LocalQuery":
+        self._filters.append((op, column, value))
+        return self
+
+    def eq(self, column, value):  return self._filter("eq", column, value)
+    def neq(self, column, value): return self._filter("neq", column, value)
+    def gt(self, column, value):  return self._filter("gt", column, value)
+    def gte(self, column, value): return self._filter("gte", column, value)
+    def lt(self, column, value):  return self._filter("lt", column, value)
+    def lte(self, column, value): return self._filter("lte", column, value)
+    def in_(self, column, values): return self._filter("in", column, list(values))
+    def is_(self, column, value): return self._filter("is", column, value)
+
+    def order(self, column: str, desc: bool = False, **_kwargs) -> "LocalQuery":
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, n: int, **_kwargs) -> "LocalQuery":
+        self._limit = n
+        return self
+
+    # ── execution ────────────────────────────────────────────
+    def _matches(self, row: dict) -> bool:
+        return all(_FILTERS[op](row.get(col), val) for op, col, val in self._filters)
+
+    def execute(self) -> LocalResponse:
+        c = self.client
+        c._request(self.table)
+        if self._op == "rpc":
+            fn = c.functions.get(self.table)
+            if fn is None:
+                raise APIError({
+                    "code": "PGRST202",
+                    "message": f"Could not find the function public.{self.table} in the schema cache",
+                })
+            return LocalResponse(data=fn(c, self._payload[0]))
+        if self._op in ("insert", "upsert", "update"):
+            c._check_columns(self.table, self._payload)
+
+        with c._lock:
+            rows = c.tables.setdefault(self.table, [])
+            if self._op == "insert":
+                new = [dict(r) for r in self._payload]
+                rows.extend(new)
+                return LocalResponse(data=new)
+
+            if self._op == "upsert":
+                if self._on_conflict:
+                    keys = [tuple(r.get(k) for k in self._on_conflict) for r in self._payload]
+                    if len(set(keys)) != len(keys):
+                        raise APIError({
+                            "code": "21000",
+                            "message": "ON CONFLICT DO UPDATE command cannot affect row a second time",
+                        })
+                index = {tuple(r.get(k) for k in self._on_conflict): r for r in rows} if self._on_conflict else {}
+                written = []
+                for payload in self._payload:
+                    key = tuple(payload.get(k) for k in self._on_conflict)
+                    existing = index.get(key) if self._on_conflict else None
+                    if existing is None:
+                        new = dict(payload)
+                        rows.append(new)
+                        if self._on_conflict:
+                            index[key] = new
+                        written.append(dict(new))
+                    elif not self._ignore_duplicates:
+                        existing.update(payload)
+                        written.append(dict(existing))
+                return LocalResponse(data=written)
+
+            if self._op == "update":
+                updated = []
+                for r in rows:
+                    if self._matches(r):
+                        r.update(self._payload[0])
+                        updated.append(dict(r))
+                return LocalResponse(data=updated)
+
+            out = [r for r in rows if self._matches(r)]
+            for col, desc in reversed(self._order):
+                out.sort(key=lambda r: (r.get(col) is None, r.get(col)), reverse=desc)
+            if self._limit is not None:
+                out = out[: self._limit]
+            if self._columns is not None:
+                out = [{k: r.get(k) for k in self._columns} for r in out]
+            else:
+                out = [dict(r) for r in out]
+            return LocalResponse(data=out, count=len(out))
+
+
+# ─────────────────────────────────────────────────────────────
+# POSTGREST OVER HTTP
+# ─────────────────────────────────────────────────────────────
+
+_RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def _literal(raw: str) -> Any:
+    """Query-string value to the Python type LocalSupabase compares against."""
+    if raw == "null":
+        return None
+    if raw in ("true", "false"):
+        return raw == "true"
+    for cast in (int, float):
+        try:
+            return cast(raw)
+        except ValueError:
+            pass
+    return raw
+
+
+def _filter_value(op: str, raw: str) -> Any:
+    if op == "in":
+        inner = raw[1:-1] if raw.startswith("(") and raw.endswith(")") else raw
+        return [_literal(v) for v in next(csv.reader([inner]))] if inner else []
+    return _literal(raw)
+
+
+class PostgrestServer:
+    """
+    with PostgrestServer(LocalSupabase(latency=0.02)) as server:
+        client = create_client(server.url, "local-key")
+        client.table("crt_signals").upsert(rows, on_conflict="signal_key").execute()
+
+    Handles /rest/v1/<table>: GET (select=, <col>=<op>.<value>, order=,
+    limit=), POST (insert; upsert when Prefer carries resolution=…-duplicates,
+    with on_conflict=) and PATCH; POST /rest/v1/rpc/<fn> calls db.rpc. APIErrors raised by the store come back as
+    PostgREST error bodies (injected failures as 503). Server-side time per
+    table is kept in `timings`.
+    """
+
+    def __init__(self, db: LocalSupabase | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.db = db or LocalSupabase()
+        self.timings: dict[str, list[float]] = {}
+        self._timings_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _PostgrestHandler)
+        self._server.daemon_threads = True
+        self._server.owner = self
+        self._connections: set[socket.socket] = set()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "PostgrestServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="postgrest", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        # Keep-alive handler threads block on their socket until the client hangs up
+        with self._timings_lock:
+            connections = list(self._connections)
+        for conn in connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._server.server_close()
+
+    def __enter__(self) -> "PostgrestServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _track(self, conn: socket.socket, open_: bool):
+        with self._timings_lock:
+            (self._connections.add if open_ else self._connections.discard)(conn)
+
+    def _record(self, table: str, seconds: float):
+        with self._timings_lock:
+            self.timings.setdefault(table, []).append(seconds)
+
+    def handle(self, method: str, path: str, query: str, prefer: str, body: Any) -> tuple[int, Any]:
+        parts = path.strip("/").split("/")
+        if len(parts) not in (3, 4) or parts[:2] != ["rest", "v1"] or (len(parts) == 4 and parts[2] != "rpc"):
+            return 404, {"code": "PGRST125", "message": f"Invalid path {path}"}
+        table = parts[-1]
+        params = parse_qsl(query, keep_blank_values=True)
+        q = self.db.table(table)
+
+        if len(parts) == 4:
+            q = self.db.rpc(table, body or {})
+        elif method == "POST":
+            if "resolution=" in prefer:
+                on_conflict = dict(params).get("on_conflict", "")
+                q.upsert(body, on_conflict=on_conflict, ignore_duplicates="resolution=ignore-duplicates" in prefer)
+            else:
+                q.insert(body)
+        elif method == "PATCH":
+            q.update(body)
+        else:
+            q.select(dict(params).get("select", "*"))
+
+        for key, value in params:
+            if key == "order":
+                for term in value.split(","):
+                    column, *mods = term.split(".")
+                    q.order(column, desc="desc" in mods)
+            elif key == "limit":
+                q.limit(int(value))
+            elif key not in _RESERVED_PARAMS:
+                op, _, raw = value.partition(".")
+                builder = getattr(q, {"in": "in_", "is": "is_"}.get(op, op), None)
+                if op not in _FILTERS or builder is None:
+                    return 400, {"code": "PGRST100", "message": f"Unsupported filter {key}={value}"}
+                builder(key, _filter_value(op, raw))
+
+        t0 = time.perf_counter()
+        try:
+            res = q.execute()
+        except APIError as e:
+            status = 503 if e.code == "503" else 400
+            return status, {"code": e.code, "message": e.message, "details": e.details, "hint": e.hint}
+        finally:
+            self._record(table, time.perf_counter() - t0)
+        return (201 if method == "POST" and len(parts) == 3 else 200), res.data
+
+
+class _PostgrestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.owner._track(self.connection, True)
+
+    def finish(self):
+        self.server.owner._track(self.connection, False)
+        super().finish()
+
+    def _dispatch(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        url = urlsplit(self.path)
+        try:
+            body = json.loads(raw) if raw else None
+            status, payload = self.server.owner.handle(
+                self.command, url.path, url.query, self.headers.get("Prefer", ""), body
+            )
+        except (ValueError, TypeError) as e:
+            status, payload = 400, {"code": "PGRST102", "message": str(e)}
+        out = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    do_GET = do_POST = do_PATCH = _dispatch
+
+    def log_message(self, *_args):
+        pass
@@ -0,0 +1,156 @@
+"""
+NYSE trading calendar and bar-close schedule for the scanner daemon.
+
+Holidays and early closes are derived from the exchange rules, so no data
+file is needed. Bar closes follow the bars the scanner actually uses:
+
+  15M — every 15 minutes from 09:45 ET to the session close
+  1H  — yfinance hourly bars anchored at the 09:30 open (10:30, 11:30, …)
+        plus the short last bar ending at the close
+  4H  — market_data.resample_to_4h bins the hourly bars by their start on
+        4-hour UTC boundaries, so a bin closes with its last hourly bar: the
+        first 1H close at or after the boundary (12:30 ET in summer, 11:30
+        in winter), or the session close
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+import pandas as pd
+
+EXCHANGE_TZ = "America/New_York"
+SESSION_OPEN = time(9, 30)
+SESSION_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+# One-off closures not covered by the rules (national days of mourning etc.)
+SPECIAL_CLOSURES = {
+    date(2018, 12, 5),   # George H. W. Bush
+    date(2025, 1, 9),    # Jimmy Carter
+}
+
+TIMEFRAME_MINUTES = {"15M": 15, "1H": 60, "4H": 240}
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    last = date(year, month + 1, 1) - timedelta(days=1) if month < 12 else date(year, 12, 31)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(d: date) -> date:
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=None)
+def nyse_holidays(year: int) -> frozenset[date]:
+    days = {
+        _nth_weekday(year, 1, 0, 3),                 # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),                 # Washington's Birthday
+        _easter(year) - timedelta(days=2),           # Good Friday
+        _last_weekday(year, 5, 0),                   # Memorial Day
+        _observed(date(year, 7, 4)),                 # Independence Day
+        _nth_weekday(year, 9, 0, 1),                 # Labor Day
+        _nth_weekday(year, 11, 3, 4),                # Thanksgiving
+        _observed(date(year, 12, 25)),               # Christmas
+    }
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:                      # Saturday New Year is not observed on Dec 31
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))       # Juneteenth
+    days |= {d for d in SPECIAL_CLOSURES if d.year == year}
+    return frozenset(days)
+
+
+@lru_cache(maxsize=None)
+def nyse_early_closes(year: int) -> frozenset[date]:
+    days = {_nth_weekday(year, 11, 3, 4) + timedelta(days=1)}   # day after Thanksgiving
+    for d in (date(year, 7, 3), date(year, 12, 24)):
+        if d.weekday() < 4:                                      # Mon–Thu, next day is the holiday
+            days.add(d)
+    return frozenset(days - nyse_holidays(year))
+
+
+def is_trading_day(d: date) -> bool:
+    return d.weekday() < 5 and d not in nyse_holidays(d.year)
+
+
+def session(d: date) -> tuple[pd.Timestamp, pd.Timestamp] | None:
+    """Regular session (open, close) in exchange time, None on weekends/holidays."""
+    if not is_trading_day(d):
+        return None
+    close = EARLY_CLOSE if d in nyse_early_closes(d.year) else SESSION_CLOSE
+    open_ts = pd.Timestamp(datetime.combine(d, SESSION_OPEN)).tz_localize(EXCHANGE_TZ)
+    close_ts = pd.Timestamp(datetime.combine(d, close)).tz_localize(EXCHANGE_TZ)
+    return open_ts, close_ts
+
+
+def bar_closes(d: date, minutes: int = 15) -> list[pd.Timestamp]:
+    """Every `minutes` bar close of the session on day d (empty on non-trading days)."""
+    sess = session(d)
+    if sess is None:
+        return []
+    open_ts, close_ts = sess
+    return list(pd.date_range(open_ts + pd.Timedelta(minutes=minutes), close_ts, freq=f"{minutes}min"))
+
+
+def next_bar_close(now: pd.Timestamp, minutes: int = 15, max_days: int = 10) -> pd.Timestamp:
+    """First bar close strictly after `now` (tz-aware), skipping weekends and holidays."""
+    local = now.tz_convert(EXCHANGE_TZ)
+    for offset in range(max_days + 1):
+        for close in bar_closes(local.date() + timedelta(days=offset), minutes):
+            if close > local:
+                return close
+    raise RuntimeError(f"no trading session within {max_days} days of {now}")
+
+
+def previous_bar_close(now: pd.Timestamp, minutes: int = 15, max_days: int = 10) -> pd.Timestamp:
+    """Last bar close at or before `now` (tz-aware), skipping weekends and holidays."""
+    local = now.tz_convert(EXCHANGE_TZ)
+    for offset in range(max_days + 1):
+        for close in reversed(bar_closes(local.date() - timedelta(days=offset), minutes)):
+            if close <= local:
+                return close
+    raise RuntimeError(f"no trading session within {max_days} days before {now}")
+
+
+def due_timeframes(close: pd.Timestamp) -> list[str]:
+    """Timeframes whose bar closes at this 15m bar close."""
+    sess = session(close.tz_convert(EXCHANGE_TZ).date())
+    if sess is None:
+        return []
+    open_ts, close_ts = sess
+    due = ["15M"]
+    hourly = close == close_ts or (close - open_ts) % pd.Timedelta(hours=1) == pd.Timedelta(0)
+    if hourly:
+        due.append("1H")
+    # The hourly bar ending here and the next one fall in different 4H bins
+    bar_start = close.tz_convert("UTC") - pd.Timedelta(hours=1)
+    if close == close_ts or (hourly and bar_start.floor("4h") != close.tz_convert("UTC").floor("4h")):
+        due.append("4H")
+    return due
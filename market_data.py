@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import threading
+
 import pandas as pd
 import yfinance as yf
 
@@ -68,6 +70,26 @@ def resample_to_4h(df_1h: pd.DataFrame) -> pd.DataFrame:
     return df.resample("4h").agg(agg).dropna()
 
 
+def _before(df: pd.DataFrame | None, close: pd.Timestamp) -> pd.DataFrame | None:
+    if df is None:
+        return None
+    cutoff = close if df.index.tz is not None else close.tz_convert("UTC").tz_localize(None)
+    return df[df.index < cutoff]
+
+
+def closed_frames(frames: tuple, close: pd.Timestamp) -> tuple:
+    """
+    (df_4h, df_1h, df_15m) without the bars starting at or after `close`, so the
+    last row is the bar that just closed rather than the one still forming;
+    the 4H bins are rebuilt from the trimmed 1h bars.
+    """
+    df_4h, df_1h, df_15m = frames
+    if df_1h is None:
+        return frames
+    df_1h = _before(df_1h, close)
+    return resample_to_4h(df_1h), df_1h, _before(df_15m, close)
+
+
 def fetch_mtf_frames(ticker: str) -> tuple[pd.DataFrame | None, pd.DataFrame | None, pd.DataFrame | None]:
     try:
         stock = yf.Ticker(ticker)
@@ -89,3 +111,66 @@ def fetch_mtf_frames(ticker: str) -> tuple[pd.DataFrame | None, pd.DataFrame | N
         return None, None, None
 
     return df_4h, df_1h, df_15m
+
+
+class FrameCache:
+    """
+    Warm 1h/15m history per ticker for long-running scanners. The first fetch
+    downloads the full YF_PERIOD_* window; later fetches download only
+    `refresh_period` and merge it in (the still-forming bar is replaced),
+    trimming back to the full window.
+    """
+
+    def __init__(self, refresh_period: str = "5d"):
+        self.refresh_period = refresh_period
+        self._frames: dict[str, dict[str, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    def _download(self, stock, interval: str, period: str) -> pd.DataFrame | None:
+        df = stock.history(period=period, interval=interval, auto_adjust=True)
+        return clean_df(df.dropna() if df is not None else None)
+
+    def _refresh(self, ticker: str, interval: str, full_period: str, stock,
+                 update: bool = True) -> pd.DataFrame | None:
+        with self._lock:
+            cached = self._frames.get(ticker, {}).get(interval)
+        if cached is not None and not update:
+            return cached
+        if cached is None:
+            fresh = self._download(stock, interval, full_period)
+            merged = fresh
+        else:
+            fresh = self._download(stock, interval, self.refresh_period)
+            if fresh is None or fresh.empty:
+                return cached
+            merged = pd.concat([cached, fresh])
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            merged = merged[merged.index > merged.index[-1] - pd.Timedelta(full_period)]
+        if merged is not None and not merged.empty:
+            with self._lock:
+                self._frames.setdefault(ticker, {})[interval] = merged
+        return merged
+
+    def fetch(self, ticker: str, refresh_hourly: bool = True
+              ) -> tuple[pd.DataFrame | None, pd.DataFrame | None, pd.DataFrame | None]:
+        """
+        Same contract as fetch_mtf_frames. refresh_hourly=False reuses the cached
+        1h history when only the 15m bar has closed.
+        """
+        try:
+            stock = yf.Ticker(ticker)
+            df_1h = self._refresh(ticker, "1h", YF_PERIOD_1H, stock, update=refresh_hourly)
+            df_15m = self._refresh(ticker, "15m", YF_PERIOD_15M, stock)
+        except Exception:
+            return None, None, None
+
+        if df_1h is None or df_1h.empty or len(df_1h) < MIN_BARS_1H:
+            return None, None, None
+        if df_15m is None or df_15m.empty or len(df_15m) < MIN_BARS_15M:
+            return None, None, None
+
+        df_4h = resample_to_4h(df_1h)
+        if df_4h.empty or len(df_4h) < MIN_BARS_4H:
+            return None, None, None
+
+        return df_4h, df_1h, df_15m
@@ -0,0 +1,27 @@
+-- Idempotency key for crt_signals: symbol|timeframe|type|C3 time (see signal_adapter.signal_key)
+ALTER TABLE public.crt_signals
+ADD COLUMN IF NOT EXISTS signal_key TEXT;
+
+-- Backfill existing rows from pattern_candles
+UPDATE public.crt_signals AS s
+SET signal_key = s.symbol || '|' || s.timeframe || '|' || s.type || '|' || c3.time
+FROM (
+    SELECT sig.ctid AS row_ctid, candle ->> 'time' AS time
+    FROM public.crt_signals AS sig,
+         jsonb_array_elements(sig.pattern_candles::jsonb) AS candle
+    WHERE candle ->> 'index' = 'C3'
+) AS c3
+WHERE s.ctid = c3.row_ctid
+  AND s.signal_key IS NULL;
+
+-- Keep the first row of every duplicated signal
+DELETE FROM public.crt_signals AS a
+USING public.crt_signals AS b
+WHERE a.signal_key = b.signal_key
+  AND a.ctid > b.ctid;
+
+-- Unique constraint used by upsert(on_conflict="signal_key", ignore_duplicates=True)
+ALTER TABLE public.crt_signals
+DROP CONSTRAINT IF EXISTS crt_signals_signal_key_key;
+ALTER TABLE public.crt_signals
+ADD CONSTRAINT crt_signals_signal_key_key UNIQUE (signal_key);
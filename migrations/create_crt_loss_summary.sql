@@ -0,0 +1,66 @@
+-- Loss analysis for optimizer_agent, aggregated in the database over every LOSS row
+-- (replaces pulling the last 200 raw rows and counting them in Python).
+--
+-- One row per group: dimension in (exit_reason, direction, tier, timeframe, symbol),
+-- key, n = losses in the group, place = rank within the dimension (most losses first,
+-- ties: most recent loss first). symbol is limited to the top_n tickers. A final
+-- dimension = 'total' row carries the loss count in n and the average SL distance
+-- (% of entry) in value.
+--
+-- The body is plain SQL that also runs on SQLite (tests/test_loss_summary.py).
+-- Called as supabase.rpc("crt_loss_summary", {"top_n": 5}).
+
+CREATE INDEX IF NOT EXISTS crt_signals_loss_closed_at_idx
+ON public.crt_signals (closed_at DESC)
+WHERE result = 'LOSS';
+
+CREATE OR REPLACE FUNCTION public.crt_loss_summary(top_n INTEGER DEFAULT 5)
+RETURNS TABLE (dimension TEXT, key TEXT, n BIGINT, place BIGINT, value DOUBLE PRECISION)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+WITH losses AS (
+    SELECT
+        symbol,
+        COALESCE(NULLIF(exit_reason, ''), 'Unknown') AS exit_reason,
+        CASE WHEN type LIKE '%bearish%' THEN 'bearish' ELSE 'bullish' END AS direction,
+        COALESCE(NULLIF(liquidity_tier, ''), 'Unknown') AS tier,
+        COALESCE(NULLIF(timeframe, ''), 'Unknown') AS timeframe,
+        CASE WHEN entry_price > 0 AND stop_loss > 0
+             THEN ABS(entry_price - stop_loss) * 100.0 / entry_price END AS sl_distance_pct,
+        closed_at
+    FROM crt_signals
+    WHERE result = 'LOSS'
+),
+grouped AS (
+    SELECT 'exit_reason' AS dimension, exit_reason AS key, COUNT(*) AS n, MAX(closed_at) AS last_closed
+    FROM losses GROUP BY exit_reason
+    UNION ALL
+    SELECT 'direction', direction, COUNT(*), MAX(closed_at) FROM losses GROUP BY direction
+    UNION ALL
+    SELECT 'tier', tier, COUNT(*), MAX(closed_at) FROM losses GROUP BY tier
+    UNION ALL
+    SELECT 'timeframe', timeframe, COUNT(*), MAX(closed_at) FROM losses GROUP BY timeframe
+    UNION ALL
+    SELECT 'symbol', symbol, COUNT(*), MAX(closed_at) FROM losses
+    WHERE symbol IS NOT NULL AND symbol <> '' GROUP BY symbol
+),
+ranked AS (
+    SELECT
+        dimension, key, n,
+        ROW_NUMBER() OVER (
+            PARTITION BY dimension
+            ORDER BY n DESC, last_closed IS NULL, last_closed DESC, key
+        ) AS place
+    FROM grouped
+)
+SELECT dimension, key, n, place, CAST(NULL AS DOUBLE PRECISION) AS value
+FROM ranked
+WHERE dimension <> 'symbol' OR place <= top_n
+UNION ALL
+SELECT 'total', NULL, COUNT(*), 0, CAST(AVG(sl_distance_pct) AS DOUBLE PRECISION)
+FROM losses
+$$;
+
+GRANT EXECUTE ON FUNCTION public.crt_loss_summary(INTEGER) TO service_role;
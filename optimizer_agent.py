@@ -11,12 +11,20 @@ Usage:
     python optimizer_agent.py               # full run (invokes OpenCode)
     python optimizer_agent.py --dry-run     # analysis + prompt only, no OpenCode
     python optimizer_agent.py --tickers AAPL NVDA MSFT   # override tickers
+    python optimizer_agent.py --sim-cache ""             # re-simulate everything
+    python optimizer_agent.py --incremental sim_incremental   # only simulate sessions added since the last run
+    python optimizer_agent.py --workers 4 --grid-timeout 1800
 """
 import argparse
+import concurrent.futures
+import contextlib
+import io
 import json
+import multiprocessing
 import os
 import subprocess
 import sys
+import time
 from collections import Counter
 from datetime import datetime, timezone
 
@@ -30,17 +38,21 @@ from backtester import (
     ScannerParams, PARAM_GRID, MIN_TRADES,
     simulate, compute_stats, grid_search,
 )
+from profiling import add_profile_args, start_profiling
+from incremental_sim import IncrementalSimStore
+from sim_cache import DEFAULT_MAX_BYTES, SimulationCache
 
 # ─────────────────────────────────────────────────────────────
 # CONFIG
 # ─────────────────────────────────────────────────────────────
 
-LOSS_LIMIT             = 200   # max losses to pull from Supabase
+LOSS_LIMIT             = 200   # max raw losses pulled when crt_loss_summary is not deployed
 TOP_TICKERS_N          = 5     # how many top-loss tickers to run grid search on
 BACKTEST_PERIOD        = "5y"  # daily history for backtester
 MIN_CONSENSUS_TICKERS  = 3     # abort recommendation if fewer tickers produce grid results
 OPENCODE_CMD           = "opencode"  # or full path if not on PATH
 IMPROVEMENT_THRESHOLD  = 0.05  # consensus params must beat baseline by ≥5% expectancy
+PREFETCH_WORKERS       = 8     # concurrent yfinance downloads
 REPO_ROOT              = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
@@ -70,8 +82,50 @@ def log_run(supabase, payload: dict):
         print(f"[!] Could not log run to Supabase: {e}")
 
 
+def fetch_loss_summary(supabase, top_n: int = TOP_TICKERS_N) -> dict | None:
+    """
+    Loss analysis over every LOSS row, aggregated by the crt_loss_summary
+    function (migrations/create_crt_loss_summary.sql). None when the function
+    is not deployed or the call fails, so the caller can fall back to
+    pull_losses + analyze_loss_patterns.
+    """
+    try:
+        res = supabase.rpc("crt_loss_summary", {"top_n": top_n}).execute()
+    except Exception as e:
+        print(f"[!] crt_loss_summary unavailable ({e})")
+        return None
+    return summary_to_analysis(res.data or [])
+
+
+def summary_to_analysis(rows: list) -> dict:
+    """crt_loss_summary rows -> the dict analyze_loss_patterns returns ({} when there are no losses)."""
+    groups: dict[str, list] = {}
+    total, avg_sl = 0, None
+    for r in rows:
+        if r["dimension"] == "total":
+            total, avg_sl = int(r["n"]), r["value"]
+        else:
+            groups.setdefault(r["dimension"], []).append(r)
+    if not total:
+        return {}
+
+    def counts(dimension: str) -> dict:
+        ranked = sorted(groups.get(dimension, []), key=lambda r: r["place"])
+        return {r["key"]: int(r["n"]) for r in ranked}
+
+    return {
+        "total_losses": total,
+        "exit_reasons": counts("exit_reason"),
+        "by_direction": counts("direction"),
+        "by_tier": counts("tier"),
+        "by_timeframe": counts("timeframe"),
+        "avg_sl_distance_pct": round(float(avg_sl), 3) if avg_sl is not None else 0,
+        "top_loss_tickers": list(counts("symbol")),
+    }
+
+
 def pull_losses(supabase) -> list:
-    """Pull recent LOSS trades from crt_signals."""
+    """Pull recent LOSS trades from crt_signals (fallback when crt_loss_summary is not deployed)."""
     res = (
         supabase.table("crt_signals")
         .select("symbol,type,timeframe,entry_price,stop_loss,take_profit,exit_reason,closed_at,result,liquidity_tier")
@@ -168,40 +222,142 @@ def print_analysis(analysis: dict):
 DEFAULT_GRID_PARAMS = ["wall_wick_pct", "fuel_wick_pct", "displacement_mult"]
 
 
+def fetch_backtest_data(ticker: str) -> tuple | None:
+    """BACKTEST_PERIOD daily + 730d 1H bars, or None when there is not enough history."""
+    obj       = yf.Ticker(ticker)
+    daily_df  = obj.history(period=BACKTEST_PERIOD, interval="1d")
+    hourly_df = obj.history(period="730d", interval="1h")
+    daily_df.dropna(inplace=True)
+    hourly_df.dropna(inplace=True)
+    if len(daily_df) < 30 or len(hourly_df) < 100:
+        return None
+    return daily_df, hourly_df
+
+
+_grid_stop = None   # set in each grid worker by _init_grid_worker
+
+
+def _init_grid_worker(stop):
+    global _grid_stop
+    _grid_stop = stop
+
+
+def _grid_job(ticker: str, daily_df, hourly_df, param_keys: list | None,
+              cache: SimulationCache | IncrementalSimStore | None) -> dict:
+    """One ticker's grid search in a worker process; its console output is returned, not printed."""
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        best = grid_search(ticker, daily_df, hourly_df, param_keys=param_keys, cache=cache, stop=_grid_stop)
+    return {
+        "ticker":   ticker,
+        "best":     best,
+        "seconds":  time.perf_counter() - started,
+        "counters": cache.counters() if cache is not None else {},
+    }
+
+
+def build_consensus(all_best: list) -> dict:
+    """For each param, the most common best value (ties: first ticker in the list)."""
+    consensus = {}
+    for k in PARAM_GRID:
+        values = [b[k] for b in all_best if k in b]
+        if values:
+            consensus[k] = Counter(values).most_common(1)[0][0]
+    return consensus
+
+
 def run_grid_search_on_tickers(
-    tickers: list, full_grid: bool = False
+    tickers: list,
+    full_grid: bool = False,
+    sim_cache: SimulationCache | IncrementalSimStore | None = None,
+    workers: int | None = None,
+    prefetch_workers: int = PREFETCH_WORKERS,
+    timeout: float | None = None,
+    fetch=fetch_backtest_data,
 ) -> tuple[dict | None, dict]:
     """
     Run grid search on each ticker and aggregate the best params
     by consensus (most common value per param).
     Returns (consensus_params | None, data_cache).
     data_cache: {ticker: (daily_df, hourly_df)} — reused by validate_improvement.
+    sim_cache serves combos already simulated on unchanged data (this run or earlier ones);
+    an IncrementalSimStore only simulates the sessions added since the last run.
+
+    All downloads start at once on `prefetch_workers` threads; each ticker's
+    grid is handed to a pool of `workers` processes as soon as its data
+    arrives, and results are reported as they complete. With `timeout`
+    (seconds), tickers still running at the deadline are dropped once
+    MIN_CONSENSUS_TICKERS have finished: they leave data_cache, and grids
+    already running stop at their next combo (a shared stop event).
     """
     param_keys = None if full_grid else DEFAULT_GRID_PARAMS
-    all_best   = []
+    results    = {}
     data_cache = {}
-
-    for ticker in tickers:
-        print(f"\n[*] Downloading data for {ticker}...")
-        try:
-            obj       = yf.Ticker(ticker)
-            daily_df  = obj.history(period=BACKTEST_PERIOD, interval="1d")
-            hourly_df = obj.history(period="730d", interval="1h")
-            daily_df.dropna(inplace=True)
-            hourly_df.dropna(inplace=True)
-
-            if len(daily_df) < 30 or len(hourly_df) < 100:
-                print(f"  Insufficient data for {ticker}, skipping.")
-                continue
-
-            data_cache[ticker] = (daily_df, hourly_df)
-            best = grid_search(ticker, daily_df, hourly_df, param_keys=param_keys)
-            if best:
-                all_best.append(best)
-        except Exception as e:
-            print(f"  Error on {ticker}: {e}")
-            continue
-
+    workers    = max(1, min(workers or os.cpu_count() or 1, len(tickers) or 1))
+    deadline   = time.monotonic() + timeout if timeout else None
+
+    print(f"\n[*] Downloading {len(tickers)} ticker(s) ({prefetch_workers} threads), "
+          f"grid search on {workers} process(es)...")
+    downloads = concurrent.futures.ThreadPoolExecutor(max_workers=prefetch_workers)
+    stop      = multiprocessing.Event()
+    grids     = concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_grid_worker, initargs=(stop,)
+    )
+    timed_out = False
+    try:
+        pending = {downloads.submit(fetch, t): ("download", t) for t in tickers}
+        while pending:
+            expired = deadline is not None and time.monotonic() >= deadline
+            if expired and len(results) >= MIN_CONSENSUS_TICKERS:
+                late = sorted(t for _, t in pending.values())
+                print(f"\n[!] Grid timeout: continuing without {', '.join(late)}")
+                for t in late:
+                    data_cache.pop(t, None)
+                timed_out = True
+                break
+            # Past the deadline with too few results: keep waiting, one completion at a time
+            remaining = None if deadline is None or expired else deadline - time.monotonic()
+            done, _ = concurrent.futures.wait(
+                pending, timeout=remaining, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+
+            for future in done:
+                kind, ticker = pending.pop(future)
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    print(f"  Error on {ticker} ({kind}): {e}")
+                    continue
+
+                if kind == "download":
+                    if outcome is None:
+                        print(f"  Insufficient data for {ticker}, skipping.")
+                        continue
+                    data_cache[ticker] = outcome
+                    job = grids.submit(_grid_job, ticker, *outcome, param_keys, sim_cache)
+                    pending[job] = ("grid", ticker)
+                    continue
+
+                if sim_cache is not None:
+                    sim_cache.add_counters(outcome["counters"])
+                best = outcome["best"]
+                summary = (f"best expectancy {best['expectancy']:+.3f} R over {int(best['total'])} trades"
+                           if best else f"no combo with >= {MIN_TRADES} closed trades")
+                print(f"  [{len(results) + 1}] {ticker}: {summary} ({outcome['seconds']:.1f}s)")
+                if best:
+                    results[ticker] = best
+                    if len(results) >= MIN_CONSENSUS_TICKERS:
+                        interim = build_consensus([results[t] for t in tickers if t in results])
+                        print(f"      consensus so far ({len(results)} tickers): {interim}")
+    finally:
+        downloads.shutdown(wait=False, cancel_futures=True)
+        if timed_out:
+            # Grids already running cannot be cancelled: ask them to give up at the next combo
+            stop.set()
+        grids.shutdown(wait=True, cancel_futures=True)
+
+    # Input order, not completion order, so ties in the consensus are deterministic
+    all_best = [results[t] for t in tickers if t in results]
     if not all_best:
         return None, data_cache
 
@@ -214,29 +370,23 @@ def run_grid_search_on_tickers(
         print(f"    Suggestion: run with --tickers on larger/more liquid symbols (e.g. AAPL NVDA MSFT AMZN META).")
         return None, data_cache
 
-    # Consensus: for each param, take the most common value
     contributing = [b.get("_ticker", "?") for b in all_best]
     print(f"\n[*] Building consensus from {len(all_best)} ticker(s): {', '.join(contributing)}")
-    all_param_keys = list(PARAM_GRID.keys())
-    consensus = {}
-    for k in all_param_keys:
-        values = [b[k] for b in all_best if k in b]
-        if values:
-            counter = Counter(values)
-            consensus[k] = counter.most_common(1)[0][0]
-
-    return consensus, data_cache
+    return build_consensus(all_best), data_cache
 
 
 # ─────────────────────────────────────────────────────────────
 # IMPROVEMENT GATE
 # ─────────────────────────────────────────────────────────────
 
-def validate_improvement(consensus: dict, data_cache: dict) -> tuple[bool, float, float]:
+def validate_improvement(
+    consensus: dict, data_cache: dict, sim_cache: SimulationCache | IncrementalSimStore | None = None
+) -> tuple[bool, float, float]:
     """
     Runs simulate() with default params AND consensus params on every cached ticker.
     Returns (should_proceed, avg_baseline_expectancy, avg_consensus_expectancy).
     Aborts if improvement < IMPROVEMENT_THRESHOLD.
+    With sim_cache, the consensus combo comes straight from the grid's results.
     """
     from backtester import simulate, compute_stats, ScannerParams, MIN_TRADES
 
@@ -247,16 +397,19 @@ def validate_improvement(consensus: dict, data_cache: dict) -> tuple[bool, float
 
     print(f"\n[*] Validating consensus params vs baseline on {len(data_cache)} ticker(s)...")
 
+    def evaluate(ticker, daily_df, hourly_df, params):
+        if sim_cache is not None:
+            return sim_cache.evaluate(ticker, daily_df, hourly_df, params)[1]
+        return compute_stats(simulate(ticker, daily_df, hourly_df, params))
+
     for ticker, (daily_df, hourly_df) in data_cache.items():
         # Baseline
-        b_trades = simulate(ticker, daily_df, hourly_df, defaults)
-        b_stats  = compute_stats(b_trades)
+        b_stats = evaluate(ticker, daily_df, hourly_df, defaults)
         if b_stats and b_stats["total"] >= MIN_TRADES:
             baseline_exps.append(b_stats["expectancy"])
 
         # Consensus
-        c_trades = simulate(ticker, daily_df, hourly_df, consensus_p)
-        c_stats  = compute_stats(c_trades)
+        c_stats = evaluate(ticker, daily_df, hourly_df, consensus_p)
         if c_stats and c_stats["total"] >= MIN_TRADES:
             consensus_exps.append(c_stats["expectancy"])
 
@@ -460,7 +613,28 @@ def main():
                         help="Skip grid search (only run loss analysis)")
     parser.add_argument("--full-grid", action="store_true",
                         help="Optimize all 6 params (slower, default: only top 3)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes running per-ticker grid searches in parallel (default: CPU count)")
+    parser.add_argument("--prefetch-workers", type=int, default=PREFETCH_WORKERS,
+                        help="Concurrent data downloads")
+    parser.add_argument("--grid-timeout", type=float, default=None,
+                        help="Seconds to wait for grid searches; later tickers are dropped once "
+                             f"{MIN_CONSENSUS_TICKERS} have finished")
+    parser.add_argument("--sim-cache", type=str, default="sim_cache",
+                        help="Directory of cached simulate() results shared across runs (empty to disable)")
+    parser.add_argument("--sim-cache-mb", type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024,
+                        help="Size limit of the simulation cache (least recently used entries evicted)")
+    parser.add_argument("--incremental", type=str, default=None, metavar="DIR",
+                        help="Keep per-combo trades in DIR and only simulate sessions added since the "
+                             "previous run (replaces --sim-cache)")
+    add_profile_args(parser)
     args = parser.parse_args()
+    start_profiling(args)
+    if args.incremental:
+        sim_cache = IncrementalSimStore(args.incremental)
+    else:
+        sim_cache = (SimulationCache(args.sim_cache, max_bytes=int(args.sim_cache_mb * 1024 * 1024))
+                     if args.sim_cache else None)
 
     print("="*60)
     print("  CRT Flow Optimizer Agent")
@@ -502,11 +676,16 @@ def main():
 
         if not args.tickers and supabase:
             try:
-                losses = pull_losses(supabase)
-                print(f"[+] Pulled {len(losses)} LOSS trades.")
-
-                if losses:
+                analysis = fetch_loss_summary(supabase)
+                if analysis is None:
+                    losses = pull_losses(supabase)
+                    print(f"[+] Pulled {len(losses)} LOSS trades.")
                     analysis = analyze_loss_patterns(losses)
+                else:
+                    print(f"[+] Loss summary computed in the database "
+                          f"({analysis.get('total_losses', 0)} LOSS trades).")
+
+                if analysis:
                     print_analysis(analysis)
                     tickers_for_grid = analysis.get("top_loss_tickers", [])
 
@@ -526,7 +705,10 @@ def main():
         if not args.no_grid and tickers_for_grid:
             mode = "full (6 params)" if args.full_grid else "fast (3 params: wall_wick, fuel_wick, displacement)"
             print(f"\n[*] Running grid search [{mode}] on: {', '.join(tickers_for_grid)}")
-            best_params, data_cache = run_grid_search_on_tickers(tickers_for_grid, full_grid=args.full_grid)
+            best_params, data_cache = run_grid_search_on_tickers(
+                tickers_for_grid, full_grid=args.full_grid, sim_cache=sim_cache, workers=args.workers,
+                prefetch_workers=args.prefetch_workers, timeout=args.grid_timeout,
+            )
             if best_params:
                 print(f"\n[+] Consensus best params: {json.dumps(best_params, indent=2)}")
             else:
@@ -539,7 +721,7 @@ def main():
         # ── 3. Improvement gate ───────────────────────────────
         avg_b, avg_c = 0.0, 0.0
         if best_params and data_cache and not args.dry_run:
-            should_proceed, avg_b, avg_c = validate_improvement(best_params, data_cache)
+            should_proceed, avg_b, avg_c = validate_improvement(best_params, data_cache, sim_cache)
             denom = abs(avg_b) if abs(avg_b) > 0.001 else 0.001
             run["baseline_expectancy"]  = round(avg_b, 5)
             run["consensus_expectancy"] = round(avg_c, 5)
@@ -596,6 +778,8 @@ def main():
         raise
 
     finally:
+        if sim_cache is not None:
+            print(f"\n[*] {sim_cache.summary()}")
         # ── 8. Log to Supabase (always, even on error) ────────
         if supabase:
             log_run(supabase, run)
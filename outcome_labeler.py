@@ -0,0 +1,219 @@
+"""
+CRT Squeeze Outcome Labeler — fills hit_target_10d / max_gain_10d_pct
+
+Nightly batch job: loads every squeeze_signals row still missing its outcome,
+computes forward 10-trading-day extremes for all of a symbol's events at once
+(sliding-window max/min over cached daily bars) and writes back only the rows
+whose window has completed since the last run. Rows whose window is still open
+stay NULL and are picked up by a later run.
+
+  hit_target_10d   — take_profit touched within the next 10 sessions
+                     (False for rows without a take_profit)
+  max_gain_10d_pct — best favourable excursion vs entry_price (close of the
+                     event day when the row has no entry), in percent
+
+Usage:
+    python outcome_labeler.py --symbols AAPL NVDA TSLA
+    python outcome_labeler.py --symbols-file tickers.txt --cache-dir bar_cache --dry-run
+"""
+from __future__ import annotations
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from numpy.lib.stride_tricks import sliding_window_view
+
+from squeeze_engine import SQUEEZE_CONFLICT, setup_supabase
+from supabase_writer import BufferedWriter
+
+FORWARD_DAYS = 10
+PAGE_SIZE = 1000
+EVENT_FIELDS = "symbol,timestamp,event_type,direction,entry_price,take_profit"
+
+
+# ─────────────────────────────────────────────────────────────
+# DAILY BAR CACHE
+# ─────────────────────────────────────────────────────────────
+
+def _download_daily(symbol: str, start: pd.Timestamp | None) -> pd.DataFrame:
+    ticker = yf.Ticker(symbol)
+    if start is None:
+        df = ticker.history(period="5y", interval="1d")
+    else:
+        df = ticker.history(start=start.strftime("%Y-%m-%d"), interval="1d")
+    return df[["Open", "High", "Low", "Close", "Volume"]].dropna() if not df.empty else df
+
+
+class DailyBarCache:
+    """
+    Daily OHLCV per symbol in <root>/<SYMBOL>_1d.csv (UTC index). A cached
+    symbol is only topped up with the bars since its last cached session.
+    """
+
+    def __init__(self, root: str, download=_download_daily):
+        self.root = root
+        self.download = download
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, symbol: str) -> str:
+        return os.path.join(self.root, f"{symbol}_1d.csv")
+
+    def _read(self, symbol: str) -> pd.DataFrame | None:
+        path = self.path(symbol)
+        if not os.path.isfile(path):
+            return None
+        df = pd.read_csv(path, index_col=0)
+        df.index = pd.to_datetime(df.index, utc=True)
+        return df
+
+    def get(self, symbol: str, now: pd.Timestamp | None = None) -> pd.DataFrame:
+        cached = self._read(symbol)
+        now = now or pd.Timestamp.now(tz="UTC")
+        last_session = (now.normalize() - pd.offsets.BDay(1)).date()
+        if cached is not None and not cached.empty and cached.index[-1].date() >= last_session:
+            return cached
+
+        start = cached.index[-1] - pd.Timedelta(days=7) if cached is not None and not cached.empty else None
+        fresh = self.download(symbol, start)
+        if fresh is None or fresh.empty:
+            return cached if cached is not None else pd.DataFrame()
+        fresh.index = pd.to_datetime(fresh.index, utc=True)
+        merged = pd.concat([cached, fresh]) if cached is not None else fresh
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        merged.to_csv(self.path(symbol), index_label="Datetime")
+        return merged
+
+
+# ─────────────────────────────────────────────────────────────
+# LABELING
+# ─────────────────────────────────────────────────────────────
+
+def forward_extremes(high: np.ndarray, low: np.ndarray, days: int = FORWARD_DAYS) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Max high / min low over bars t+1 .. t+days for every bar t; NaN where the
+    forward window is not complete yet.
+    """
+    n = len(high)
+    fwd_max = np.full(n, np.nan)
+    fwd_min = np.full(n, np.nan)
+    if n > days:
+        fwd_max[: n - days] = sliding_window_view(high[1:], days).max(axis=1)
+        fwd_min[: n - days] = sliding_window_view(low[1:], days).min(axis=1)
+    return fwd_max, fwd_min
+
+
+def label_events(events: pd.DataFrame, daily: pd.DataFrame, days: int = FORWARD_DAYS) -> pd.DataFrame:
+    """
+    Outcome columns for the events whose forward window is complete in `daily`.
+    Returns conflict-key columns + hit_target_10d + max_gain_10d_pct, one row per
+    labeled event (events on days missing from `daily` are skipped).
+    """
+    out_cols = SQUEEZE_CONFLICT.split(",") + ["hit_target_10d", "max_gain_10d_pct"]
+    if events.empty or daily.empty:
+        return pd.DataFrame(columns=out_cols)
+
+    fwd_max, fwd_min = forward_extremes(daily["High"].to_numpy(dtype=float),
+                                        daily["Low"].to_numpy(dtype=float), days)
+    close = daily["Close"].to_numpy(dtype=float)
+    bar_days = pd.DatetimeIndex(daily.index).tz_convert("UTC").normalize().asi8
+    event_days = pd.DatetimeIndex(pd.to_datetime(events["timestamp"], utc=True)).normalize().asi8
+
+    pos = np.searchsorted(bar_days, event_days)
+    found = pos < len(bar_days)
+    found[found] = bar_days[pos[found]] == event_days[found]
+    pos = np.where(found, pos, 0)
+    complete = found & ~np.isnan(fwd_max[pos])
+
+    entry = pd.to_numeric(events["entry_price"], errors="coerce").to_numpy(dtype=float)
+    entry = np.where(np.isnan(entry), close[pos], entry)
+    target = pd.to_numeric(events["take_profit"], errors="coerce").to_numpy(dtype=float)
+    bearish = (events["direction"] == "bearish").to_numpy()
+
+    hi, lo = fwd_max[pos], fwd_min[pos]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gain = np.where(bearish, (entry - lo) / entry, (hi - entry) / entry) * 100.0
+    hit = np.where(bearish, lo <= target, hi >= target) & ~np.isnan(target)
+
+    labeled = events.loc[complete, SQUEEZE_CONFLICT.split(",")].copy()
+    labeled["hit_target_10d"] = hit[complete]
+    labeled["max_gain_10d_pct"] = np.round(gain[complete], 2)
+    return labeled.reset_index(drop=True)
+
+
+def fetch_pending_events(client, symbol: str, page_size: int = PAGE_SIZE) -> pd.DataFrame:
+    """squeeze_signals rows of a symbol with no outcome yet, paged by timestamp."""
+    rows: list[dict] = []
+    last_ts = None
+    while True:
+        query = (
+            client.table("squeeze_signals")
+            .select(EVENT_FIELDS)
+            .eq("symbol", symbol)
+            .is_("hit_target_10d", "null")
+        )
+        if last_ts is not None:
+            query = query.gt("timestamp", last_ts)
+        page = query.order("timestamp").limit(page_size).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            break
+        last_ts = page[-1]["timestamp"]
+    return pd.DataFrame(rows, columns=EVENT_FIELDS.split(","))
+
+
+def run_labeler(client, symbols: list[str], cache: DailyBarCache, writer: BufferedWriter,
+                days: int = FORWARD_DAYS) -> dict[str, dict]:
+    report: dict[str, dict] = {}
+    for symbol in symbols:
+        try:
+            pending = fetch_pending_events(client, symbol)
+            if pending.empty:
+                report[symbol] = {"pending": 0, "labeled": 0}
+                continue
+            labeled = label_events(pending, cache.get(symbol), days)
+            records = labeled.astype(object).where(labeled.notna(), None).to_dict("records")
+            writer.extend(records)
+            report[symbol] = {"pending": len(pending), "labeled": len(records)}
+        except Exception as exc:
+            report[symbol] = {"error": str(exc)}
+    writer.flush()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Label squeeze_signals with 10-day forward outcomes")
+    parser.add_argument("--symbols", nargs="+", default=None)
+    parser.add_argument("--symbols-file", type=str, default=None, help="One ticker per line")
+    parser.add_argument("--cache-dir", type=str, default="bar_cache")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    symbols = [s.upper() for s in (args.symbols or [])]
+    if args.symbols_file:
+        with open(args.symbols_file) as fh:
+            symbols += [line.strip().upper() for line in fh if line.strip() and not line.startswith("#")]
+    if not symbols:
+        parser.error("pass --symbols or --symbols-file")
+
+    supabase = setup_supabase()
+    # The rows exist already (fetch_pending_events): patch the two outcome columns in place
+    writer = BufferedWriter(supabase, "squeeze_signals", update_on=SQUEEZE_CONFLICT,
+                            chunk_size=args.chunk_size, dry_run=args.dry_run)
+    report = run_labeler(supabase, list(dict.fromkeys(symbols)), DailyBarCache(args.cache_dir), writer)
+    writer.close()
+
+    for symbol, r in report.items():
+        if "error" in r:
+            print(f"[{symbol}] error: {r['error']}")
+        else:
+            print(f"[{symbol}] pending: {r['pending']}  labeled: {r['labeled']}")
+    s = writer.summary
+    print(f"Done. Labeled {s.rows_written} rows ({s.rows_failed} failed, {s.requests} requests)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+CRT Flow Profiling — --profile / --profile-top for the batch scripts
+
+A wall-clock sampling profiler: a daemon thread snapshots the Python stack
+of every thread (sys._current_frames) every few milliseconds, so pool
+threads are covered and the overhead stays flat however hot the code is.
+Worker processes started by multiprocessing (ProcessPoolExecutor pools)
+start their own sampler through an after-fork hook and write a part file at
+exit, which the parent merges into its own output.
+
+Outputs, for PREFIX given to --profile:
+  PREFIX.collapsed   one "thread;frame;frame;… count" line per stack —
+                     flamegraph.pl, speedscope and inferno read it directly
+  PREFIX.stats.txt   functions sorted by self samples (with inclusive
+                     samples), waits on locks/queues listed separately
+
+--profile-top N prints the N hottest non-idle functions on exit.
+
+Usage:
+    python scanner.py --index us --profile prof/scan --profile-top 25
+    python backtester.py --ticker NVDA --optimize --profile
+    flamegraph.pl prof/scan.collapsed > scan.svg
+"""
+from __future__ import annotations
+
+import atexit
+import glob
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from multiprocessing import util
+
+DEFAULT_INTERVAL = 0.005
+
+# Leaf frames of a thread parked on a lock, queue or timer: wall-clock, not CPU
+IDLE_LEAVES = {
+    "threading:Condition.wait",
+    "threading:Event.wait",
+    "threading:Thread.join",
+    "threading:Thread._wait_for_tstate_lock",
+    "queue:Queue.get",
+    "queue:Queue.put",
+    "selectors:EpollSelector.select",
+    "selectors:PollSelector.select",
+    "selectors:SelectSelector.select",
+    "concurrent.futures.thread:_worker",
+    "concurrent.futures._base:Future.result",
+    "multiprocessing.connection:wait",
+    "multiprocessing.connection:Connection._recv",
+}
+
+_THREAD_SUFFIX = re.compile(r"[_-]\d+$")
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    module = os.path.splitext(os.path.basename(filename))[0]
+    if "concurrent" + os.sep + "futures" in filename:
+        module = "concurrent.futures." + module
+    elif "multiprocessing" + os.sep in filename:
+        module = "multiprocessing." + module
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class StackSampler:
+    """
+    sampler = StackSampler(); sampler.start()
+    ...
+    sampler.stop(); sampler.counts   # Counter of (thread, frame, …, leaf) -> samples
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> "StackSampler":
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        labels: dict = {}
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = _frame_label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                thread = _THREAD_SUFFIX.sub("", names.get(ident, "thread"))
+                self.counts[(thread, *reversed(stack))] += 1
+            self.samples += 1
+
+
+# ─────────────────────────────────────────────────────────────
+# OUTPUT
+# ─────────────────────────────────────────────────────────────
+
+def write_collapsed(counts: Counter, path: str):
+    with open(path, "w", encoding="utf-8") as fh:
+        for stack, n in sorted(counts.items(), key=lambda kv: -kv[1]):
+            fh.write(";".join(s.replace(";", ",") for s in stack) + f" {n}\n")
+
+
+def read_collapsed(path: str) -> Counter:
+    counts: Counter = Counter()
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            stack, _, n = line.rstrip("\n").rpartition(" ")
+            if stack:
+                counts[tuple(stack.split(";"))] += int(n)
+    return counts
+
+
+def function_stats(counts: Counter) -> list[dict]:
+    """Per function: self samples (leaf) and inclusive samples (anywhere on the stack, once per stack)."""
+    own: Counter = Counter()
+    inclusive: Counter = Counter()
+    for stack, n in counts.items():
+        frames = stack[1:]
+        if not frames:
+            continue
+        own[frames[-1]] += n
+        for fn in set(frames):
+            inclusive[fn] += n
+    rows = [{"function": fn, "self": own[fn], "total": inclusive[fn], "idle": fn in IDLE_LEAVES}
+            for fn in inclusive]
+    return sorted(rows, key=lambda r: (-r["self"], -r["total"], r["function"]))
+
+
+def format_top(rows: list[dict], total: int, n: int | None = None, idle: bool = False) -> str:
+    chosen = [r for r in rows if r["idle"] == idle and (r["self"] or idle)][:n]
+    width = max([len(r["function"]) for r in chosen] + [8])
+    lines = [f"{'function':<{width}}  {'self':>7}  {'self%':>6}  {'total':>7}  {'total%':>6}"]
+    for r in chosen:
+        lines.append(f"{r['function']:<{width}}  {r['self']:>7}  {100 * r['self'] / max(total, 1):>5.1f}%  "
+                     f"{r['total']:>7}  {100 * r['total'] / max(total, 1):>5.1f}%")
+    return "\n".join(lines)
+
+
+def write_stats(counts: Counter, path: str, interval: float):
+    rows = function_stats(counts)
+    total = sum(counts.values())
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(f"# {total} samples @ {interval * 1000:.1f} ms ({total * interval:.1f} thread-seconds)\n\n")
+        fh.write(format_top(rows, total) + "\n\n# waiting (locks, queues, futures)\n")
+        fh.write(format_top(rows, total, idle=True) + "\n")
+
+
+# ─────────────────────────────────────────────────────────────
+# SESSION (parent + forked workers)
+# ─────────────────────────────────────────────────────────────
+
+class ProfileSession:
+    def __init__(self, prefix: str, top: int | None = None, interval: float = DEFAULT_INTERVAL):
+        self.prefix = prefix
+        self.top = top
+        self.interval = interval
+        self.sampler = StackSampler(interval)
+        self.started = time.perf_counter()
+        self._parent = os.getpid()
+        self._finished = False
+
+    def start(self) -> "ProfileSession":
+        directory = os.path.dirname(self.prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        for stale in glob.glob(f"{self.prefix}.part-*.collapsed"):
+            os.remove(stale)
+        # Runs in every multiprocessing child (ProcessPoolExecutor workers), after its finalizers are reset
+        util.register_after_fork(self, ProfileSession._start_in_child)
+        self.sampler.start()
+        atexit.register(self.finish)
+        return self
+
+    def _start_in_child(self):
+        if self._finished:
+            return
+        self.sampler = StackSampler(self.interval).start()
+        # Pool workers leave through os._exit, which skips atexit; multiprocessing finalizers still run
+        util.Finalize(self, self._dump_child, exitpriority=100)
+
+    def _dump_child(self):
+        self.sampler.stop()
+        write_collapsed(self.sampler.counts, f"{self.prefix}.part-{os.getpid()}.collapsed")
+
+    def finish(self) -> Counter | None:
+        if self._finished or os.getpid() != self._parent:
+            return None
+        self._finished = True
+        self.sampler.stop()
+        counts = Counter(self.sampler.counts)
+        for part in glob.glob(f"{self.prefix}.part-*.collapsed"):
+            counts.update(read_collapsed(part))
+            os.remove(part)
+
+        write_collapsed(counts, f"{self.prefix}.collapsed")
+        write_stats(counts, f"{self.prefix}.stats.txt", self.interval)
+        wall = time.perf_counter() - self.started
+        print(f"\n[profile] {wall:.1f}s wall, {sum(counts.values())} samples -> "
+              f"{self.prefix}.collapsed, {self.prefix}.stats.txt", file=sys.stderr)
+        if self.top:
+            print(format_top(function_stats(counts), sum(counts.values()), self.top), file=sys.stderr)
+        return counts
+
+
+def add_profile_args(parser):
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--profile", nargs="?", const="profile", default=None, metavar="PREFIX",
+                       help="Sample the run and write PREFIX.collapsed + PREFIX.stats.txt (default prefix: profile)")
+    group.add_argument("--profile-top", type=int, default=None, metavar="N",
+                       help="Print the N hottest functions on exit (implies --profile)")
+    group.add_argument("--profile-interval", type=float, default=DEFAULT_INTERVAL,
+                       help="Seconds between stack samples")
+
+
+def start_profiling(args) -> ProfileSession | None:
+    """Start a session when --profile/--profile-top was given; outputs are written at exit."""
+    if args.profile is None and not args.profile_top:
+        return None
+    return ProfileSession(args.profile or "profile", args.profile_top, args.profile_interval).start()
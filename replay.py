@@ -0,0 +1,238 @@
+"""
+CRT Flow Bar Replay — drives the live scanner code path with recorded bars
+
+Feeds recorded 15m/1H bars through scanner.scan_ticker → detect_latest_pattern →
+signal_to_crt_row → _persist_signal_row in timestamp order, as if each 15m bar
+had just closed, against local_supabase.LocalSupabase. Reports signals emitted,
+end-to-end latency per bar close and throughput in bars per second.
+
+Bars are stored as <data-dir>/<SYMBOL>_1h.csv and <SYMBOL>_15m.csv.
+
+Usage:
+    python replay.py record --symbols AAPL NVDA --data-dir bars/
+    python replay.py run --data-dir bars/
+    python replay.py run --data-dir bars/ --symbols AAPL --workers 8 --db-latency 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import os
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import scanner
+from local_supabase import LocalSupabase
+from market_data import clean_df, resample_to_4h
+from strategy.config import MIN_BARS_15M, MIN_BARS_1H, MIN_BARS_4H, YF_PERIOD_1H, YF_PERIOD_15M
+
+INTERVALS = {"1h": pd.Timedelta(hours=1), "15m": pd.Timedelta(minutes=15)}
+RECORD_PERIODS = {"1h": "730d", "15m": "60d"}
+
+
+# ─────────────────────────────────────────────────────────────
+# RECORDED BARS
+# ─────────────────────────────────────────────────────────────
+
+def bars_path(data_dir: str, symbol: str, interval: str) -> str:
+    return os.path.join(data_dir, f"{symbol}_{interval}.csv")
+
+
+def record_bars(symbols: list[str], data_dir: str):
+    os.makedirs(data_dir, exist_ok=True)
+    for symbol in symbols:
+        stock = yf.Ticker(symbol)
+        for interval, period in RECORD_PERIODS.items():
+            df = clean_df(stock.history(period=period, interval=interval, auto_adjust=True).dropna())
+            if df is None or df.empty:
+                print(f"  [{symbol}] no {interval} data")
+                continue
+            df.index = pd.DatetimeIndex(df.index).tz_convert("UTC")
+            df.to_csv(bars_path(data_dir, symbol, interval), index_label="Datetime")
+            print(f"  [{symbol}] {interval}: {len(df)} bars")
+
+
+def load_bars(data_dir: str, symbol: str, interval: str) -> pd.DataFrame | None:
+    path = bars_path(data_dir, symbol, interval)
+    if not os.path.isfile(path):
+        return None
+    df = pd.read_csv(path, index_col=0)
+    df.index = pd.to_datetime(df.index, utc=True)
+    return clean_df(df.sort_index())
+
+
+def discover_symbols(data_dir: str) -> list[str]:
+    return sorted(
+        name[: -len("_15m.csv")]
+        for name in os.listdir(data_dir)
+        if name.endswith("_15m.csv") and os.path.isfile(os.path.join(data_dir, name[: -len("_15m.csv")] + "_1h.csv"))
+    )
+
+
+class ReplayFeed:
+    """
+    Serves fetch_mtf_frames-shaped frames as of the replay clock: only bars
+    closed by the clock, trimmed to the same period the live fetch requests.
+    """
+
+    def __init__(self, bars: dict[str, dict[str, pd.DataFrame]]):
+        self.bars = bars
+        self.clock: pd.Timestamp | None = None
+        self._close_ns = {
+            (sym, interval): (pd.DatetimeIndex(df.index) + INTERVALS[interval]).asi8
+            for sym, frames in bars.items()
+            for interval, df in frames.items()
+        }
+        self._start_ns = {
+            key: pd.DatetimeIndex(self.bars[key[0]][key[1]].index).asi8 for key in self._close_ns
+        }
+
+    def _visible(self, symbol: str, interval: str, period: str) -> pd.DataFrame:
+        df = self.bars[symbol][interval]
+        end = np.searchsorted(self._close_ns[(symbol, interval)], self.clock.value, side="right")
+        start_ts = self.clock - pd.Timedelta(period)
+        start = np.searchsorted(self._start_ns[(symbol, interval)], start_ts.value, side="left")
+        return df.iloc[start:end]
+
+    def fetch(self, symbol: str):
+        if symbol not in self.bars or self.clock is None:
+            return None, None, None
+        df_1h = self._visible(symbol, "1h", YF_PERIOD_1H)
+        df_15m = self._visible(symbol, "15m", YF_PERIOD_15M)
+        if len(df_1h) < MIN_BARS_1H or len(df_15m) < MIN_BARS_15M:
+            return None, None, None
+        df_4h = resample_to_4h(df_1h)
+        if len(df_4h) < MIN_BARS_4H:
+            return None, None, None
+        return df_4h, df_1h, df_15m
+
+    def bar_closes(self) -> list[tuple[pd.Timestamp, list[str]]]:
+        """Every 15m bar close across the universe, with the symbols whose bar closed."""
+        events: dict[int, list[str]] = {}
+        for (symbol, interval), closes in self._close_ns.items():
+            if interval != "15m":
+                continue
+            for ts in closes:
+                events.setdefault(int(ts), []).append(symbol)
+        return [(pd.Timestamp(ts, tz="UTC"), sorted(syms)) for ts, syms in sorted(events.items())]
+
+
+# ─────────────────────────────────────────────────────────────
+# REPLAY
+# ─────────────────────────────────────────────────────────────
+
+def _pct(values: list[float], q: float) -> float:
+    return float(np.percentile(values, q)) * 1000 if values else 0.0
+
+
+def run_replay(feed: ReplayFeed, db: LocalSupabase, workers: int = 1,
+               market_caps: dict[str, int] | None = None, warmup: int = 0) -> dict:
+    """
+    Replay every 15m bar close through scanner.scan_ticker with persistence on.
+    The first `warmup` closes are skipped (not enough history for any frame).
+    """
+    previous = scanner.supabase
+    scanner.supabase = db
+    caps = market_caps or {}
+    events = feed.bar_closes()[warmup:]
+
+    cycle_latency: list[float] = []
+    signals_by_tf: Counter = Counter()
+    funnel: Counter = Counter()
+    bars = 0
+    started = time.perf_counter()
+
+    def scan(symbol: str):
+        return scanner.scan_ticker(symbol, True, fetch_frames=feed.fetch, market_cap_lookup=caps.get)
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            for close_ts, symbols in events:
+                feed.clock = close_ts
+                t0 = time.perf_counter()
+                for signals, stage, _ in executor.map(scan, symbols):
+                    funnel[stage] += 1
+                    for s in signals:
+                        signals_by_tf[s["timeframe"]] += 1
+                cycle_latency.append(time.perf_counter() - t0)
+                bars += len(symbols)
+    finally:
+        scanner.supabase = previous
+
+    wall = time.perf_counter() - started
+    return {
+        "bar_closes":       len(events),
+        "bars":             bars,
+        "wall_s":           round(wall, 3),
+        "bars_per_s":       round(bars / wall, 1) if wall else 0.0,
+        "signals":          sum(signals_by_tf.values()),
+        "signals_by_tf":    dict(signals_by_tf),
+        "rows_persisted":   len(db.rows("crt_signals")),
+        "funnel":           dict(funnel),
+        "latency_ms_p50":   round(_pct(cycle_latency, 50), 2),
+        "latency_ms_p95":   round(_pct(cycle_latency, 95), 2),
+        "latency_ms_p99":   round(_pct(cycle_latency, 99), 2),
+        "latency_ms_max":   round(max(cycle_latency) * 1000, 2) if cycle_latency else 0.0,
+    }
+
+
+def print_replay_report(report: dict):
+    print(f"\n{'='*60}")
+    print(f"  REPLAY REPORT")
+    print(f"{'='*60}")
+    print(f"  Bar closes      : {report['bar_closes']}  ({report['bars']} ticker-bars)")
+    print(f"  Wall time       : {report['wall_s']:.2f}s")
+    print(f"  Throughput      : {report['bars_per_s']:.1f} bars/s")
+    print(f"  Signals emitted : {report['signals']}  {report['signals_by_tf']}")
+    print(f"  Rows persisted  : {report['rows_persisted']}")
+    print(f"  Funnel          : {report['funnel']}")
+    print(f"  Latency / close : p50={report['latency_ms_p50']:.1f}ms  p95={report['latency_ms_p95']:.1f}ms  "
+          f"p99={report['latency_ms_p99']:.1f}ms  max={report['latency_ms_max']:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRT Flow bar replay through the live scanner path")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Download 1h/15m bars to local CSV files")
+    rec.add_argument("--symbols", nargs="+", required=True)
+    rec.add_argument("--data-dir", type=str, default="replay_bars")
+
+    run = sub.add_parser("run", help="Replay recorded bars through scan_ticker")
+    run.add_argument("--data-dir", type=str, default="replay_bars")
+    run.add_argument("--symbols", nargs="+", default=None, help="Default: every recorded symbol")
+    run.add_argument("--workers", type=int, default=1, help="Thread pool size per bar close")
+    run.add_argument("--db-latency", type=float, default=0.0, help="Seconds added to each local DB request")
+    run.add_argument("--warmup", type=int, default=MIN_BARS_15M, help="Bar closes to skip at the start")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record_bars([s.upper() for s in args.symbols], args.data_dir)
+        return
+
+    symbols = [s.upper() for s in args.symbols] if args.symbols else discover_symbols(args.data_dir)
+    bars: dict = {}
+    for symbol in symbols:
+        df_1h = load_bars(args.data_dir, symbol, "1h")
+        df_15m = load_bars(args.data_dir, symbol, "15m")
+        if df_1h is None or df_15m is None:
+            print(f"  [{symbol}] missing recorded bars, skipping")
+            continue
+        bars[symbol] = {"1h": df_1h, "15m": df_15m}
+
+    if not bars:
+        print("No recorded bars to replay.")
+        return
+
+    print(f"[*] Replaying {len(bars)} symbol(s) from {args.data_dir}")
+    report = run_replay(ReplayFeed(bars), LocalSupabase(latency=args.db_latency), workers=args.workers,
+                        warmup=args.warmup)
+    print_replay_report(report)
+
+
+if __name__ == "__main__":
+    main()
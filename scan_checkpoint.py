@@ -0,0 +1,149 @@
+"""
+CRT Flow Scan Checkpoint — resume interrupted universe scans
+
+A long --index all scan records every finished ticker (funnel stage, signal
+count, whether its signals are confirmed in crt_signals) in a small JSON
+state file. Signal rows handed to the writer are counted per ticker in
+`unwritten` until the writer confirms them; a resumed run scans tickers
+with unconfirmed rows again (the deduper skips the ones that did land).
+Writes are batched (every `flush_every` tickers or `flush_interval`
+seconds) and atomic (tmp file + os.replace), so a crash loses at most one
+batch and never leaves a torn file.
+
+The checkpoint is keyed by the last closed NYSE 15m bar and the universe
+options. `--resume` continues with the unfinished tickers of the stored
+universe (no index download, no market-cap pass) only while that bar is
+still the latest one; once a new bar has closed the scanner falls back to a
+fresh scan, because the finished tickers' results would be stale.
+
+Usage:
+    python scanner.py --index all --persist                  # writes scan_checkpoint.json
+    python scanner.py --index all --persist --resume         # after a crash / deploy
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from market_calendar import previous_bar_close
+
+FUNNEL_STAGES = ("no_data", "no_pattern", "duplicate", "signal")
+
+
+def checkpoint_key(options: dict, now: pd.Timestamp | None = None) -> dict:
+    """Run identity: the bar the scan looks at plus the options that shape the universe."""
+    now = now or pd.Timestamp.now(tz="UTC")
+    return {"bar_close": previous_bar_close(now).isoformat(), **options}
+
+
+class ScanCheckpoint:
+    def __init__(self, path: str, key: dict, universe: list[str] | None = None,
+                 flush_every: int = 50, flush_interval: float = 10.0):
+        self.path = path
+        self.key = key
+        self.universe = list(universe) if universe is not None else None
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.done: dict[str, dict] = {}
+        self.unwritten: dict[str, int] = {}
+        self.completed = False
+        self.resumed = False
+        self._dirty = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str, key: dict, resume: bool = False, **kwargs) -> "ScanCheckpoint":
+        """The stored checkpoint when resuming a run with the same key, otherwise a fresh one."""
+        checkpoint = cls(path, key, **kwargs)
+        if resume and os.path.isfile(path):
+            try:
+                with open(path, encoding="utf-8") as fh:
+                    state = json.load(fh)
+            except (OSError, ValueError):
+                return checkpoint
+            if state.get("key") == key:
+                checkpoint.universe = state.get("universe")
+                unwritten = state.get("unwritten", {})
+                checkpoint.done = {t: e for t, e in state.get("done", {}).items() if not unwritten.get(t)}
+                checkpoint.completed = state.get("completed", False) and not unwritten
+                checkpoint.resumed = True
+        return checkpoint
+
+    def set_universe(self, tickers: list[str]):
+        with self._lock:
+            self.universe = list(tickers)
+        self.flush()
+
+    def remaining(self, tickers: list[str] | None = None) -> list[str]:
+        with self._lock:
+            return [t for t in (tickers if tickers is not None else self.universe or []) if t not in self.done]
+
+    def record(self, ticker: str, stage: str, count: int = 0, persisted: bool = False):
+        """persisted only holds once every row queued for the ticker was confirmed."""
+        with self._lock:
+            persisted = persisted and not self.unwritten.get(ticker)
+            self.done[ticker] = {"stage": stage, "signals": count, "persisted": persisted}
+            due = self._touch()
+        if due:
+            self.flush()
+
+    def queued(self, ticker: str, rows: int = 1):
+        """Signal rows of `ticker` handed to persistence, not yet confirmed."""
+        with self._lock:
+            self.unwritten[ticker] = self.unwritten.get(ticker, 0) + rows
+
+    def confirmed(self, ticker: str, rows: int = 1):
+        """The writer confirmed rows of `ticker`; persisted once none are left."""
+        with self._lock:
+            left = self.unwritten.get(ticker, 0) - rows
+            if left > 0:
+                self.unwritten[ticker] = left
+                return
+            self.unwritten.pop(ticker, None)
+            if ticker in self.done:
+                self.done[ticker]["persisted"] = True
+            due = self._touch()
+        if due:
+            self.flush()
+
+    def _touch(self) -> bool:
+        self._dirty += 1
+        return self._dirty >= self.flush_every or (
+            self.flush_interval is not None and time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+    def totals(self, tickers: list[str] | None = None) -> dict:
+        """Funnel counts and signal rows over the finished tickers (of `tickers` when given)."""
+        with self._lock:
+            entries = [self.done[t] for t in (tickers if tickers is not None else self.done) if t in self.done]
+        funnel = {stage: 0 for stage in FUNNEL_STAGES}
+        for entry in entries:
+            funnel[entry["stage"]] = funnel.get(entry["stage"], 0) + 1
+        return {"funnel": funnel, "signals": sum(e["signals"] for e in entries)}
+
+    def flush(self):
+        with self._lock:
+            state = {
+                "key": self.key,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+                "completed": self.completed,
+                "universe": self.universe,
+                "done": {t: dict(e) for t, e in self.done.items()},
+                "unwritten": dict(self.unwritten),
+            }
+            self._dirty = 0
+            self._last_flush = time.monotonic()
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(state, fh)
+            os.replace(tmp, self.path)
+
+    def finish(self):
+        self.completed = True
+        self.flush()
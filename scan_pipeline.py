@@ -0,0 +1,318 @@
+"""
+CRT Flow Scan Pipeline — download → detect → enrich/persist as separate stages
+
+scanner.scan_ticker runs every step of a ticker on one thread, so the
+pandas detection competes for the GIL with the yfinance downloads of the
+same pool. ScanPipeline splits the work into three stages joined by bounded
+queues:
+
+  fetch    thread pool (I/O): downloads the frames and packs them into
+           compact arrays (datetime64 index + float64 OHLCV)
+  detect   process pool (CPU): rebuilds the frames and runs the 3C detector;
+           one dispatcher thread per process keeps at most one ticker in
+           flight per process
+  enrich   thread pool (I/O): dedup, market cap, logging and persistence
+           (the scanner's finish step)
+
+A full queue blocks the stage upstream (backpressure), so memory stays
+bounded by the queue sizes whatever the universe size. Each stage records
+busy time (working), idle time (waiting for input) and blocked time
+(waiting for room downstream); occupancy = busy / (workers × wall time),
+and the stage with the highest occupancy limits throughput.
+
+Usage:
+    python scanner.py --index all --pipeline --workers 16 --cpu-workers 4 --enrich-workers 4
+
+--workers sizes the fetch pool (ScanPipeline io_workers), --cpu-workers the
+detect processes and --enrich-workers the enrich pool.
+"""
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from strategy.config import MIN_BARS_15M, MIN_BARS_1H, MIN_BARS_4H
+from strategy.wick_retrace_3c import detect_latest_pattern
+
+logger = logging.getLogger(__name__)
+
+FRAME_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+TIMEFRAMES = (("4H", MIN_BARS_4H), ("1H", MIN_BARS_1H), ("15M", MIN_BARS_15M))
+
+_STOP = object()
+
+
+# ─────────────────────────────────────────────────────────────
+# DETECTION
+# ─────────────────────────────────────────────────────────────
+
+def detect_signals(ticker: str, frames, timeframes=None, observe=None) -> tuple[list[dict], str]:
+    """
+    3C patterns of the last closed bar of each (4H, 1H, 15M) frame.
+    Returns (signals, stage) with stage "no_data", "no_pattern" or "signal".
+    observe(stage, seconds, ticker, error) receives the detection time per
+    timeframe as "detect_<TF>" (scanner_metrics.ScannerMetrics.observe).
+    """
+    checked = [(label, df, min_bars) for (label, min_bars), df in zip(TIMEFRAMES, frames)
+               if timeframes is None or label in timeframes]
+    if all(df is None or len(df) < min_bars for _, df, min_bars in checked):
+        return [], "no_data"
+
+    signals: list[dict] = []
+    for label, df, min_bars in checked:
+        if df is None or len(df) < min_bars:
+            continue
+        t0 = time.perf_counter()
+        try:
+            pattern = detect_latest_pattern(df, label)  # type: ignore[arg-type]
+        except Exception:
+            if observe is not None:
+                observe(f"detect_{label}", time.perf_counter() - t0, ticker, True)
+            raise
+        if observe is not None:
+            observe(f"detect_{label}", time.perf_counter() - t0, ticker, False)
+        if pattern is not None:
+            pattern["ticker"] = ticker
+            signals.append(pattern)
+    return signals, "signal" if signals else "no_pattern"
+
+
+def pack_frame(df: pd.DataFrame | None) -> tuple | None:
+    """(datetime64 index, tz, columns, float64 values) — pickles far smaller and faster than a DataFrame."""
+    if df is None:
+        return None
+    columns = tuple(c for c in FRAME_COLUMNS if c in df.columns)
+    tz = str(df.index.tz) if getattr(df.index, "tz", None) is not None else None
+    return np.asarray(df.index.tz_convert(None) if tz else df.index), tz, columns, df[list(columns)].to_numpy(dtype=float)
+
+
+def unpack_frame(packed: tuple | None) -> pd.DataFrame | None:
+    if packed is None:
+        return None
+    index, tz, columns, values = packed
+    index = pd.DatetimeIndex(index)
+    if tz:
+        index = index.tz_localize("UTC").tz_convert(tz)
+    return pd.DataFrame(values, index=index, columns=list(columns))
+
+
+def detect_packed(ticker: str, packed_frames: tuple, timeframes=None) -> tuple[list[dict], str, list[tuple]]:
+    """Process-pool entry point; also returns the detection timings for the parent's metrics."""
+    timings: list[tuple] = []
+    signals, stage = detect_signals(ticker, [unpack_frame(p) for p in packed_frames], timeframes,
+                                    observe=lambda *obs: timings.append(obs))
+    return signals, stage, timings
+
+
+# ─────────────────────────────────────────────────────────────
+# PIPELINE
+# ─────────────────────────────────────────────────────────────
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    items: int = 0
+    busy_s: float = 0.0
+    idle_s: float = 0.0
+    blocked_s: float = 0.0
+    max_queue: int = 0
+
+    def report(self, wall_s: float) -> dict:
+        capacity = max(self.workers * wall_s, 1e-9)
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "busy_s": round(self.busy_s, 3),
+            "idle_s": round(self.idle_s, 3),
+            "blocked_s": round(self.blocked_s, 3),
+            "occupancy": round(self.busy_s / capacity, 3),
+            "max_queue": self.max_queue,
+        }
+
+
+class ScanPipeline:
+    """
+    pipeline = ScanPipeline(fetch_mtf_frames, finish, io_workers=16, cpu_workers=4)
+    stats = pipeline.run(tickers)   # {"funnel", "signals", "elapsed_s", "stages"}
+
+    finish(ticker, signals) -> (signals, stage, count) is called only for
+    tickers with at least one detected pattern. Pass an existing executor to
+    keep the worker processes warm across runs (daemon mode).
+    on_result(ticker, stage, count) is called once per finished ticker;
+    observe(stage, seconds, ticker, error) receives fetch and detection
+    latencies (detection timings are shipped back from the worker processes).
+    """
+
+    def __init__(
+        self,
+        fetch,
+        finish,
+        io_workers: int = 8,
+        cpu_workers: int | None = None,
+        enrich_workers: int = 4,
+        queue_size: int = 64,
+        timeframes=None,
+        executor: concurrent.futures.Executor | None = None,
+        on_result=None,
+        observe=None,
+    ):
+        self.fetch = fetch
+        self.finish = finish
+        self.io_workers = max(1, io_workers)
+        self.cpu_workers = max(1, cpu_workers or os.cpu_count() or 1)
+        self.enrich_workers = max(1, enrich_workers)
+        self.queue_size = max(1, queue_size)
+        self.timeframes = timeframes
+        self.executor = executor
+        self.on_result = on_result
+        self.observe = observe
+
+    def run(self, tickers: list[str]) -> dict:
+        started = time.perf_counter()
+        self._funnel = {"no_data": 0, "no_pattern": 0, "duplicate": 0, "signal": 0}
+        self._signals = 0
+        self._lock = threading.Lock()
+        self._stages = {
+            "fetch": StageStats("fetch", self.io_workers),
+            "detect": StageStats("detect", self.cpu_workers),
+            "enrich": StageStats("enrich", self.enrich_workers),
+        }
+
+        todo: queue.Queue = queue.Queue()
+        for ticker in tickers:
+            todo.put(ticker)
+        detect_q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        enrich_q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        executor = self.executor or concurrent.futures.ProcessPoolExecutor(max_workers=self.cpu_workers)
+        try:
+            fetchers = self._start(self.io_workers, self._fetch_worker, todo, detect_q)
+            detectors = self._start(self.cpu_workers, self._detect_worker, detect_q, enrich_q, executor)
+            enrichers = self._start(self.enrich_workers, self._enrich_worker, enrich_q)
+
+            self._drain(fetchers, todo, self.io_workers)
+            self._drain(detectors, detect_q, self.cpu_workers)
+            self._drain(enrichers, enrich_q, self.enrich_workers)
+        finally:
+            if self.executor is None:
+                executor.shutdown()
+
+        wall = time.perf_counter() - started
+        return {
+            "funnel": self._funnel,
+            "signals": self._signals,
+            "elapsed_s": round(wall, 3),
+            "stages": {name: s.report(wall) for name, s in self._stages.items()},
+        }
+
+    # ── plumbing ─────────────────────────────────────────────
+    @staticmethod
+    def _start(count: int, target, *args) -> list[threading.Thread]:
+        threads = [threading.Thread(target=target, args=args, daemon=True) for _ in range(count)]
+        for t in threads:
+            t.start()
+        return threads
+
+    @staticmethod
+    def _drain(threads: list[threading.Thread], inbox: queue.Queue, count: int):
+        """Stop a stage once its input is exhausted: one sentinel per worker, then join."""
+        for _ in range(count):
+            inbox.put(_STOP)
+        for t in threads:
+            t.join()
+
+    def _take(self, stage: StageStats, inbox: queue.Queue):
+        t0 = time.perf_counter()
+        item = inbox.get()
+        with self._lock:
+            stage.idle_s += time.perf_counter() - t0
+        return item
+
+    def _give(self, stage: StageStats, outbox: queue.Queue, item):
+        t0 = time.perf_counter()
+        outbox.put(item)
+        with self._lock:
+            stage.blocked_s += time.perf_counter() - t0
+            stage.max_queue = max(stage.max_queue, outbox.qsize())
+
+    def _done(self, stage: StageStats, started: float):
+        with self._lock:
+            stage.items += 1
+            stage.busy_s += time.perf_counter() - started
+
+    def _record(self, ticker: str, stage_name: str, count: int = 0):
+        with self._lock:
+            self._funnel[stage_name] = self._funnel.get(stage_name, 0) + 1
+            self._signals += count
+        if self.on_result is not None:
+            self.on_result(ticker, stage_name, count)
+
+    # ── workers ──────────────────────────────────────────────
+    def _fetch_worker(self, todo: queue.Queue, detect_q: queue.Queue):
+        stage = self._stages["fetch"]
+        while (ticker := self._take(stage, todo)) is not _STOP:
+            t0 = time.perf_counter()
+            try:
+                frames = self.fetch(ticker)
+                if self.observe is not None:
+                    self.observe("fetch", time.perf_counter() - t0, ticker, False)
+                packed = tuple(pack_frame(df) for df in frames)
+            except Exception as e:
+                if self.observe is not None:
+                    self.observe("fetch", time.perf_counter() - t0, ticker, True)
+                logger.error(f"Errore {ticker}: {e}")
+                packed = None
+            self._done(stage, t0)
+            if packed is None:
+                continue
+            if all(p is None for p in packed):
+                self._record(ticker, "no_data")
+                continue
+            self._give(stage, detect_q, (ticker, packed))
+
+    def _detect_worker(self, detect_q: queue.Queue, enrich_q: queue.Queue, executor):
+        stage = self._stages["detect"]
+        while (item := self._take(stage, detect_q)) is not _STOP:
+            ticker, packed = item
+            t0 = time.perf_counter()
+            try:
+                signals, result, timings = executor.submit(detect_packed, ticker, packed, self.timeframes).result()
+            except Exception as e:
+                logger.error(f"Errore {ticker}: {e}")
+                self._done(stage, t0)
+                continue
+            self._done(stage, t0)
+            if self.observe is not None:
+                for obs in timings:
+                    self.observe(*obs)
+            if result == "signal":
+                self._give(stage, enrich_q, (ticker, signals))
+            else:
+                self._record(ticker, result)
+
+    def _enrich_worker(self, enrich_q: queue.Queue):
+        stage = self._stages["enrich"]
+        while (item := self._take(stage, enrich_q)) is not _STOP:
+            ticker, signals = item
+            t0 = time.perf_counter()
+            try:
+                _, result, count = self.finish(ticker, signals)
+                self._record(ticker, result, count)
+            except Exception as e:
+                logger.error(f"Errore {ticker}: {e}")
+            self._done(stage, t0)
+
+
+def bottleneck(stats: dict) -> str | None:
+    """Stage with the highest occupancy."""
+    stages = stats.get("stages") or {}
+    return max(stages, key=lambda name: stages[name]["occupancy"]) if stages else None
@@ -0,0 +1,153 @@
+"""
+CRT Flow Scan Shards — split the scan universe across nodes and merge the funnels
+
+Tickers are assigned to shards with a stable hash of the symbol (not Python's
+salted hash()), so every node computes the same assignment independently:
+each symbol is scanned by exactly one shard even if the nodes' universe
+downloads differ slightly. Each shard writes its funnel summary to
+<shard-dir>/<run-id>/shard-<i>-of-<N>.json; `merge` adds them back into the
+same Pipeline totals a single-node run logs.
+
+Shards are 0-based: --shard 0/4 … --shard 3/4.
+
+Usage:
+    python scanner.py --index all --persist --shard 0/4 --shard-dir /mnt/shared/scan_shards
+    python scan_shards.py merge --shard-dir /mnt/shared/scan_shards --run-id 20240308T1545
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import socket
+from datetime import datetime, timezone
+
+FUNNEL_STAGES = ("no_data", "no_pattern", "duplicate", "signal")
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    try:
+        index, count = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N, got {spec!r}") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Shard index must be in [0, {count}), got {spec!r}")
+    return index, count
+
+
+def shard_of(ticker: str, count: int) -> int:
+    digest = hashlib.blake2b(ticker.strip().upper().encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+def select_shard(tickers: list[str], index: int, count: int) -> list[str]:
+    return sorted(t for t in set(tickers) if shard_of(t, count) == index)
+
+
+def default_run_id(now: datetime | None = None, minutes: int = 15) -> str:
+    """UTC time floored to the scan interval, so nodes started by the same cron tick agree."""
+    now = now or datetime.now(timezone.utc)
+    now = now.replace(minute=now.minute - now.minute % minutes, second=0, microsecond=0)
+    return now.strftime("%Y%m%dT%H%M")
+
+
+def pipeline_line(funnel: dict, signals: int) -> str:
+    """The scanner's Pipeline: log line."""
+    return (
+        "Pipeline: "
+        f"no_data={funnel.get('no_data', 0)} | "
+        f"no_pattern={funnel.get('no_pattern', 0)} | "
+        f"duplicate={funnel.get('duplicate', 0)} | "
+        f"signals={funnel.get('signal', 0)} | "
+        f"total_rows={signals}"
+    )
+
+
+def shard_path(shard_dir: str, run_id: str, index: int, count: int) -> str:
+    return os.path.join(shard_dir, run_id, f"shard-{index}-of-{count}.json")
+
+
+def write_shard_summary(shard_dir: str, run_id: str, index: int, count: int,
+                        tickers: list[str], stats: dict) -> str:
+    path = shard_path(shard_dir, run_id, index, count)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    summary = {
+        "run_id": run_id,
+        "shard": index,
+        "shards": count,
+        "host": socket.gethostname(),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "tickers": len(tickers),
+        "funnel": {k: int(stats["funnel"].get(k, 0)) for k in FUNNEL_STAGES},
+        "signals": int(stats["signals"]),
+        "elapsed_s": stats.get("elapsed_s"),
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(summary, fh, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def merge_shard_summaries(shard_dir: str, run_id: str) -> dict:
+    """Sum every shard summary of a run; reports shards that have not written yet."""
+    summaries = []
+    for path in sorted(glob.glob(os.path.join(shard_dir, run_id, "shard-*-of-*.json"))):
+        with open(path, encoding="utf-8") as fh:
+            summaries.append(json.load(fh))
+
+    counts = {s["shards"] for s in summaries}
+    if len(counts) > 1:
+        raise ValueError(f"Run {run_id} mixes shard counts {sorted(counts)}")
+    expected = counts.pop() if counts else 0
+    present = {s["shard"] for s in summaries}
+
+    return {
+        "run_id": run_id,
+        "shards": expected,
+        "missing": sorted(set(range(expected)) - present),
+        "tickers": sum(s["tickers"] for s in summaries),
+        "funnel": {k: sum(s["funnel"].get(k, 0) for s in summaries) for k in FUNNEL_STAGES},
+        "signals": sum(s["signals"] for s in summaries),
+        "max_elapsed_s": max((s.get("elapsed_s") or 0 for s in summaries), default=0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRT Flow scan shards")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    merge = sub.add_parser("merge", help="Merge the per-shard funnels of a run")
+    merge.add_argument("--shard-dir", type=str, default="scan_shards")
+    merge.add_argument("--run-id", type=str, default=None, help="Default: latest run in --shard-dir")
+
+    assign = sub.add_parser("assign", help="Print the shard of each ticker")
+    assign.add_argument("--shards", type=int, required=True)
+    assign.add_argument("tickers", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "assign":
+        for t in args.tickers:
+            print(f"{t.upper():8s} {shard_of(t, args.shards)}/{args.shards}")
+        return
+
+    run_id = args.run_id
+    if run_id is None:
+        runs = sorted(d for d in os.listdir(args.shard_dir) if os.path.isdir(os.path.join(args.shard_dir, d)))
+        if not runs:
+            print(f"No runs in {args.shard_dir}")
+            return
+        run_id = runs[-1]
+
+    merged = merge_shard_summaries(args.shard_dir, run_id)
+    print(f"Run {run_id}: {merged['shards']} shard(s), {merged['tickers']} ticker, "
+          f"slowest shard {merged['max_elapsed_s']}s")
+    if merged["missing"]:
+        print(f"  ⚠️  missing shards: {merged['missing']}")
+    print(pipeline_line(merged["funnel"], merged["signals"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ import time
 import io
 import requests
 import json
+import random
 import sys
 import concurrent.futures
 
@@ -13,10 +14,16 @@ import yfinance as yf
 from dotenv import load_dotenv
 from supabase import create_client
 
-from market_data import fetch_mtf_frames
-from strategy.wick_retrace_3c import detect_latest_pattern
-from strategy.config import MIN_BARS_4H, MIN_BARS_1H, MIN_BARS_15M
-from signal_adapter import signal_to_crt_row
+from market_calendar import due_timeframes, next_bar_close
+from market_data import FrameCache, closed_frames, fetch_mtf_frames
+from profiling import add_profile_args, start_profiling
+from scan_shards import default_run_id, parse_shard, pipeline_line, select_shard, write_shard_summary
+from scan_checkpoint import ScanCheckpoint, checkpoint_key
+from scan_pipeline import ScanPipeline, bottleneck, detect_signals
+from scanner_metrics import METRICS, run_summary
+from signal_adapter import signal_key, signal_to_crt_row
+from signal_dedup import SignalDeduper
+from supabase_writer import BackgroundWriter, discover_columns, missing_column
 
 # --- LOGGING ---
 logger = logging.getLogger(__name__)
@@ -25,21 +32,68 @@ formatter = logging.Formatter("%(message)s")
 
 
 class SupabaseLoggingHandler(logging.Handler):
-    def __init__(self, supabase_client):
+    """
+    Non-blocking system_logs sink. emit() only formats and enqueues; a
+    BackgroundWriter thread inserts the records in batches. The queue is
+    bounded (records arriving while it is full are dropped), levels below
+    WARNING can be sampled via sample_rates, and every drop is counted and
+    reported when the handler is closed (logging.shutdown flushes it).
+    """
+
+    def __init__(
+        self,
+        supabase_client,
+        chunk_size: int = 200,
+        flush_interval: float = 5.0,
+        max_queue: int = 10_000,
+        sample_rates: dict[int, float] | None = None,
+        seed: int | None = None,
+    ):
         super().__init__()
         self.supabase = supabase_client
         self.source = "scanner_wick_3c_engine"
+        self.sample_rates = sample_rates or {}
+        self.sampled_out = 0
+        self._rng = random.Random(seed)
+        self.writer = BackgroundWriter(
+            supabase_client, "system_logs", chunk_size=chunk_size, flush_interval=flush_interval,
+            max_queue=max_queue, max_retries=1,
+        )
+
+    def _keep(self, levelno: int) -> bool:
+        if levelno >= logging.WARNING:
+            return True
+        rate = self.sample_rates.get(levelno, 1.0)
+        return rate >= 1.0 or self._rng.random() < rate
 
     def emit(self, record):
         try:
+            if not self._keep(record.levelno):
+                self.sampled_out += 1
+                return
             log_entry = self.format(record)
             if "system_logs" in log_entry:
                 return
-            self.supabase.table("system_logs").insert(
-                {"level": record.levelname, "message": log_entry, "source": self.source}
-            ).execute()
+            self.writer.add({"level": record.levelname, "message": log_entry, "source": self.source})
         except Exception:
-            pass
+            self.handleError(record)
+
+    def stats(self) -> dict:
+        s = self.writer.summary
+        return {
+            "written": s.rows_written,
+            "failed": s.rows_failed,
+            "dropped_queue_full": self.writer.dropped,
+            "sampled_out": self.sampled_out,
+        }
+
+    def close(self):
+        if self.writer.running:
+            self.writer.close()
+            stats = self.stats()
+            if stats["failed"] or stats["dropped_queue_full"]:
+                print(f"system_logs: {stats}", file=sys.stderr)
+        super().close()
 
 
 def setup_logging():
@@ -60,10 +114,11 @@ def setup_logging():
 
 
 supabase = None
+sb_log_handler: SupabaseLoggingHandler | None = None
 
 
 def setup_supabase():
-    global supabase
+    global supabase, sb_log_handler
     if os.path.exists(".env.local"):
         load_dotenv(".env.local")
 
@@ -77,9 +132,9 @@ def setup_supabase():
     if url and key:
         try:
             supabase = create_client(url, key)
-            sb_handler = SupabaseLoggingHandler(supabase)
-            sb_handler.setFormatter(formatter)
-            logger.addHandler(sb_handler)
+            sb_log_handler = SupabaseLoggingHandler(supabase)
+            sb_log_handler.setFormatter(formatter)
+            logger.addHandler(sb_log_handler)
         except Exception as e:
             print(f"Errore Supabase: {e}")
 
@@ -163,27 +218,97 @@ def get_nasdaq100_tickers():
     return fallback
 
 
-def _persist_signal_row(row: dict) -> None:
-    """Insert crt_signals row; retry without market_cap if column missing (PGRST204)."""
+signal_writer: BackgroundWriter | None = None
+signal_deduper: SignalDeduper | None = None
+signal_checkpoint: ScanCheckpoint | None = None   # told which queued signal rows were confirmed
+SIGNAL_CONFLICT = "signal_key"
+
+
+def _signals_written(rows: list[dict]) -> None:
+    """Writer callback: only rows confirmed in crt_signals are marked as seen."""
+    if signal_deduper is not None:
+        signal_deduper.mark([r["signal_key"] for r in rows if r.get("signal_key")])
+    if signal_checkpoint is not None:
+        for r in rows:
+            signal_checkpoint.confirmed(r["symbol"])
+
+
+def start_signal_writer(chunk_size: int = 100, flush_interval: float = 2.0) -> BackgroundWriter:
+    """Batched crt_signals inserts from a background thread; schema probed once per run."""
+    global signal_writer
     assert supabase is not None
-    try:
-        supabase.table("crt_signals").insert(row).execute()
+    signal_writer = BackgroundWriter(
+        supabase, "crt_signals", on_conflict=SIGNAL_CONFLICT, ignore_duplicates=True,
+        chunk_size=chunk_size, flush_interval=flush_interval,
+        columns=discover_columns(supabase, "crt_signals"),
+        observe=METRICS.observe,
+        on_written=_signals_written,
+    )
+    return signal_writer
+
+
+def start_signal_deduper(seen_file: str | None) -> SignalDeduper:
+    """Skip signals already persisted (local seen-file first, then crt_signals.signal_key)."""
+    global signal_deduper
+    signal_deduper = SignalDeduper(seen_file, client=supabase)
+    return signal_deduper
+
+
+def stop_signal_writer() -> None:
+    global signal_writer
+    if signal_writer is None:
         return
-    except Exception as e:
-        code = getattr(e, "code", None)
-        err = str(e)
-        missing_mcap = code == "PGRST204" or (
-            "market_cap" in err and ("PGRST204" in err or "schema cache" in err)
-        )
-        if missing_mcap and "market_cap" in row:
-            stripped = {k: v for k, v in row.items() if k != "market_cap"}
-            logger.warning(
-                "crt_signals.market_cap missing in schema cache — "
-                "retrying insert without it (run migration + Reload schema)"
-            )
-            supabase.table("crt_signals").insert(stripped).execute()
+    signal_writer.close()
+    s = signal_writer.summary
+    logger.info(
+        f"💾 crt_signals: {s.rows_written} righe in {s.requests} richieste"
+        + (f" | fallite={s.rows_failed}" if s.rows_failed else "")
+        + (f" | non confermate={s.rows_unflushed}" if s.rows_unflushed else "")
+        + (f" | colonne escluse={sorted(signal_writer.dropped_columns)}" if signal_writer.dropped_columns else "")
+    )
+    signal_writer = None
+
+
+def drain_signal_writer() -> None:
+    """Wait for the queued crt_signals rows, so their write metrics land in the current cycle."""
+    if signal_writer is not None and not signal_writer.drain(timeout=60.0):
+        logger.warning("⚠️  crt_signals: scrittura ancora in corso dopo 60s")
+
+
+_signal_upsert = True   # False once crt_signals turned out to lack the unique signal_key index (42P10)
+
+
+def _persist_signal_row(row: dict) -> None:
+    """
+    Upsert crt_signals row on signal_key (duplicates ignored); drop a column missing from the
+    schema (PGRST204); plain inserts when the signal_key unique index is not migrated (42P10).
+    """
+    global _signal_upsert
+    assert supabase is not None
+    with METRICS.timer("persist", row.get("symbol")):
+        try:
+            if _signal_upsert:
+                supabase.table("crt_signals").upsert(row, on_conflict=SIGNAL_CONFLICT, ignore_duplicates=True).execute()
+            else:
+                supabase.table("crt_signals").insert(row).execute()
             return
-        raise
+        except Exception as e:
+            if getattr(e, "code", None) == "42P10" and _signal_upsert:
+                logger.warning("crt_signals: no unique constraint on signal_key — "
+                               "plain inserts for the rest of the run (run migration)")
+                _signal_upsert = False
+                supabase.table("crt_signals").insert(row).execute()
+                return
+            column = missing_column(e)
+            if column and column in row:
+                stripped = {k: v for k, v in row.items() if k != column}
+                logger.warning(
+                    f"crt_signals.{column} missing in schema cache — "
+                    "retrying insert without it (run migration + Reload schema)"
+                )
+                supabase.table("crt_signals").insert(stripped).execute()
+                return
+            raise
 
 
 def _parse_iwm_holdings_csv(text: str) -> list[str]:
@@ -279,31 +404,42 @@ def get_market_cap(ticker: str) -> int | None:
         return None
 
 
-def scan_ticker(ticker: str, persist: bool) -> tuple[list[dict], str, int]:
-    df_4h, df_1h, df_15m = fetch_mtf_frames(ticker)
-
-    frames: list[tuple[str, pd.DataFrame | None, int]] = [
-        ("4H", df_4h, MIN_BARS_4H),
-        ("1H", df_1h, MIN_BARS_1H),
-        ("15M", df_15m, MIN_BARS_15M),
-    ]
-
-    if all(f is None or len(f) < min_b for _, f, min_b in frames):
-        return [], "no_data", 0
-
-    signals: list[dict] = []
-    for tf_label, df, min_bars in frames:
-        if df is None or len(df) < min_bars:
-            continue
-        pattern = detect_latest_pattern(df, tf_label)  # type: ignore[arg-type]
-        if pattern is not None:
-            pattern["ticker"] = ticker
-            signals.append(pattern)
-
-    if not signals:
-        return [], "no_pattern", 0
-
-    market_cap = get_market_cap(ticker) if persist else None
+def scan_ticker(
+    ticker: str,
+    persist: bool,
+    fetch_frames=None,
+    market_cap_lookup=None,
+    timeframes=None,
+) -> tuple[list[dict], str, int]:
+    """
+    fetch_frames / market_cap_lookup override the yfinance sources (replay, load tests).
+    timeframes restricts detection to those labels (daemon: only the bars that just closed).
+    """
+    with METRICS.timer("fetch", ticker):
+        frames = (fetch_frames or fetch_mtf_frames)(ticker)
+    signals, stage = detect_signals(ticker, frames, timeframes, observe=METRICS.observe)
+    if stage != "signal":
+        return [], stage, 0
+    return finish_signals(ticker, signals, persist, market_cap_lookup)
+
+
+def finish_signals(
+    ticker: str,
+    signals: list[dict],
+    persist: bool,
+    market_cap_lookup=None,
+) -> tuple[list[dict], str, int]:
+    """Dedup, market cap, logging and persistence of the patterns detected for a ticker."""
+    if persist and signal_deduper is not None:
+        new_keys = set(signal_deduper.filter_new([signal_key(s, ticker) for s in signals]))
+        signals = [s for s in signals if signal_key(s, ticker) in new_keys]
+        if not signals:
+            return [], "duplicate", 0
+
+    market_cap = None
+    if persist:
+        with METRICS.timer("market_cap", ticker):
+            market_cap = (market_cap_lookup or get_market_cap)(ticker)
     if persist and market_cap is None:
         logger.warning(f"⚠️  market_cap unavailable for {ticker}")
     for signal in signals:
@@ -312,10 +448,18 @@ def scan_ticker(ticker: str, persist: bool) -> tuple[list[dict], str, int]:
         logger.info(f"🎯 SIGNAL {ticker} [{signal['timeframe']}]: {json.dumps(signal)}")
         if persist and supabase is not None:
             row = signal_to_crt_row(signal, ticker=ticker)
+            if signal_checkpoint is not None:
+                signal_checkpoint.queued(ticker)
             try:
-                _persist_signal_row(row)
+                if signal_writer is not None:
+                    # Marked as seen by _signals_written once the batch is confirmed
+                    signal_writer.add(row)
+                else:
+                    _persist_signal_row(row)
+                    _signals_written([row])
                 logger.info(
-                    f"💾 Persisted {signal['direction']} signal for {ticker} "
+                    f"💾 {'Queued' if signal_writer is not None else 'Persisted'} "
+                    f"{signal['direction']} signal for {ticker} "
                     f"({signal['timeframe']})"
                     + (f" mcap={market_cap}" if market_cap else " mcap=null")
                 )
@@ -325,46 +469,7 @@ def scan_ticker(ticker: str, persist: bool) -> tuple[list[dict], str, int]:
     return signals, "signal", len(signals)
 
 
-def main():
-    setup_logging()
-    setup_supabase()
-
-    parser = argparse.ArgumentParser(description="CRT Flow 3C Wick Scanner")
-    parser.add_argument(
-        "--index",
-        type=str,
-        default="us",
-        choices=["sp500", "nasdaq", "russell", "us", "all"],
-        help="Universe: us = S&P 500 + NASDAQ 100 (default), all = us + Russell 2000",
-    )
-    parser.add_argument(
-        "--persist",
-        action="store_true",
-        help="Salva segnali su Supabase (default: dry-run, solo log JSON)",
-    )
-    parser.add_argument(
-        "--symbol",
-        type=str,
-        default=None,
-        help="Scansiona un solo ticker (es. AAPL)",
-    )
-    parser.add_argument(
-        "--workers",
-        type=int,
-        default=8,
-        help="Thread pool size per download/analisi",
-    )
-    args = parser.parse_args()
-
-    if sys.platform.startswith("win"):
-        try:
-            sys.stdout.reconfigure(encoding="utf-8")
-        except Exception:
-            pass
-
-    mode = "PERSIST" if args.persist else "DRY-RUN"
-    logger.info(f"🚀 3C Wick Scanner ({mode})")
-
+def load_universe(args) -> list[str]:
     if args.symbol:
         tickers = [args.symbol.upper()]
     else:
@@ -395,6 +500,12 @@ def main():
         tickers = list(set(all_tickers))
         logger.info(f"✅ Ticker unici: {len(tickers)} (overlap tra indici rimosso)")
 
+        shard = getattr(args, "shard", None)
+        if shard is not None:
+            # Shard before the market-cap filter so each node only pays for its own lookups
+            tickers = select_shard(tickers, *shard)
+            logger.info(f"🧩 Shard {shard[0]}/{shard[1]}: {len(tickers)} ticker")
+
         logger.info("Filtro Market Cap in corso...")
         filtered: list[str] = []
         with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
@@ -403,20 +514,31 @@ def main():
                     filtered.append(res)
         tickers = filtered
         logger.info(f"Ticker post M-Cap (>= $3M): {len(tickers)}")
-
-    if not tickers:
-        logger.info("Nessun ticker da scansionare.")
-        return
-
+    return tickers
+
+
+def run_scan_cycle(
+    tickers: list[str],
+    persist: bool,
+    workers: int,
+    timeframes=None,
+    fetch_frames=None,
+    market_cap_lookup=None,
+    checkpoint: ScanCheckpoint | None = None,
+) -> dict:
+    """Scan every ticker once on a thread pool; returns funnel counts, signal rows and wall time."""
+    started = time.perf_counter()
     signals_found = 0
     funnel_counts: dict[str, int] = {
         "no_data": 0,
         "no_pattern": 0,
+        "duplicate": 0,
         "signal": 0,
     }
-    with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as executor:
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
         futures = {
-            executor.submit(scan_ticker, t, args.persist): t for t in tickers
+            executor.submit(scan_ticker, t, persist, fetch_frames, market_cap_lookup, timeframes): t
+            for t in tickers
         }
         for future in concurrent.futures.as_completed(futures):
             ticker = futures[future]
@@ -425,17 +547,391 @@ def main():
                 funnel_counts[stage] = funnel_counts.get(stage, 0) + 1
                 if signals:
                     signals_found += count
+                if checkpoint is not None:
+                    checkpoint.record(ticker, stage, count, persisted=persist and stage == "signal")
             except Exception as e:
                 logger.error(f"Errore {ticker}: {e}")
+    return {
+        "funnel": funnel_counts,
+        "signals": signals_found,
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
 
-    logger.info(
-        "Pipeline: "
-        f"no_data={funnel_counts['no_data']} | "
-        f"no_pattern={funnel_counts['no_pattern']} | "
-        f"signals={funnel_counts['signal']} | "
-        f"total_rows={signals_found}"
+
+def run_pipelined_cycle(
+    tickers: list[str],
+    persist: bool,
+    io_workers: int,
+    cpu_workers: int | None,
+    enrich_workers: int,
+    queue_size: int = 64,
+    timeframes=None,
+    fetch_frames=None,
+    market_cap_lookup=None,
+    executor=None,
+    checkpoint: ScanCheckpoint | None = None,
+) -> dict:
+    """run_scan_cycle split into fetch/detect/enrich stages (scan_pipeline); adds per-stage occupancy."""
+    pipeline = ScanPipeline(
+        fetch_frames or fetch_mtf_frames,
+        lambda ticker, signals: finish_signals(ticker, signals, persist, market_cap_lookup),
+        io_workers=io_workers,
+        cpu_workers=cpu_workers,
+        enrich_workers=enrich_workers,
+        queue_size=queue_size,
+        timeframes=timeframes,
+        executor=executor,
+        observe=METRICS.observe,
+        on_result=None if checkpoint is None else (
+            lambda ticker, stage, count: checkpoint.record(ticker, stage, count, persisted=persist and stage == "signal")
+        ),
+    )
+    return pipeline.run(tickers)
+
+
+def run_scan(
+    args,
+    tickers: list[str],
+    fetch_frames=None,
+    market_cap_lookup=None,
+    checkpoint: ScanCheckpoint | None = None,
+) -> dict:
+    """
+    One scan of `tickers` as configured by the CLI options (thread pool, or
+    the staged pipeline with --pipeline); metrics start from zero. main() and
+    loadtest.py both go through here.
+    """
+    METRICS.reset()
+    if args.pipeline:
+        return run_pipelined_cycle(
+            tickers, args.persist, args.workers, args.cpu_workers, args.enrich_workers, args.queue_size,
+            fetch_frames=fetch_frames, market_cap_lookup=market_cap_lookup, checkpoint=checkpoint,
+        )
+    return run_scan_cycle(
+        tickers, args.persist, args.workers,
+        fetch_frames=fetch_frames, market_cap_lookup=market_cap_lookup, checkpoint=checkpoint,
+    )
+
+
+def log_cycle(stats: dict) -> None:
+    logger.info(pipeline_line(stats["funnel"], stats["signals"]))
+    stages = stats.get("stages")
+    if stages:
+        for name, st in stages.items():
+            logger.info(
+                f"   {name:<7} workers={st['workers']:<3} items={st['items']:<5} "
+                f"occupazione={st['occupancy']:.0%} bloccato={st['blocked_s']:.1f}s "
+                f"coda max={st['max_queue']}"
+            )
+        logger.info(f"   Collo di bottiglia: {bottleneck(stats)}")
+
+
+def write_metrics(args, stats: dict, tickers: int) -> None:
+    """Per-stage latency histograms of the run (scanner_metrics) as JSON and Prometheus text."""
+    json_path = getattr(args, "metrics_file", None)
+    prom_path = getattr(args, "prom_file", None)
+    if not json_path and not prom_path:
+        return
+    try:
+        METRICS.write(json_path, prom_path, run_summary(stats, tickers))
+    except OSError as e:
+        logger.warning(f"Scrittura metriche fallita: {e}")
+
+
+def write_status(path: str, status: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(status, fh, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+def run_daemon(
+    args,
+    universe_loader=load_universe,
+    fetch_frames=None,
+    market_cap_lookup=None,
+    now=lambda: pd.Timestamp.now(tz="UTC"),
+    sleep=time.sleep,
+    max_cycles: int | None = None,
+) -> dict | None:
+    """
+    Wait for each NYSE 15m bar close (+ close_delay seconds for the data to
+    publish) and scan only the timeframes whose bar just closed. Clients, the
+    universe (reloaded once per session), market caps and 1h/15m history stay
+    warm between cycles. Bars opened at or after the close are dropped, so the
+    detectors see the bar that just closed last. The last cycle is written to
+    args.status_file.
+    """
+    frame_cache = FrameCache()
+    mcap_cache: dict[str, int | None] = {}
+
+    def cached_market_cap(ticker: str):
+        if ticker not in mcap_cache:
+            mcap_cache[ticker] = (market_cap_lookup or get_market_cap)(ticker)
+        return mcap_cache[ticker]
+
+    tickers: list[str] = []
+    universe_day = None
+    status = None
+    cycles = 0
+    executor = (
+        concurrent.futures.ProcessPoolExecutor(max_workers=args.cpu_workers)
+        if getattr(args, "pipeline", False) else None
     )
-    logger.info(f"✅ Completato. Segnali trovati: {signals_found}")
+    try:
+        while max_cycles is None or cycles < max_cycles:
+            close = next_bar_close(now())
+            wait = (close + pd.Timedelta(seconds=args.close_delay) - now()).total_seconds()
+            if wait > 0:
+                logger.info(f"⏳ Prossima chiusura {close.strftime('%Y-%m-%d %H:%M %Z')} tra {wait:.0f}s")
+                sleep(wait)
+
+            session_day = close.date()
+            if session_day != universe_day:
+                tickers = universe_loader(args)
+                mcap_cache.clear()
+                universe_day = session_day
+
+            timeframes = due_timeframes(close)
+            METRICS.reset()
+            refresh_hourly = "1H" in timeframes or "4H" in timeframes
+            source = fetch_frames or (lambda t: frame_cache.fetch(t, refresh_hourly=refresh_hourly))
+
+            def fetch(ticker, source=source, close=close):
+                # The download already holds the bar that opened at `close`
+                return closed_frames(source(ticker), close)
+            if executor is not None:
+                stats = run_pipelined_cycle(
+                    tickers, args.persist, args.workers, args.cpu_workers, args.enrich_workers,
+                    args.queue_size, timeframes, fetch, cached_market_cap, executor,
+                )
+            else:
+                stats = run_scan_cycle(tickers, args.persist, args.workers, timeframes, fetch, cached_market_cap)
+            finished = now()
+            # Before the metrics are written (and reset next cycle): this cycle's writes belong here
+            drain_signal_writer()
+
+            status = {
+                "bar_close": close.isoformat(),
+                "timeframes": timeframes,
+                "tickers": len(tickers),
+                "finished_at": finished.isoformat(),
+                "scan_s": stats["elapsed_s"],
+                "latency_s": round((finished - close).total_seconds(), 3),
+                "signals": stats["signals"],
+                "funnel": stats["funnel"],
+            }
+            if "stages" in stats:
+                status["stages"] = stats["stages"]
+            if args.status_file:
+                write_status(args.status_file, status)
+            if getattr(args, "shard", None) is not None:
+                write_shard_summary(args.shard_dir, close.strftime("%Y%m%dT%H%M"), *args.shard, tickers, stats)
+            write_metrics(args, stats, len(tickers))
+            log_cycle(stats)
+            logger.info(f"⏱️  {'/'.join(timeframes)} @ {close.strftime('%H:%M')}: "
+                        f"scan {stats['elapsed_s']:.1f}s, latenza dalla chiusura {status['latency_s']:.1f}s")
+            cycles += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return status
+
+
+def main():
+    setup_logging()
+    setup_supabase()
+
+    parser = argparse.ArgumentParser(description="CRT Flow 3C Wick Scanner")
+    parser.add_argument(
+        "--index",
+        type=str,
+        default="us",
+        choices=["sp500", "nasdaq", "russell", "us", "all"],
+        help="Universe: us = S&P 500 + NASDAQ 100 (default), all = us + Russell 2000",
+    )
+    parser.add_argument(
+        "--persist",
+        action="store_true",
+        help="Salva segnali su Supabase (default: dry-run, solo log JSON)",
+    )
+    parser.add_argument(
+        "--symbol",
+        type=str,
+        default=None,
+        help="Scansiona un solo ticker (es. AAPL)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Thread pool size per download/analisi (con --pipeline: solo download)",
+    )
+    parser.add_argument(
+        "--seen-file",
+        type=str,
+        default="seen_signals.txt",
+        help="Chiavi dei segnali già salvati (dedup tra run); vuoto per disattivare il file locale",
+    )
+    parser.add_argument(
+        "--log-sample",
+        type=float,
+        default=1.0,
+        help="Frazione dei log INFO inviati a system_logs (WARNING+ sempre inviati)",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Resta attivo e scansiona a ogni chiusura 15m NYSE (solo i timeframe chiusi)",
+    )
+    parser.add_argument(
+        "--close-delay",
+        type=float,
+        default=20.0,
+        help="Secondi di attesa dopo la chiusura della barra prima della scansione (daemon)",
+    )
+    parser.add_argument(
+        "--status-file",
+        type=str,
+        default="scanner_status.json",
+        help="File JSON con l'ultimo ciclo del daemon (latenza, funnel)",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Download, rilevamento e persistenza su stadi separati (thread I/O, processi CPU, code limitate)",
+    )
+    parser.add_argument(
+        "--cpu-workers",
+        type=int,
+        default=None,
+        help="Processi per il rilevamento pattern con --pipeline (default: numero di CPU)",
+    )
+    parser.add_argument(
+        "--enrich-workers",
+        type=int,
+        default=4,
+        help="Thread per dedup/market cap/persistenza con --pipeline",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=64,
+        help="Capienza delle code tra gli stadi con --pipeline (backpressure)",
+    )
+    parser.add_argument(
+        "--checkpoint-file",
+        type=str,
+        default="scan_checkpoint.json",
+        help="Stato della scansione (ticker completati) per --resume; vuoto per disattivare",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Riprende una scansione interrotta se le barre sono ancora quelle correnti, altrimenti riparte da zero",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        default="scanner_metrics.json",
+        help="Latenze per stadio (p50/p95/p99, errori, ticker più lenti) a fine run; vuoto per disattivare",
+    )
+    parser.add_argument(
+        "--prom-file",
+        type=str,
+        default=None,
+        help="Stesse metriche in formato testo Prometheus (textfile collector di node_exporter)",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        metavar="i/N",
+        help="Scansiona solo lo shard i di N (0-based, assegnazione stabile per hash del ticker)",
+    )
+    parser.add_argument(
+        "--shard-dir",
+        type=str,
+        default="scan_shards",
+        help="Cartella condivisa dove ogni shard scrive il proprio funnel (scan_shards.py merge)",
+    )
+    parser.add_argument(
+        "--run-id",
+        type=str,
+        default=None,
+        help="Id del run condiviso dagli shard (default: ora UTC arrotondata ai 15 minuti)",
+    )
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_profiling(args)
+    # Taken at start-up so nodes launched by the same cron tick share the run id
+    args.run_id = args.run_id or default_run_id()
+    if sb_log_handler is not None:
+        sb_log_handler.sample_rates[logging.INFO] = args.log_sample
+
+    if sys.platform.startswith("win"):
+        try:
+            sys.stdout.reconfigure(encoding="utf-8")
+        except Exception:
+            pass
+
+    mode = "PERSIST" if args.persist else "DRY-RUN"
+    logger.info(f"🚀 3C Wick Scanner ({mode}{', DAEMON' if args.daemon else ''})")
+
+    if args.persist and supabase is not None:
+        start_signal_deduper(args.seen_file or None)
+        start_signal_writer()
+
+    if args.daemon:
+        try:
+            run_daemon(args)
+        except KeyboardInterrupt:
+            logger.info("Daemon interrotto.")
+        finally:
+            stop_signal_writer()
+        return
+
+    checkpoint = None
+    if args.checkpoint_file:
+        key = checkpoint_key({
+            "index": args.index,
+            "symbol": args.symbol,
+            "shard": list(args.shard) if args.shard else None,
+        })
+        checkpoint = ScanCheckpoint.open(args.checkpoint_file, key, resume=args.resume)
+        if args.resume and not checkpoint.resumed:
+            logger.info("↩️  Nessun checkpoint valido per le barre correnti: scansione completa")
+
+    if checkpoint is not None and checkpoint.resumed and checkpoint.universe is not None:
+        tickers = checkpoint.universe
+        logger.info(f"↩️  Ripresa dal checkpoint ({checkpoint.key['bar_close']}): "
+                    f"{len(checkpoint.done)}/{len(tickers)} ticker già completati")
+    else:
+        tickers = load_universe(args)
+        if checkpoint is not None:
+            checkpoint.set_universe(tickers)
+    if not tickers:
+        logger.info("Nessun ticker da scansionare.")
+        stop_signal_writer()
+        return
+
+    todo = checkpoint.remaining(tickers) if checkpoint is not None else tickers
+    global signal_checkpoint
+    signal_checkpoint = checkpoint
+    stats = run_scan(args, todo, checkpoint=checkpoint)
+    # Drain the writer first: rows it confirms mark their tickers persisted
+    stop_signal_writer()
+    signal_checkpoint = None
+    if checkpoint is not None:
+        checkpoint.finish()
+        # Totals over the whole universe, including tickers finished before the interruption
+        stats.update(checkpoint.totals(tickers))
+    write_metrics(args, stats, len(todo))
+    if args.shard is not None:
+        path = write_shard_summary(args.shard_dir, args.run_id, *args.shard, tickers, stats)
+        logger.info(f"🧩 Funnel dello shard salvato in {path}")
+    log_cycle(stats)
+    logger.info(f"✅ Completato. Segnali trovati: {stats['signals']}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,200 @@
+"""
+CRT Flow Scanner Metrics — per-stage latency histograms for scanner runs
+
+Every instrumented step (fetch, detect per timeframe, market_cap, persist)
+feeds a fixed-bucket latency histogram: an observation is one bisect and a
+few integer increments under a per-stage lock, and the slowest tickers are
+kept in a bounded heap, so collection is cheap enough to leave on. p50/p95/
+p99 are interpolated from the buckets.
+
+At the end of a run (each cycle in daemon mode) the scanner writes a JSON
+snapshot and a Prometheus text-format file, suitable for the node_exporter
+textfile collector.
+
+Usage:
+    python scanner.py --index us --metrics-file scanner_metrics.json --prom-file /var/lib/node_exporter/crt_scanner.prom
+"""
+from __future__ import annotations
+
+import bisect
+import heapq
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; log-spaced from 1 ms to 2 min
+BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+SLOWEST = 10
+
+
+class LatencyHistogram:
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS, slowest: int = SLOWEST):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)      # last slot: > buckets[-1]
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._slowest: list[tuple[float, str]] = []
+        self._keep = slowest
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, ticker: str | None = None, error: bool = False):
+        slot = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[slot] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            if error:
+                self.errors += 1
+            if ticker is not None:
+                if len(self._slowest) < self._keep:
+                    heapq.heappush(self._slowest, (seconds, ticker))
+                elif seconds > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, (seconds, ticker))
+
+    def quantile(self, q: float) -> float:
+        """Linear interpolation inside the bucket holding the q-th observation."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lo + (hi - lo) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "sum_s": round(self.total, 6),
+                "mean_s": round(self.total / self.count, 6) if self.count else 0.0,
+                "p50_s": round(self.quantile(0.50), 6),
+                "p95_s": round(self.quantile(0.95), 6),
+                "p99_s": round(self.quantile(0.99), 6),
+                "max_s": round(self.max, 6),
+                "slowest": [{"ticker": t, "seconds": round(s, 6)} for s, t in sorted(self._slowest, reverse=True)],
+            }
+
+
+class ScannerMetrics:
+    """
+    metrics.observe("fetch", 0.8, ticker="AAPL")
+    with metrics.timer("market_cap", ticker="AAPL"):
+        ...
+    metrics.write(json_path, prom_path, run={"elapsed_s": ..., "tickers": ...})
+    """
+
+    def __init__(self):
+        self._stages: dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self.started = time.time()
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        hist = self._stages.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self._stages.setdefault(stage, LatencyHistogram())
+        return hist
+
+    def observe(self, stage: str, seconds: float, ticker: str | None = None, error: bool = False):
+        self.histogram(stage).observe(seconds, ticker, error)
+
+    @contextmanager
+    def timer(self, stage: str, ticker: str | None = None):
+        t0 = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(stage, time.perf_counter() - t0, ticker, error=True)
+            raise
+        self.observe(stage, time.perf_counter() - t0, ticker)
+
+    # ── export ───────────────────────────────────────────────
+    def to_dict(self, run: dict | None = None) -> dict:
+        with self._lock:
+            stages = dict(self._stages)
+        return {
+            "started_at": self.started,
+            "run": run or {},
+            "stages": {name: hist.snapshot() for name, hist in sorted(stages.items())},
+        }
+
+    def prometheus_text(self, run: dict | None = None, prefix: str = "crt_scanner") -> str:
+        with self._lock:
+            stages = dict(self._stages)
+        lines = [
+            f"# HELP {prefix}_stage_seconds Latency of one scanner step for one ticker.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        errors = [
+            f"# HELP {prefix}_stage_errors_total Scanner steps that raised.",
+            f"# TYPE {prefix}_stage_errors_total counter",
+        ]
+        for name, hist in sorted(stages.items()):
+            with hist._lock:
+                counts, count, total, errs = list(hist.counts), hist.count, hist.total, hist.errors
+            cumulative = 0
+            for le, n in zip(hist.buckets, counts):
+                cumulative += n
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {count}')
+            errors.append(f'{prefix}_stage_errors_total{{stage="{name}"}} {errs}')
+        lines += errors
+
+        run = run or {}
+        for key in ("elapsed_s", "tickers", "tickers_per_s", "signals"):
+            if key in run:
+                lines.append(f"# TYPE {prefix}_run_{key} gauge")
+                lines.append(f"{prefix}_run_{key} {run[key]}")
+        for stage, n in (run.get("funnel") or {}).items():
+            lines.append(f'{prefix}_run_funnel{{stage="{stage}"}} {n}')
+        lines.append(f"{prefix}_run_timestamp_seconds {time.time():.0f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path: str | None = None, prom_path: str | None = None, run: dict | None = None):
+        if json_path:
+            _atomic_write(json_path, json.dumps(self.to_dict(run), indent=2))
+        if prom_path:
+            _atomic_write(prom_path, self.prometheus_text(run))
+
+
+def _atomic_write(path: str, text: str):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+
+
+def run_summary(stats: dict, tickers: int) -> dict:
+    """Run-level numbers for the metrics files from a scan cycle's stats."""
+    elapsed = stats.get("elapsed_s") or 0.0
+    return {
+        "elapsed_s": elapsed,
+        "tickers": tickers,
+        "tickers_per_s": round(tickers / elapsed, 3) if elapsed else 0.0,
+        "signals": stats.get("signals", 0),
+        "funnel": stats.get("funnel", {}),
+    }
+
+
+METRICS = ScannerMetrics()
@@ -0,0 +1,226 @@
+"""
+Short-interest time-series store with an as-of index.
+
+Short-interest files (CSV/JSON with symbol, as_of_date, short_float_pct,
+days_to_cover) are ingested incrementally into one sorted columnar file per
+symbol (<root>/<SYMBOL>.npz). A manifest records which files were ingested so
+re-running an ingest only touches new or changed files. Lookups binary-search
+the per-symbol as_of array, so they stay O(log n) however much history is
+loaded.
+
+Usage:
+    python si_store.py ingest --root si_store/ short_interest_2024.csv short_interest_2025.csv
+    python si_store.py lookup --root si_store/ --symbol AAPL --date 2024-07-01
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+SI_COLUMNS = ["symbol", "as_of_date", "short_float_pct", "days_to_cover"]
+MANIFEST = "manifest.json"
+
+_EMPTY = (np.empty(0, dtype=np.int64), np.empty(0), np.empty(0))
+
+
+def read_si_file(path: str) -> pd.DataFrame:
+    """Parse a CSV/JSON short-interest file into a normalized frame sorted by (symbol, as_of_date)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        df = pd.read_csv(path)
+    elif ext == ".json":
+        df = pd.read_json(path)
+    else:
+        raise ValueError("Short-interest file must be CSV or JSON")
+    required = set(SI_COLUMNS)
+    if not required.issubset(set(df.columns)):
+        raise ValueError(f"Short-interest file missing columns: {required}")
+    df["symbol"] = df["symbol"].astype(str).str.upper()
+    df["as_of_date"] = pd.to_datetime(df["as_of_date"], utc=True, errors="coerce")
+    df = df.dropna(subset=["as_of_date"]).sort_values(["symbol", "as_of_date"])
+    return df
+
+
+def _merge(old: tuple, new: tuple) -> tuple:
+    """Concatenate two (as_of, short_float, dtc) series; on equal dates the newer row wins."""
+    as_of = np.concatenate([old[0], new[0]])
+    short_float = np.concatenate([old[1], new[1]])
+    dtc = np.concatenate([old[2], new[2]])
+    order = np.argsort(as_of, kind="stable")
+    as_of, short_float, dtc = as_of[order], short_float[order], dtc[order]
+    keep = np.r_[as_of[1:] != as_of[:-1], True] if len(as_of) else np.empty(0, dtype=bool)
+    return as_of[keep], short_float[keep], dtc[keep]
+
+
+class ShortInterestStore:
+    """
+    Per-symbol sorted (as_of ns, short_float_pct, days_to_cover) arrays.
+    With a root directory the arrays are persisted and loaded lazily per symbol;
+    without one (from_frame) the store lives in memory only.
+    """
+
+    def __init__(self, root: str | None = None):
+        self.root = root
+        self._series: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._manifest: dict = {"files": {}, "symbols": {}}
+        self._lock = threading.Lock()
+        if root:
+            os.makedirs(root, exist_ok=True)
+            path = os.path.join(root, MANIFEST)
+            if os.path.isfile(path):
+                with open(path) as fh:
+                    self._manifest = json.load(fh)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ShortInterestStore":
+        store = cls()
+        store._add_frame(df)
+        return store
+
+    # ── ingestion ────────────────────────────────────────────
+    def ingest(self, path: str, force: bool = False) -> int:
+        """
+        Merge a short-interest file into the store. Files already ingested with
+        the same size and mtime are skipped unless force=True. Returns the number
+        of rows read (0 when skipped).
+        """
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        fingerprint = {"size": stat.st_size, "mtime": stat.st_mtime}
+        seen = self._manifest["files"].get(key)
+        if not force and seen and {k: seen.get(k) for k in fingerprint} == fingerprint:
+            return 0
+
+        df = read_si_file(path)
+        self._add_frame(df)
+        self._manifest["files"][key] = {**fingerprint, "rows": len(df)}
+        self._save_manifest()
+        return len(df)
+
+    def _add_frame(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        as_of = pd.DatetimeIndex(df["as_of_date"]).tz_convert("UTC").asi8
+        short_float = pd.to_numeric(df["short_float_pct"], errors="coerce").to_numpy(dtype=float)
+        dtc = pd.to_numeric(df["days_to_cover"], errors="coerce").to_numpy(dtype=float)
+        symbols = df["symbol"].astype(str).str.upper().to_numpy()
+
+        order = np.argsort(symbols, kind="stable")
+        symbols = symbols[order]
+        bounds = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1], True])
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            rows = order[lo:hi]
+            symbol = str(symbols[lo])
+            with self._lock:
+                merged = _merge(self._load(symbol), (as_of[rows], short_float[rows], dtc[rows]))
+                self._series[symbol] = merged
+                if self.root:
+                    self._write(symbol, merged)
+                    self._manifest["symbols"][symbol] = len(merged[0])
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.root, symbol.replace(os.sep, "_") + ".npz")
+
+    def _write(self, symbol: str, series: tuple):
+        path = self._path(symbol)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            np.savez(fh, as_of=series[0], short_float_pct=series[1], days_to_cover=series[2])
+        os.replace(tmp, path)
+
+    def _save_manifest(self):
+        if not self.root:
+            return
+        path = os.path.join(self.root, MANIFEST)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump(self._manifest, fh, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+
+    def _load(self, symbol: str) -> tuple:
+        """Series for a symbol (caller holds the lock); loaded from disk on first use."""
+        series = self._series.get(symbol)
+        if series is None:
+            series = _EMPTY
+            if self.root and symbol in self._manifest["symbols"]:
+                with np.load(self._path(symbol)) as data:
+                    series = (data["as_of"], data["short_float_pct"], data["days_to_cover"])
+            self._series[symbol] = series
+        return series
+
+    # ── lookups ──────────────────────────────────────────────
+    @property
+    def empty(self) -> bool:
+        return not (self._manifest["symbols"] or any(len(s[0]) for s in self._series.values()))
+
+    def symbols(self) -> list[str]:
+        return sorted(set(self._manifest["symbols"]) | {s for s, v in self._series.items() if len(v[0])})
+
+    def asof_batch(self, symbol: str, timestamps) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Latest (short_float_pct, days_to_cover) with as_of_date <= each timestamp.
+        Returns two float arrays aligned with timestamps; NaN where nothing is known.
+        """
+        ts = pd.DatetimeIndex(timestamps)
+        ts_ns = (ts.tz_convert("UTC") if ts.tz is not None else ts.tz_localize("UTC")).asi8
+        with self._lock:
+            as_of, short_float, dtc = self._load(symbol.upper())
+        out_sf = np.full(len(ts_ns), np.nan)
+        out_dtc = np.full(len(ts_ns), np.nan)
+        pos = np.searchsorted(as_of, ts_ns, side="right") - 1
+        hit = pos >= 0
+        out_sf[hit] = short_float[pos[hit]]
+        out_dtc[hit] = dtc[pos[hit]]
+        return out_sf, out_dtc
+
+    def asof(self, symbol: str, ts: pd.Timestamp) -> dict:
+        """Single lookup in the resolve_si_row format (None for missing values)."""
+        short_float, dtc = self.asof_batch(symbol, [ts])
+        return {
+            "short_float_pct": float(short_float[0]) if not np.isnan(short_float[0]) else None,
+            "days_to_cover": float(dtc[0]) if not np.isnan(dtc[0]) else None,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Short-interest as-of store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ing = sub.add_parser("ingest", help="Merge CSV/JSON short-interest files into the store")
+    ing.add_argument("files", nargs="+")
+    ing.add_argument("--root", type=str, default="si_store")
+    ing.add_argument("--force", action="store_true", help="Re-ingest files already in the manifest")
+
+    look = sub.add_parser("lookup", help="As-of lookup for one symbol and date")
+    look.add_argument("--root", type=str, default="si_store")
+    look.add_argument("--symbol", type=str, required=True)
+    look.add_argument("--date", type=str, required=True)
+    args = parser.parse_args()
+
+    store = ShortInterestStore(args.root)
+    if args.command == "ingest":
+        for path in args.files:
+            rows = store.ingest(path, force=args.force)
+            print(f"  {path}: {rows} rows" if rows else f"  {path}: unchanged, skipped")
+        print(f"[*] {len(store.symbols())} symbol(s) in {args.root}")
+        return
+
+    print(store.asof(args.symbol, pd.Timestamp(args.date, tz="UTC")))
+
+
+if __name__ == "__main__":
+    main()
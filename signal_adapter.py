@@ -3,10 +3,24 @@ from __future__ import annotations
 from typing import Any
 
 
+def _crt_type(signal: dict[str, Any]) -> str:
+    return "bullish_wick_3c" if signal.get("direction", "BULLISH") == "BULLISH" else "bearish_wick_3c"
+
+
+def signal_key(signal: dict[str, Any], ticker: str) -> str:
+    """
+    Deterministic idempotency key: symbol|timeframe|type|C3 time. The same C3
+    bar seen by overlapping or repeated runs always maps to the same key.
+    """
+    c3_time = next(
+        (c.get("time") for c in signal.get("pattern_candles", []) if c.get("index") == "C3"),
+        signal.get("timestamp"),
+    )
+    return f"{ticker}|{signal.get('timeframe', '15M')}|{_crt_type(signal)}|{c3_time}"
+
+
 def signal_to_crt_row(signal: dict[str, Any], ticker: str) -> dict[str, Any]:
     """Map 3C SMC pattern to crt_signals row shape."""
-    direction = signal.get("direction", "BULLISH")
-    is_bullish = direction == "BULLISH"
     entry = float(signal.get("entry_price") or 0)
     sl = float(signal.get("stop_loss") or 0)
     tp = float(signal.get("take_profit") or 0)
@@ -19,7 +33,7 @@ def signal_to_crt_row(signal: dict[str, Any], ticker: str) -> dict[str, Any]:
     return {
         "symbol": ticker,
         "timeframe": signal.get("timeframe", "15M"),
-        "type": "bullish_wick_3c" if is_bullish else "bearish_wick_3c",
+        "type": _crt_type(signal),
         "subtype": "3C SMC",
         "price": round(entry, 2) if entry else None,
         "entry_price": round(entry, 2) if entry else None,
@@ -31,4 +45,5 @@ def signal_to_crt_row(signal: dict[str, Any], ticker: str) -> dict[str, Any]:
         "status": "pending",
         "is_active": True,
         "result": None,
+        "signal_key": signal_key(signal, ticker),
     }
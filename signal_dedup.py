@@ -0,0 +1,95 @@
+"""
+Signal de-duplication across scanner runs.
+
+Every detected pattern gets a deterministic key (signal_adapter.signal_key).
+SignalDeduper answers "was this signal already persisted?" from a local
+seen-set first — kept in an append-only file so reruns and overlapping cron
+jobs on the same host share it — and asks crt_signals only about keys the
+local set does not know, in one `in_` query per call. Keys whose C3 bar is
+older than `retention_days` are pruned when the file is loaded.
+
+The database remains the source of truth: rows are upserted on the unique
+signal_key with ignore_duplicates, so two runs racing on the same bar still
+produce one row (migrations/add_crt_signals_signal_key.sql).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION_DAYS = 30
+
+
+def _key_time(key: str) -> float | None:
+    try:
+        return float(key.rsplit("|", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+class SignalDeduper:
+    def __init__(self, path: str | None = None, client=None, table: str = "crt_signals",
+                 retention_days: int = DEFAULT_RETENTION_DAYS):
+        self.path = path
+        self.client = client
+        self.table = table
+        self.retention_days = retention_days
+        self.seen: set[str] = set()
+        self.db_lookups = 0
+        self._db_available = client is not None
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def _load(self):
+        if not os.path.isfile(self.path):
+            return
+        cutoff = time.time() - self.retention_days * 86400
+        with open(self.path, encoding="utf-8") as fh:
+            keys = [line.strip() for line in fh if line.strip()]
+        fresh = [k for k in keys if (_key_time(k) or cutoff) >= cutoff]
+        self.seen.update(fresh)
+        if len(fresh) < len(keys):
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.writelines(k + "\n" for k in sorted(set(fresh)))
+            os.replace(tmp, self.path)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self.seen
+
+    def mark(self, keys: list[str]):
+        """Record keys as persisted (locally and in the seen-file)."""
+        with self._lock:
+            new = [k for k in dict.fromkeys(keys) if k not in self.seen]
+            self.seen.update(new)
+            if new and self.path:
+                with open(self.path, "a", encoding="utf-8") as fh:
+                    fh.writelines(k + "\n" for k in new)
+
+    def _known_in_db(self, keys: list[str]) -> set[str]:
+        if not self._db_available or not keys:
+            return set()
+        try:
+            self.db_lookups += 1
+            res = self.client.table(self.table).select("signal_key").in_("signal_key", keys).execute()
+            return {r["signal_key"] for r in res.data or []}
+        except Exception as e:
+            # Column not migrated yet or transient error: fall back to the local set only
+            logger.warning(f"{self.table}: signal_key lookup failed, using the local seen-set only ({e})")
+            self._db_available = False
+            return set()
+
+    def filter_new(self, keys: list[str]) -> list[str]:
+        """Keys not persisted yet, in input order. Keys found in the database are remembered locally."""
+        with self._lock:
+            unknown = [k for k in dict.fromkeys(keys) if k not in self.seen]
+        in_db = self._known_in_db(unknown)
+        if in_db:
+            self.mark(list(in_db))
+        return [k for k in unknown if k not in in_db]
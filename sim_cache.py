@@ -0,0 +1,266 @@
+"""
+Persistent result cache for backtester.simulate.
+
+simulate() is a pure function of the daily bars, the 1H bars and the
+ScannerParams, so its trades (and their compute_stats summary) are stored
+under a key hashing exactly those inputs:
+
+  - the OHLC values and timestamps of both frames (other columns such as
+    Volume or Dividends do not affect the simulation)
+  - every ScannerParams field
+  - the source of backtester.py, so editing the engine invalidates everything
+
+Entries are JSON files under <root>/<key[:2]>/<key>.json. A hit refreshes the
+file's mtime; once the directory grows past max_bytes the least recently
+used entries are deleted. Writes are atomic (tmp + rename), so several
+processes can share one cache directory. A bounded in-memory LRU sits in
+front of the files for repeat lookups within a run.
+
+Usage:
+    cache = SimulationCache("sim_cache")
+    trades, stats = cache.evaluate("AAPL", daily_df, hourly_df, ScannerParams())
+
+    python sim_cache.py info --root sim_cache
+    python sim_cache.py clear --root sim_cache
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+
+from trade_log import SIMULATE_COLUMNS, TradeLog
+
+DEFAULT_ROOT = "sim_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MEMORY_ENTRIES = 512
+OHLC = ["Open", "High", "Low", "Close"]
+
+_ENGINE_VERSION: str | None = None
+
+
+def engine_version() -> str:
+    """Hash of backtester.py; part of every key."""
+    global _ENGINE_VERSION
+    if _ENGINE_VERSION is None:
+        import backtester
+        with open(backtester.__file__, "rb") as fh:
+            _ENGINE_VERSION = hashlib.blake2b(fh.read(), digest_size=8).hexdigest()
+    return _ENGINE_VERSION
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of a bar frame's timestamps (with tz) and OHLC values."""
+    h = hashlib.blake2b(digest_size=16)
+    index = pd.DatetimeIndex(df.index)
+    h.update(str(index.tz).encode())
+    h.update(np.ascontiguousarray(index.asi8).tobytes())
+    h.update(np.ascontiguousarray(df[OHLC].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+
+def cache_key(daily_df: pd.DataFrame, hourly_df: pd.DataFrame, params) -> str:
+    payload = json.dumps({
+        "engine": engine_version(),
+        "daily": frame_fingerprint(daily_df),
+        "hourly": frame_fingerprint(hourly_df),
+        "params": asdict(params),
+    }, sort_keys=True)
+    return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+
+class SimulationCache:
+    """
+    cache = SimulationCache(root, max_bytes=256 MiB)
+    trades, stats = cache.evaluate(ticker, daily_df, hourly_df, params)   # simulate + compute_stats
+    cache.hits, cache.misses
+
+    root=None keeps the cache in memory only (one process, one run).
+    """
+
+    def __init__(self, root: str | None = DEFAULT_ROOT, max_bytes: int = DEFAULT_MAX_BYTES,
+                 memory_entries: int = DEFAULT_MEMORY_ENTRIES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes: int | None = None
+        if root:
+            os.makedirs(root, exist_ok=True)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_memory"] = OrderedDict()
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        # A copy in a worker process reports only its own lookups (see add_counters)
+        self.hits = self.misses = self.evicted = 0
+
+    def counters(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evicted": self.evicted}
+
+    def add_counters(self, counters: dict):
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+            self._disk_bytes = None
+
+    # ── storage ──────────────────────────────────────────────
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + ".json")
+
+    def _remember(self, key: str, entry: dict):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> dict | None:
+        """Cached {"trades": {column: values}, "stats": ...} or None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+        if not self.root:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as fh:
+                entry = json.load(fh)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, trades: TradeLog, stats: dict | None):
+        arrays = trades.arrays()
+        entry = {"trades": {c: arrays[c].tolist() for c in trades.columns}, "stats": stats}
+        self._remember(key, entry)
+        if not self.root:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(entry, fh)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += os.path.getsize(path)
+        if self.disk_bytes() > self.max_bytes:
+            self.evict()
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        """(mtime, size, path) of every entry on disk."""
+        out = []
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".json"):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    out.append((st.st_mtime, st.st_size, path))
+        return out
+
+    def disk_bytes(self) -> int:
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._entries()) if self.root else 0
+            return self._disk_bytes
+
+    def evict(self, target_bytes: int | None = None) -> int:
+        """Delete least recently used entries until the directory is under target_bytes (default max_bytes)."""
+        if not self.root:
+            return 0
+        target = self.max_bytes if target_bytes is None else target_bytes
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self._disk_bytes = total
+            self.evicted += removed
+        return removed
+
+    # ── simulate ─────────────────────────────────────────────
+    def evaluate(self, ticker: str, daily_df: pd.DataFrame, hourly_df: pd.DataFrame,
+                 params) -> tuple[TradeLog, dict | None]:
+        """simulate() + compute_stats(), served from the cache when the inputs were seen before."""
+        from backtester import compute_stats, simulate
+
+        key = cache_key(daily_df, hourly_df, params)
+        entry = self.get(key)
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+            columns = entry["trades"]
+            trades = TradeLog(columns=columns.keys() or SIMULATE_COLUMNS)
+            # Keyed on the data, not the symbol: stamp the caller's ticker
+            trades.extend({c: v for c, v in columns.items() if c != "ticker"}, ticker=ticker)
+            return trades, entry["stats"]
+
+        with self._lock:
+            self.misses += 1
+        trades = simulate(ticker, daily_df, hourly_df, params)
+        stats = compute_stats(trades)
+        self.put(key, trades, stats)
+        return trades, stats
+
+    def simulate(self, ticker: str, daily_df: pd.DataFrame, hourly_df: pd.DataFrame, params) -> TradeLog:
+        return self.evaluate(ticker, daily_df, hourly_df, params)[0]
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = f" ({self.hits / total:.0%} hit)" if total else ""
+        return f"sim cache: {self.hits} hit / {self.misses} miss{rate}, {self.disk_bytes() / 1e6:.1f} MB on disk"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CRT Flow simulate() result cache")
+    parser.add_argument("command", choices=["info", "clear", "trim"])
+    parser.add_argument("--root", type=str, default=DEFAULT_ROOT)
+    parser.add_argument("--max-mb", type=float, default=DEFAULT_MAX_BYTES / 1024 / 1024,
+                        help="Size limit applied by trim")
+    args = parser.parse_args()
+
+    cache = SimulationCache(args.root, max_bytes=int(args.max_mb * 1024 * 1024))
+    if args.command == "info":
+        entries = cache._entries()
+        print(f"{args.root}: {len(entries)} entries, {sum(s for _, s, _ in entries) / 1e6:.1f} MB "
+              f"(engine {engine_version()})")
+    elif args.command == "clear":
+        print(f"Removed {cache.evict(0)} entries from {args.root}")
+    else:
+        print(f"Removed {cache.evict()} entries; {cache.disk_bytes() / 1e6:.1f} MB left")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,19 @@
 import argparse
+import concurrent.futures
 import os
 from dataclasses import asdict
 from datetime import timezone
 
+import numpy as np
 import pandas as pd
 import yfinance as yf
 from dotenv import load_dotenv
 from supabase import create_client
 
-from backtester import ScannerParams, compute_htf_pools, find_reclaim
+from backtester import ScannerParams, compute_htf_pools_history, find_reclaims_batch
+from profiling import add_profile_args, start_profiling
+from si_store import SI_COLUMNS, ShortInterestStore, read_si_file
+from supabase_writer import BufferedWriter
 
 
 def setup_supabase():
@@ -23,21 +28,18 @@ def setup_supabase():
 
 def load_si_data(path: str) -> pd.DataFrame:
     if not path:
-        return pd.DataFrame(columns=["symbol", "as_of_date", "short_float_pct", "days_to_cover"])
-    ext = os.path.splitext(path)[1].lower()
-    if ext == ".csv":
-        df = pd.read_csv(path)
-    elif ext == ".json":
-        df = pd.read_json(path)
-    else:
-        raise ValueError("Short-interest file must be CSV or JSON")
-    required = {"symbol", "as_of_date", "short_float_pct", "days_to_cover"}
-    if not required.issubset(set(df.columns)):
-        raise ValueError(f"Short-interest file missing columns: {required}")
-    df["symbol"] = df["symbol"].astype(str).str.upper()
-    df["as_of_date"] = pd.to_datetime(df["as_of_date"], utc=True, errors="coerce")
-    df = df.dropna(subset=["as_of_date"]).sort_values(["symbol", "as_of_date"])
-    return df
+        return pd.DataFrame(columns=SI_COLUMNS)
+    return read_si_file(path)
+
+
+def load_si_store(si_file: str | None, si_store: str | None) -> ShortInterestStore:
+    """Persistent store at si_store (ingesting si_file if new), else an in-memory store of si_file."""
+    if si_store:
+        store = ShortInterestStore(si_store)
+        if si_file:
+            store.ingest(si_file)
+        return store
+    return ShortInterestStore.from_frame(load_si_data(si_file))
 
 
 def resolve_si_row(si_df: pd.DataFrame, symbol: str, ts: pd.Timestamp) -> dict:
@@ -67,6 +69,13 @@ def score_squeeze(short_float_pct, days_to_cover, rvol) -> float:
     return round((si_score * 0.45 + dtc_score * 0.35 + rvol_score * 0.20) * 100.0, 2)
 
 
+def score_squeeze_batch(short_float_pct: np.ndarray, days_to_cover: np.ndarray, rvol: np.ndarray) -> np.ndarray:
+    si_score = np.clip(np.nan_to_num(short_float_pct) / 35.0, 0.0, 1.0)
+    dtc_score = np.clip(np.nan_to_num(days_to_cover) / 10.0, 0.0, 1.0)
+    rvol_score = np.clip(np.nan_to_num(rvol) / 3.0, 0.0, 1.0)
+    return np.round((si_score * 0.45 + dtc_score * 0.35 + rvol_score * 0.20) * 100.0, 2)
+
+
 def classify_event(signal: dict | None, score: float) -> tuple[str, bool]:
     if signal and score >= 55:
         return "ACTIVE_SQUEEZE", True
@@ -100,92 +109,220 @@ def fetch_latest_params(supabase) -> ScannerParams:
         return ScannerParams()
 
 
-def upsert_signal(supabase, payload: dict, dry_run: bool):
-    if dry_run:
-        return
-    supabase.table("squeeze_signals").upsert(payload, on_conflict="symbol,timestamp,event_type").execute()
+SQUEEZE_CONFLICT = "symbol,timestamp,event_type"
 
 
-def run_symbol(
-    supabase,
-    symbol: str,
-    params: ScannerParams,
-    mode: str,
-    start: str | None,
-    end: str | None,
-    si_df: pd.DataFrame,
-    rvol_period: int,
-    min_rvol: float,
-    dry_run: bool,
-):
+def make_writer(supabase, dry_run: bool, chunk_size: int = 500, flush_interval: float = 5.0) -> BufferedWriter:
+    return BufferedWriter(supabase, "squeeze_signals", on_conflict=SQUEEZE_CONFLICT,
+                          chunk_size=chunk_size, flush_interval=flush_interval, dry_run=dry_run)
+
+
+def write_events(writer: BufferedWriter, payloads: list[dict]) -> int:
+    writer.extend(payloads)
+    return len(payloads)
+
+
+def fetch_symbol_history(symbol: str, start: str | None, end: str | None) -> tuple[pd.DataFrame, pd.DataFrame]:
     ticker = yf.Ticker(symbol)
     daily = ticker.history(period="5y", interval="1d").dropna()
     hourly = ticker.history(period="730d", interval="1h").dropna()
     if daily.empty or hourly.empty:
-        return 0
+        return pd.DataFrame(), pd.DataFrame()
     daily.index = pd.to_datetime(daily.index, utc=True)
     hourly.index = pd.to_datetime(hourly.index, utc=True)
     if start:
         daily = daily[daily.index >= pd.Timestamp(start, tz=timezone.utc)]
     if end:
         daily = daily[daily.index <= pd.Timestamp(end, tz=timezone.utc)]
-    if len(daily) < 40:
-        return 0
+    return daily, hourly
+
+
+EVENT_COLUMNS = [
+    "symbol", "timestamp", "event_type", "direction", "liquidity_tier", "entry_price", "stop_loss",
+    "take_profit", "rr_ratio", "short_float_pct", "days_to_cover", "rvol", "squeeze_score",
+    "is_active_squeeze", "hit_target_10d", "max_gain_10d_pct", "reclaim_candle_time",
+]
 
-    daily["rvol"] = daily["Volume"] / daily["Volume"].rolling(rvol_period).mean()
-
-    rows = 0
-    scan_indices = [len(daily) - 1] if mode == "scan" else list(range(30, len(daily)))
-    for i in scan_indices:
-        daily_slice = daily.iloc[: i + 1]
-        pools = compute_htf_pools(daily_slice, params.wall_wick_pct, params.fuel_wick_pct)
-        if not pools:
-            continue
-        day_ts = daily_slice.index[-1]
-        current_price = float(daily_slice.iloc[-1]["Close"])
-        prior_1h = hourly[hourly.index <= day_ts].tail(25)
-        if len(prior_1h) < 5:
-            continue
-
-        signal = find_reclaim(pools, prior_1h, current_price, params)
-        si_row = resolve_si_row(si_df, symbol, day_ts)
-        rvol = float(daily_slice.iloc[-1]["rvol"]) if pd.notna(daily_slice.iloc[-1]["rvol"]) else 0.0
-        score = score_squeeze(si_row["short_float_pct"], si_row["days_to_cover"], rvol)
-        event_type, is_active = classify_event(signal, score)
-
-        if signal and event_type == "HISTORICAL_FAILURE":
-            event_type = "HISTORICAL_SUCCESS"
-
-        if rvol < min_rvol and event_type == "ACTIVE_SQUEEZE":
-            event_type = "SETUP"
-            is_active = False
-
-        payload = {
-            "symbol": symbol,
-            "timestamp": day_ts.isoformat(),
-            "event_type": event_type,
-            "direction": signal["direction"] if signal else "bullish",
-            "liquidity_tier": signal["tier"] if signal else None,
-            "entry_price": signal["entry"] if signal else None,
-            "stop_loss": signal["stop"] if signal else None,
-            "take_profit": signal["target"] if signal else None,
-            "rr_ratio": signal["rr"] if signal else None,
-            "short_float_pct": si_row["short_float_pct"],
-            "days_to_cover": si_row["days_to_cover"],
-            "rvol": round(rvol, 3) if pd.notna(rvol) else None,
-            "squeeze_score": score,
-            "is_active_squeeze": is_active,
-            "hit_target_10d": None,
-            "max_gain_10d_pct": None,
-            "meta": {
-                "mode": mode,
-                "params": asdict(params),
-                "reclaim_candle_time": signal.get("reclaim_candle_time") if signal else None,
-            },
+
+def build_event_table(
+    symbol: str,
+    daily: pd.DataFrame,
+    hourly: pd.DataFrame,
+    params: ScannerParams,
+    si: ShortInterestStore | pd.DataFrame,
+    rvol_period: int,
+    min_rvol: float,
+    mode: str,
+) -> pd.DataFrame:
+    """
+    Every event row for one symbol as a single table: one row per evaluated day
+    (the last day in scan mode, day 30 onward in backfill mode) that has HTF
+    pools and at least 5 prior 1H candles. Pools, reclaims, rvol, the as-of SI
+    join, scores and classification are computed over all days at once.
+    """
+    if len(daily) < 40 or hourly.empty:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+
+    levels, tps, ready = compute_htf_pools_history(daily, params.wall_wick_pct, params.fuel_wick_pct)
+    hourly_end = np.searchsorted(hourly.index.asi8, daily.index.asi8, side="right")
+    close = daily["Close"].to_numpy(dtype=float)
+    volume = daily["Volume"].astype(float)
+    rvol_all = (volume / volume.rolling(rvol_period).mean()).to_numpy()
+
+    days = np.arange(len(daily) - 1, len(daily)) if mode == "scan" else np.arange(30, len(daily))
+    days = days[ready[days] & (np.minimum(hourly_end[days], 25) >= 5)]
+    if not len(days):
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+
+    signals = find_reclaims_batch(levels[days], tps[days], close[days], hourly, hourly_end[days], params)
+    has_signal = np.array([s is not None for s in signals])
+
+    day_ts = daily.index[days]
+    if isinstance(si, pd.DataFrame):
+        si = ShortInterestStore.from_frame(si)
+    short_float, dtc = si.asof_batch(symbol, day_ts)
+    rvol = np.nan_to_num(rvol_all[days])
+    score = score_squeeze_batch(short_float, dtc, rvol)
+
+    is_active = has_signal & (score >= 55)
+    event_type = np.where(has_signal, "SETUP", "HISTORICAL_FAILURE").astype(object)
+    event_type[is_active] = "ACTIVE_SQUEEZE"
+    demoted = is_active & (rvol < min_rvol)
+    event_type[demoted] = "SETUP"
+    is_active &= ~demoted
+
+    def signal_field(key, default=None):
+        return [s[key] if s else default for s in signals]
+
+    return pd.DataFrame({
+        "symbol": symbol,
+        "timestamp": [ts.isoformat() for ts in day_ts],
+        "event_type": event_type,
+        "direction": signal_field("direction", "bullish"),
+        "liquidity_tier": signal_field("tier"),
+        "entry_price": signal_field("entry"),
+        "stop_loss": signal_field("stop"),
+        "take_profit": signal_field("target"),
+        "rr_ratio": signal_field("rr"),
+        "short_float_pct": short_float,
+        "days_to_cover": dtc,
+        "rvol": np.round(rvol, 3),
+        "squeeze_score": score,
+        "is_active_squeeze": is_active,
+        "hit_target_10d": None,
+        "max_gain_10d_pct": None,
+        "reclaim_candle_time": signal_field("reclaim_candle_time"),
+    }, columns=EVENT_COLUMNS)
+
+
+def event_payloads(table: pd.DataFrame, mode: str, params: ScannerParams) -> list[dict]:
+    """squeeze_signals payloads for an event table (NaN → None, candle time moved into meta)."""
+    params_dict = asdict(params)
+    records = table.astype(object).where(table.notna(), None).to_dict("records")
+    payloads = []
+    for rec in records:
+        rec["meta"] = {
+            "mode": mode,
+            "params": params_dict,
+            "reclaim_candle_time": rec.pop("reclaim_candle_time"),
         }
-        upsert_signal(supabase, payload, dry_run=dry_run)
-        rows += 1
-    return rows
+        payloads.append(rec)
+    return payloads
+
+
+def run_symbol(
+    writer: BufferedWriter,
+    symbol: str,
+    params: ScannerParams,
+    mode: str,
+    start: str | None,
+    end: str | None,
+    si: ShortInterestStore | pd.DataFrame,
+    rvol_period: int,
+    min_rvol: float,
+):
+    daily, hourly = fetch_symbol_history(symbol, start, end)
+    table = build_event_table(symbol, daily, hourly, params, si, rvol_period, min_rvol, mode)
+    if table.empty:
+        return 0
+    return write_events(writer, event_payloads(table, mode, params))
+
+
+# Per-process state for the compute pool, set once by _init_compute_worker
+_WORKER: dict = {}
+
+
+def _init_compute_worker(params: ScannerParams, si: ShortInterestStore, mode: str,
+                         rvol_period: int, min_rvol: float):
+    _WORKER.update(params=params, si=si, mode=mode, rvol_period=rvol_period, min_rvol=min_rvol)
+
+
+def _compute_symbol_payloads(symbol: str, daily: pd.DataFrame, hourly: pd.DataFrame) -> list[dict]:
+    w = _WORKER
+    table = build_event_table(symbol, daily, hourly, w["params"], w["si"], w["rvol_period"], w["min_rvol"], w["mode"])
+    return event_payloads(table, w["mode"], w["params"]) if not table.empty else []
+
+
+def run_symbols_parallel(
+    writer: BufferedWriter,
+    symbols: list[str],
+    params: ScannerParams,
+    mode: str,
+    start: str | None,
+    end: str | None,
+    si: ShortInterestStore,
+    rvol_period: int,
+    min_rvol: float,
+    workers: int,
+    fetch=fetch_symbol_history,
+) -> dict[str, int | Exception]:
+    """
+    Overlap downloads with computation: fetches run on a thread pool (at most
+    2 * workers symbols in flight), pools/reclaims/scores on a process pool whose
+    workers receive params and the SI store once at start-up. Payloads come back
+    to this process and go through the shared writer. Returns rows per symbol,
+    or the exception that symbol raised.
+    """
+    results: dict[str, int | Exception] = {}
+    pending = list(reversed(symbols))
+    max_fetching = 2 * workers
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as io_pool, \
+            concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_compute_worker,
+                initargs=(params, si, mode, rvol_period, min_rvol)) as cpu_pool:
+        fetching: dict = {}
+        computing: dict = {}
+
+        def refill():
+            while pending and len(fetching) + len(computing) < max_fetching:
+                symbol = pending.pop()
+                fetching[io_pool.submit(fetch, symbol, start, end)] = symbol
+
+        refill()
+        while fetching or computing:
+            done, _ = concurrent.futures.wait(list(fetching) + list(computing),
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            for fut in done:
+                if fut in fetching:
+                    symbol = fetching.pop(fut)
+                    try:
+                        daily, hourly = fut.result()
+                        computing[cpu_pool.submit(_compute_symbol_payloads, symbol, daily, hourly)] = symbol
+                    except Exception as exc:
+                        results[symbol] = exc
+                        print(f"[{symbol}] error: {exc}")
+                else:
+                    symbol = computing.pop(fut)
+                    try:
+                        results[symbol] = write_events(writer, fut.result())
+                        print(f"[{symbol}] processed rows: {results[symbol]}")
+                    except Exception as exc:
+                        results[symbol] = exc
+                        print(f"[{symbol}] error: {exc}")
+            refill()
+
+    return results
 
 
 def parse_args():
@@ -195,37 +332,59 @@ def parse_args():
     parser.add_argument("--start", type=str, default=None)
     parser.add_argument("--end", type=str, default=None)
     parser.add_argument("--si-file", type=str, default="short_interest_sample.csv")
+    parser.add_argument("--si-store", type=str, default=None,
+                        help="Short-interest store directory (see si_store.py); --si-file is ingested into it")
     parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Rows per bulk upsert")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Fetch threads / compute processes (1 = sequential)")
+    parser.add_argument("--flush-interval", type=float, default=5.0,
+                        help="Seconds after which the next added row also flushes the partial chunk "
+                             "(checked on add; whatever is left is flushed at the end)")
+    add_profile_args(parser)
     return parser.parse_args()
 
 
 def main():
     args = parse_args()
+    start_profiling(args)
     supabase = setup_supabase()
     params = fetch_latest_params(supabase)
-    si_df = load_si_data(args.si_file) if args.si_file else pd.DataFrame()
+    si = load_si_store(args.si_file, args.si_store)
+    writer = make_writer(supabase, args.dry_run, args.chunk_size, args.flush_interval)
 
+    symbols = [s.upper() for s in args.symbols]
     total = 0
-    for symbol in [s.upper() for s in args.symbols]:
-        try:
-            inserted = run_symbol(
-                supabase=supabase,
-                symbol=symbol,
-                params=params,
-                mode=args.mode,
-                start=args.start,
-                end=args.end,
-                si_df=si_df,
-                rvol_period=20,
-                min_rvol=1.2,
-                dry_run=args.dry_run,
-            )
-            total += inserted
-            print(f"[{symbol}] processed rows: {inserted}")
-        except Exception as exc:
-            print(f"[{symbol}] error: {exc}")
-
+    if args.workers > 1:
+        results = run_symbols_parallel(
+            writer, symbols, params, args.mode, args.start, args.end, si,
+            rvol_period=20, min_rvol=1.2, workers=args.workers,
+        )
+        total = sum(r for r in results.values() if isinstance(r, int))
+    else:
+        for symbol in symbols:
+            try:
+                inserted = run_symbol(
+                    writer=writer,
+                    symbol=symbol,
+                    params=params,
+                    mode=args.mode,
+                    start=args.start,
+                    end=args.end,
+                    si=si,
+                    rvol_period=20,
+                    min_rvol=1.2,
+                )
+                total += inserted
+                print(f"[{symbol}] processed rows: {inserted}")
+            except Exception as exc:
+                print(f"[{symbol}] error: {exc}")
+
+    writer.close()
+    summary = writer.summary
     print(f"Done. Total rows processed: {total}")
+    print(f"Written: {summary.rows_written}  failed: {summary.rows_failed}  "
+          f"requests: {summary.requests}  retries: {summary.retries}")
     print("Note: for production SI ingestion, use licensed datasets; avoid scraping HTML pages that may violate ToS.")
 
 
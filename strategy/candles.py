@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Literal
 
+import numpy as np
 import pandas as pd
 
 EngulfingDirection = Literal["BULLISH", "BEARISH"]
@@ -56,6 +57,22 @@ def engulfing_at(df: pd.DataFrame, bar_index: int) -> EngulfingDirection | None:
     return None
 
 
+def engulfing_directions(df: pd.DataFrame) -> np.ndarray:
+    """Vectorized engulfing_at for every bar: 1 bullish, -1 bearish, 0 none (bar 0 is always 0)."""
+    out = np.zeros(0 if df is None else len(df), dtype=np.int8)
+    if df is None or len(df) < 2:
+        return out
+    o = df["Open"].to_numpy(dtype=float)
+    c = df["Close"].to_numpy(dtype=float)
+    green = c > o
+    red = c < o
+    bullish = red[:-1] & green[1:] & (o[1:] <= c[:-1]) & (c[1:] >= o[:-1])
+    bearish = green[:-1] & red[1:] & (o[1:] >= c[:-1]) & (c[1:] <= o[:-1])
+    out[1:][bullish] = 1
+    out[1:][bearish] = -1
+    return out
+
+
 def latest_engulfing(
     df: pd.DataFrame, lookback: int
 ) -> tuple[EngulfingDirection | None, int | None]:
@@ -13,6 +13,11 @@ TP_RR_RATIO = 2.0
 # Legacy — kept for ha_rsi_mtf.py (deprecated)
 RSI_PERIOD = 14
 
+# Legacy — kept for engulfing_mtf.py (deprecated)
+MIN_BARS_5M = 30
+HTF_ENGULF_LOOKBACK = 3
+ITF_ENGULF_LOOKBACK = 4
+
 YF_PERIOD_1H = "60d"
 YF_PERIOD_15M = "60d"
 LTF_INTERVAL = "15m"
@@ -3,9 +3,10 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import Literal
 
+import numpy as np
 import pandas as pd
 
-from strategy.candles import latest_engulfing, recent_engulfing
+from strategy.candles import engulfing_directions, latest_engulfing, recent_engulfing
 from strategy.config import (
     HTF_ENGULF_LOOKBACK,
     ITF_ENGULF_LOOKBACK,
@@ -14,6 +15,7 @@ from strategy.config import (
     MIN_BARS_1H,
     MIN_BARS_5M,
 )
+from strategy.funnel import closed_bar_positions, last_true_position
 
 FunnelStage = Literal[
     "no_data",
@@ -64,6 +66,62 @@ def evaluate_funnel(
     return "signal", htf_dir
 
 
+def evaluate_funnel_history(
+    df_4h: pd.DataFrame | None,
+    df_1h: pd.DataFrame | None,
+    df_ltf: pd.DataFrame | None,
+    *,
+    htf_lookback: int = HTF_ENGULF_LOOKBACK,
+    itf_lookback: int = ITF_ENGULF_LOOKBACK,
+) -> pd.DataFrame:
+    """
+    evaluate_funnel for every LTF bar in one vectorized pass.
+
+    Each LTF bar sees the 4H/1H bars closed by its own close (see
+    closed_bar_positions). Returns a frame indexed like df_ltf with
+    columns stage and direction (None when no 4H engulfing applies).
+    """
+    if df_ltf is None or df_ltf.empty:
+        return pd.DataFrame(columns=["stage", "direction"])
+
+    n = len(df_ltf)
+    stage = np.full(n, "no_data", dtype=object)
+    direction = np.full(n, None, dtype=object)
+    if df_4h is None or df_1h is None or df_4h.empty or df_1h.empty:
+        return pd.DataFrame({"stage": stage, "direction": direction}, index=df_ltf.index)
+
+    k = closed_bar_positions(df_4h.index, df_ltf.index)
+    j = closed_bar_positions(df_1h.index, df_ltf.index)
+    t = np.arange(n)
+    ready = (k + 1 >= MIN_BARS_4H) & (j + 1 >= MIN_BARS_1H) & (t + 1 >= MIN_BARS_5M)
+    k, j = np.maximum(k, 0), np.maximum(j, 0)
+
+    # 4H: most recent engulfing within the last htf_lookback bars
+    e_4h = engulfing_directions(df_4h)
+    last_4h = last_true_position(e_4h != 0)[k]
+    htf_dir = np.where(last_4h >= k + 1 - htf_lookback, e_4h[np.maximum(last_4h, 0)], 0)
+
+    # 1H: an engulfing in the 4H direction within the last itf_lookback bars
+    e_1h = engulfing_directions(df_1h)
+    last_bull_1h = last_true_position(e_1h == 1)[j]
+    last_bear_1h = last_true_position(e_1h == -1)[j]
+    last_aligned = np.where(htf_dir == 1, last_bull_1h, last_bear_1h)
+    itf_ok = last_aligned >= j + 1 - itf_lookback
+
+    # LTF: trigger only on the bar itself
+    ltf_ok = engulfing_directions(df_ltf) == htf_dir
+
+    stage[ready] = "no_4h_engulfing"
+    has_dir = ready & (htf_dir != 0)
+    stage[has_dir] = "no_1h_alignment"
+    stage[has_dir & itf_ok] = "no_ltf_trigger"
+    stage[has_dir & itf_ok & ltf_ok] = "signal"
+    direction[has_dir & (htf_dir == 1)] = "BULLISH"
+    direction[has_dir & (htf_dir == -1)] = "BEARISH"
+
+    return pd.DataFrame({"stage": stage, "direction": direction}, index=df_ltf.index)
+
+
 def evaluate_symbol(
     ticker: str,
     df_4h: pd.DataFrame,
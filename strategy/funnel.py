@@ -0,0 +1,48 @@
+"""Helpers for evaluating MTF funnels over every historical LTF bar."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+def _utc_ns(index: pd.Index) -> np.ndarray:
+    idx = pd.DatetimeIndex(index)
+    if idx.tz is not None:
+        idx = idx.tz_convert("UTC").tz_localize(None)
+    return idx.asi8
+
+
+def _bar_duration_ns(index: pd.Index) -> int:
+    ts = _utc_ns(index)
+    if len(ts) < 2:
+        return 0
+    return int(np.median(np.diff(ts)))
+
+
+def closed_bar_positions(frame_index: pd.Index, ltf_index: pd.Index) -> np.ndarray:
+    """
+    For each LTF bar, the position of the last frame bar already closed when that
+    LTF bar closes (-1 if none). Bar closes are start + median bar spacing, so an
+    HTF bar only becomes visible once complete — no lookahead into a forming bar.
+    """
+    frame_close = _utc_ns(frame_index) + _bar_duration_ns(frame_index)
+    ltf_close = _utc_ns(ltf_index) + _bar_duration_ns(ltf_index)
+    return np.searchsorted(frame_close, ltf_close, side="right") - 1
+
+
+def last_true_position(mask: np.ndarray) -> np.ndarray:
+    """Position of the most recent True at or before each index (-1 if none)."""
+    pos = np.where(mask, np.arange(len(mask)), -1)
+    return np.maximum.accumulate(pos) if len(pos) else pos
+
+
+def summarize_funnel(history: pd.DataFrame) -> dict:
+    """Stage counts and signal timestamps from an evaluate_funnel_history frame."""
+    counts = history["stage"].value_counts()
+    signals = history.index[history["stage"].to_numpy() == "signal"]
+    return {
+        "bars": int(len(history)),
+        "stage_counts": {str(k): int(v) for k, v in counts.items()},
+        "signals": [ts.isoformat() for ts in signals],
+    }
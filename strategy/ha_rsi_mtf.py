@@ -3,9 +3,11 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import Literal
 
+import numpy as np
 import pandas as pd
 
 from strategy.config import MIN_BARS_15M, MIN_BARS_1H, MIN_BARS_4H, RSI_PERIOD
+from strategy.funnel import closed_bar_positions
 from strategy.heikin_ashi import last_two_ha_green, to_heikin_ashi
 from strategy.indicators import compute_rsi
 
@@ -49,6 +51,21 @@ def assess_timeframe(df: pd.DataFrame) -> tuple[bool, float | None]:
     return ha_green and rsi_bullish, rsi_val
 
 
+def assess_timeframe_history(df: pd.DataFrame) -> np.ndarray:
+    """assess_timeframe's pass/fail for every bar of df, as if it were the latest."""
+    n = len(df)
+    if n < 2:
+        return np.zeros(n, dtype=bool)
+    ha = to_heikin_ashi(df)
+    green = (ha["Close"] > ha["Open"]).to_numpy()
+    rsi = compute_rsi(ha["Close"], RSI_PERIOD).round(1).to_numpy()
+    ok = np.zeros(n, dtype=bool)
+    ok[1:] = green[1:] & green[:-1]
+    ok &= rsi > 50
+    ok[: RSI_PERIOD + 1] = False
+    return ok
+
+
 def evaluate_funnel(
     df_4h: pd.DataFrame | None,
     df_1h: pd.DataFrame | None,
@@ -68,6 +85,42 @@ def evaluate_funnel(
     return "signal", None
 
 
+def evaluate_funnel_history(
+    df_4h: pd.DataFrame | None,
+    df_1h: pd.DataFrame | None,
+    df_15m: pd.DataFrame | None,
+) -> pd.DataFrame:
+    """
+    evaluate_funnel for every 15m bar in one vectorized pass.
+
+    Each 15m bar sees the 4H/1H bars closed by its own close (see
+    closed_bar_positions). Returns a frame indexed like df_15m with
+    columns stage and direction (always None for this strategy).
+    """
+    if df_15m is None or df_15m.empty:
+        return pd.DataFrame(columns=["stage", "direction"])
+
+    n = len(df_15m)
+    stage = np.full(n, "no_data", dtype=object)
+    direction = np.full(n, None, dtype=object)
+    if df_4h is None or df_1h is None or df_4h.empty or df_1h.empty:
+        return pd.DataFrame({"stage": stage, "direction": direction}, index=df_15m.index)
+
+    k = closed_bar_positions(df_4h.index, df_15m.index)
+    j = closed_bar_positions(df_1h.index, df_15m.index)
+    t = np.arange(n)
+    ready = (k + 1 >= MIN_BARS_4H) & (j + 1 >= MIN_BARS_1H) & (t + 1 >= MIN_BARS_15M)
+
+    ok_4h = assess_timeframe_history(df_4h)[np.maximum(k, 0)]
+    ok_1h = assess_timeframe_history(df_1h)[np.maximum(j, 0)]
+
+    stage[ready] = "no_4h_structure"
+    stage[ready & ok_4h] = "no_1h_alignment"
+    stage[ready & ok_4h & ok_1h] = "signal"
+
+    return pd.DataFrame({"stage": stage, "direction": direction}, index=df_15m.index)
+
+
 def evaluate_symbol(
     ticker: str,
     df_4h: pd.DataFrame,
@@ -11,11 +11,12 @@ def to_heikin_ashi(df: pd.DataFrame) -> pd.DataFrame:
     c = df["Close"].astype(float)
 
     ha_close = (o + h + low + c) / 4
-    ha_open = pd.Series(index=df.index, dtype=float)
-    ha_open.iloc[0] = (o.iloc[0] + c.iloc[0]) / 2
-
-    for i in range(1, len(df)):
-        ha_open.iloc[i] = (ha_open.iloc[i - 1] + ha_close.iloc[i - 1]) / 2
+    # ha_open[i] = (ha_open[i-1] + ha_close[i-1]) / 2 is an EMA with alpha=0.5
+    # seeded at (o[0] + c[0]) / 2 and fed the previous HA close.
+    seed = ha_close.shift(1)
+    if len(df):
+        seed.iloc[0] = (o.iloc[0] + c.iloc[0]) / 2
+    ha_open = seed.ewm(alpha=0.5, adjust=False).mean()
 
     ha_high = pd.concat([h, ha_open, ha_close], axis=1).max(axis=1)
     ha_low = pd.concat([low, ha_open, ha_close], axis=1).min(axis=1)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Literal
 
+import numpy as np
 import pandas as pd
 
 from strategy.candles import is_bearish, is_bullish, to_f
@@ -133,23 +134,69 @@ def _is_valid_bearish_block(df: pd.DataFrame, i: int, ema: pd.Series) -> bool:
     return True
 
 
+def compute_pattern_masks(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Boolean C3 masks (bullish, bearish) for every bar, in one vectorized pass.
+
+    Same rules as _is_valid_bullish_block / _is_valid_bearish_block evaluated at
+    each index i >= MIN_PATTERN_BARS - 1.
+    """
+    n = 0 if df is None else len(df)
+    bull = np.zeros(n, dtype=bool)
+    bear = np.zeros(n, dtype=bool)
+    if n < MIN_PATTERN_BARS:
+        return bull, bear
+
+    o = df["Open"].to_numpy(dtype=float)
+    h = df["High"].to_numpy(dtype=float)
+    low = df["Low"].to_numpy(dtype=float)
+    c = df["Close"].to_numpy(dtype=float)
+    vol = df["Volume"].to_numpy(dtype=float)
+    ema = _ema_close(df).to_numpy()
+
+    green = c > o
+    red = c < o
+    mid_inf = low + (np.minimum(o, c) - low) * 0.5
+    mid_sup = h - (h - np.maximum(o, c)) * 0.5
+    # Structure window [i-23, i-4] == rolling(20) ending at i-4, shifted to i
+    struct_low = pd.Series(low).rolling(STRUCTURE_LOOKBACK).min().shift(4).to_numpy()
+    struct_high = pd.Series(h).rolling(STRUCTURE_LOOKBACK).max().shift(4).to_numpy()
+
+    i = np.arange(MIN_PATTERN_BARS - 1, n)
+    c0, c1, c2 = i - 3, i - 2, i - 1
+    volume_ok = vol[i] > vol[c1]
+
+    bull[i] = (
+        red[c0]
+        & green[c1] & green[c2] & green[i]
+        & (low[c2] >= mid_inf[c1]) & (low[i] >= mid_inf[c2])
+        & (c[i] > ema[i])
+        & volume_ok
+        & (np.minimum(low[c0], low[c1]) < struct_low[i])
+    )
+    bear[i] = (
+        green[c0]
+        & red[c1] & red[c2] & red[i]
+        & (h[c2] <= mid_sup[c1]) & (h[i] <= mid_sup[c2])
+        & (c[i] < ema[i])
+        & volume_ok
+        & (np.maximum(h[c0], h[c1]) > struct_high[i])
+    )
+    bear &= ~bull
+    return bull, bear
+
+
 def compute_pattern_signals(df: pd.DataFrame) -> pd.Series:
     """smc_signal: 1 bullish block, -1 bearish block, 0 otherwise (only C1–C3 tagged)."""
     signals = pd.Series(0, index=df.index, dtype=int)
     if df is None or len(df) < MIN_PATTERN_BARS:
         return signals
 
-    ema = _ema_close(df)
-    for i in range(MIN_PATTERN_BARS - 1, len(df)):
-        if _is_valid_bullish_block(df, i, ema):
-            signals.iloc[i - 2] = 1
-            signals.iloc[i - 1] = 1
-            signals.iloc[i] = 1
-        elif _is_valid_bearish_block(df, i, ema):
-            signals.iloc[i - 2] = -1
-            signals.iloc[i - 1] = -1
-            signals.iloc[i] = -1
-
+    bull, bear = compute_pattern_masks(df)
+    values = np.zeros(len(df), dtype=int)
+    for offset in (2, 1, 0):
+        values[np.flatnonzero(bull) - offset] = 1
+        values[np.flatnonzero(bear) - offset] = -1
+    signals[:] = values
     return signals
 
 
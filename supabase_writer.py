@@ -0,0 +1,339 @@
+"""
+Buffered bulk writer for Supabase/PostgREST tables.
+
+Collects row payloads and flushes them as chunked bulk upserts (or inserts
+when no conflict key is given) instead of one HTTP request per row. With
+update_on the rows patch existing records instead (one UPDATE per row,
+filtered on those columns), for partial rows that must never insert. Rows
+sharing a conflict key within a chunk are collapsed (last write wins), since
+PostgREST rejects an upsert that touches the same row twice. Failed chunks
+are retried with exponential backoff; rows that still fail are kept in
+`failed` and counted in the summary.
+
+The table schema is learned once per run: columns known to be missing
+(from discover_columns or the first PGRST204 error) are dropped from every
+later row instead of failing row by row. BackgroundWriter feeds the same
+logic from a queue on a daemon thread so producers never wait on HTTP.
+on_written(rows) is called with each chunk once its write succeeded, so
+callers can act on confirmed rows only (queued is not written).
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+logger = logging.getLogger(__name__)
+
+
+_MISSING_COLUMN = re.compile(r"'([^']+)' column")
+
+
+def missing_column(exc: Exception) -> str | None:
+    """Column named by a PostgREST PGRST204 (unknown column in schema cache) error."""
+    err = str(exc)
+    if getattr(exc, "code", None) != "PGRST204" and "PGRST204" not in err and "schema cache" not in err:
+        return None
+    match = _MISSING_COLUMN.search(getattr(exc, "message", None) or err)
+    return match.group(1) if match else None
+
+
+def discover_columns(client, table: str) -> set[str] | None:
+    """Column names of a table from one sample row; None when the table is empty or unreadable."""
+    try:
+        res = client.table(table).select("*").limit(1).execute()
+    except Exception as e:
+        logger.warning(f"{table}: schema discovery failed ({e})")
+        return None
+    return set(res.data[0]) if res.data else None
+
+
+@dataclass
+class WriteSummary:
+    rows_written: int = 0
+    rows_failed: int = 0
+    duplicates_collapsed: int = 0
+    requests: int = 0
+    retries: int = 0
+    rows_unflushed: int = 0     # BackgroundWriter.close() timed out with these rows unconfirmed
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class BufferedWriter:
+    """
+    writer = BufferedWriter(supabase, "squeeze_signals", on_conflict="symbol,timestamp,event_type")
+    writer.add(payload)          # flushes on its own when a chunk fills or the interval elapses
+    writer.close()               # flushes the rest
+    writer.summary.rows_written
+
+    flush_interval is only checked inside add(): a partial chunk waits for the
+    next add() or close(), however long that takes. Use BackgroundWriter when
+    rows must reach the table on a timer.
+    """
+
+    def __init__(
+        self,
+        client,
+        table: str,
+        on_conflict: str | None = None,
+        chunk_size: int = 500,
+        flush_interval: float = 5.0,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        dry_run: bool = False,
+        columns: set[str] | None = None,
+        ignore_duplicates: bool = False,
+        observe=None,
+        on_written=None,
+        update_on: str | None = None,
+    ):
+        self.client = client
+        self.table = table
+        self.on_conflict = on_conflict
+        self.ignore_duplicates = ignore_duplicates
+        self.update_keys = [c.strip() for c in (update_on or "").split(",") if c.strip()]
+        self.conflict_keys = self.update_keys or [c.strip() for c in (on_conflict or "").split(",") if c.strip()]
+        self.chunk_size = max(1, chunk_size)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.dry_run = dry_run
+        self.columns = set(columns) if columns else None
+        self.dropped_columns: set[str] = set()
+        # observe(stage, seconds, ticker, error) gets the latency of every request as "write_<table>"
+        self.observe = observe
+        # on_written(rows) gets every chunk whose write succeeded, as the rows were added
+        self.on_written = on_written
+
+        self.summary = WriteSummary()
+        self.failed: list[dict] = []
+        self._buffer: list[dict] = []
+        self._lock = threading.RLock()
+        self._last_flush = time.monotonic()
+
+    def __enter__(self) -> "BufferedWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ── buffering ────────────────────────────────────────────
+    def add(self, payload: dict):
+        with self._lock:
+            self._buffer.append(payload)
+            if len(self._buffer) >= self.chunk_size or self._interval_elapsed():
+                self.flush()
+
+    def extend(self, payloads: list[dict]):
+        with self._lock:
+            for payload in payloads:
+                self.add(payload)
+
+    def _interval_elapsed(self) -> bool:
+        return self.flush_interval is not None and time.monotonic() - self._last_flush >= self.flush_interval
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            for lo in range(0, len(rows), self.chunk_size):
+                self._write_chunk(self._collapse(rows[lo:lo + self.chunk_size]))
+
+    def close(self):
+        self.flush()
+
+    # ── writing ──────────────────────────────────────────────
+    def _collapse(self, rows: list[dict]) -> list[dict]:
+        if not self.update_keys and (not self.conflict_keys or not self._upsert_available()):
+            return rows
+        by_key: dict[tuple, dict] = {}
+        for row in rows:
+            by_key[tuple(row.get(k) for k in self.conflict_keys)] = row
+        self.summary.duplicates_collapsed += len(rows) - len(by_key)
+        return list(by_key.values())
+
+    def _drop_columns(self, new: set[str]):
+        logger.warning(f"{self.table}: column(s) {sorted(new)} missing from the schema — "
+                       f"dropping them for the rest of the run (run migration + Reload schema)")
+        self.dropped_columns |= new
+
+    def _strip(self, rows: list[dict]) -> list[dict]:
+        if self.columns is not None:
+            unknown = {k for row in rows for k in row} - self.columns - self.dropped_columns
+            if unknown:
+                self._drop_columns(unknown)
+        if not self.dropped_columns:
+            return rows
+        return [{k: v for k, v in row.items() if k not in self.dropped_columns} for row in rows]
+
+    def _upsert_available(self) -> bool:
+        return bool(self.on_conflict) and not (set(self.conflict_keys) & self.dropped_columns)
+
+    def _send(self, rows: list[dict]):
+        if self.update_keys:
+            # A partial upsert would still be checked against NOT NULL columns as an insert
+            for i, row in enumerate(rows):
+                if i:
+                    self.summary.requests += 1
+                query = self.client.table(self.table).update(
+                    {k: v for k, v in row.items() if k not in self.update_keys}
+                )
+                for key in self.update_keys:
+                    query = query.eq(key, row[key])
+                query.execute()
+            return
+        query = self.client.table(self.table)
+        if self._upsert_available():
+            query = query.upsert(rows, on_conflict=self.on_conflict, ignore_duplicates=self.ignore_duplicates)
+        else:
+            query = query.insert(rows)
+        query.execute()
+
+    def _write_chunk(self, rows: list[dict]):
+        if not rows:
+            return
+        if self.dry_run:
+            self.summary.rows_written += len(rows)
+            self._written(rows)
+            return
+        added, rows = rows, self._strip(rows)
+        attempt = 0
+        while True:
+            t0 = time.perf_counter()
+            try:
+                self.summary.requests += 1
+                self._send(rows)
+            except Exception as e:
+                self._observe(t0, True)
+                column = missing_column(e)
+                if column and column not in self.dropped_columns:
+                    self._drop_columns({column})
+                    rows = self._strip(rows)
+                    continue
+                if getattr(e, "code", None) == "42P10" and self.on_conflict:
+                    # No unique constraint on the conflict key yet: plain inserts for the rest of the run
+                    logger.warning(f"{self.table}: no unique constraint on ({self.on_conflict}) — "
+                                   f"falling back to insert")
+                    self.on_conflict = None
+                    continue
+                if attempt == self.max_retries:
+                    logger.error(f"{self.table}: chunk of {len(rows)} rows failed after "
+                                 f"{self.max_retries} retries: {e}")
+                    self.summary.rows_failed += len(rows)
+                    self.failed.extend(rows)
+                    return
+                self.summary.retries += 1
+                time.sleep(self.backoff * (2 ** attempt))
+                attempt += 1
+            else:
+                self._observe(t0, False)
+                self.summary.rows_written += len(rows)
+                self._written(added)
+                return
+
+    def _written(self, rows: list[dict]):
+        if self.on_written is None:
+            return
+        try:
+            self.on_written(rows)
+        except Exception as e:
+            logger.error(f"{self.table}: on_written callback failed: {e}")
+
+    def _observe(self, started: float, error: bool):
+        if self.observe is not None:
+            self.observe(f"write_{self.table}", time.perf_counter() - started, None, error)
+
+
+_STOP = object()
+
+
+class BackgroundWriter(BufferedWriter):
+    """
+    BufferedWriter fed through a queue: add() only enqueues and a daemon thread
+    buffers, flushes on size or flush_interval, and does all HTTP. With
+    max_queue > 0 the queue is bounded and rows arriving while it is full are
+    dropped and counted in `dropped`. drain() flushes what is queued and waits
+    for it without stopping the thread. close() drains the queue and flushes;
+    when its timeout expires first, the rows not yet written or failed are
+    logged and counted in summary.rows_unflushed.
+    """
+
+    def __init__(self, *args, max_queue: int = 0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dropped = 0
+        self.accepted = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._drop_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=f"writer-{self.table}", daemon=True)
+        self._thread.start()
+
+    def add(self, payload: dict):
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+            return
+        with self._drop_lock:
+            self.accepted += 1
+
+    def extend(self, payloads: list[dict]):
+        for payload in payloads:
+            self.add(payload)
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def pending(self) -> int:
+        return self._queue.qsize() + super().pending()
+
+    def _run(self):
+        while True:
+            timeout = None
+            if self.flush_interval is not None:
+                timeout = max(0.0, self.flush_interval - (time.monotonic() - self._last_flush))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                break
+            if isinstance(item, threading.Event):
+                self.flush()
+                item.set()
+            elif item is not None:
+                super().add(item)
+            elif super().pending():
+                self.flush()
+            else:
+                self._last_flush = time.monotonic()
+        self.flush()
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """Flush everything queued so far and wait for it; False when the timeout expired first."""
+        if not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float | None = None):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        if self._thread.is_alive():
+            s = self.summary
+            left = max(0, self.accepted - s.rows_written - s.rows_failed - s.duplicates_collapsed)
+            s.rows_unflushed = left
+            logger.warning(f"{self.table}: writer still busy after {timeout}s — "
+                           f"{left} row(s) not confirmed at close")
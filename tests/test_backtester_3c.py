@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from backtester import compute_stats
+from backtester_3c import (
+    LOSS, OPEN, WIN, backtest_frame, build_pattern_trades, load_universe_file, resolve_outcomes,
+)
+from strategy.wick_retrace_3c import detect_latest_pattern
+from tests.test_wick_retrace_3c import _bar, _bullish_smc_bars, _bearish_smc_bars, _df_from_bars
+
+
+def _random_ohlcv(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = np.r_[100, close[:-1]] + rng.normal(0, 0.3, n)
+    high = np.maximum(open_, close) + rng.exponential(0.5, n)
+    low = np.minimum(open_, close) - rng.exponential(0.5, n)
+    volume = rng.integers(500, 2000, n).astype(float)
+    idx = pd.date_range("2024-01-01", periods=n, freq="1h")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=idx)
+
+
+def _resolve_loop(high, low, entry_bar, is_long, stop, target):
+    outcome, exit_bar = [], []
+    for e, long_, sl, tp in zip(entry_bar, is_long, stop, target):
+        res, ex = OPEN, -1
+        for j in range(e + 1, len(high)):
+            sl_hit = low[j] <= sl if long_ else high[j] >= sl
+            tp_hit = high[j] >= tp if long_ else low[j] <= tp
+            if sl_hit or tp_hit:
+                res, ex = (LOSS if sl_hit else WIN), j
+                break
+        outcome.append(res)
+        exit_bar.append(ex)
+    return np.array(outcome), np.array(exit_bar)
+
+
+def test_build_pattern_trades_matches_live_result():
+    for bars in (_bullish_smc_bars(), _bearish_smc_bars()):
+        df = _df_from_bars(bars)
+        live = detect_latest_pattern(df, "1H")
+        trades = build_pattern_trades(df)
+        assert len(trades) == 1
+        row = trades.iloc[0]
+        assert row["bar"] == len(df) - 1
+        assert row["direction"] == live["direction"]
+        assert row["entry"] == live["entry_price"]
+        assert row["stop"] == live["stop_loss"]
+        assert row["target"] == live["take_profit"]
+
+
+def test_resolve_outcomes_matches_bar_by_bar_loop():
+    df = _random_ohlcv(2000, seed=3)
+    high, low = df["High"].to_numpy(), df["Low"].to_numpy()
+    rng = np.random.default_rng(7)
+    entry_bar = np.sort(rng.integers(0, len(df), 300))
+    is_long = rng.random(300) > 0.5
+    close = df["Close"].to_numpy()[entry_bar]
+    dist = rng.uniform(0.5, 15, 300)
+    stop = np.where(is_long, close - dist, close + dist)
+    target = np.where(is_long, close + 2 * dist, close - 2 * dist)
+
+    outcome, exit_bar = resolve_outcomes(high, low, entry_bar, is_long, stop, target, block=16)
+    ref_outcome, ref_exit = _resolve_loop(high, low, entry_bar, is_long, stop, target)
+    assert (outcome == ref_outcome).all()
+    assert (exit_bar == ref_exit).all()
+
+
+def test_backtest_frame_win_and_stats_format():
+    bars = _bullish_smc_bars()
+    # target = 103 + 2 * risk; walk price up until it prints
+    bars += [_bar(103 + k, 104.5 + k, 102.8 + k, 104 + k, 1000) for k in range(30)]
+    df = _df_from_bars(bars)
+
+    trades = list(backtest_frame("TEST", df, "1H"))
+    assert len(trades) == 1
+    assert trades[0]["result"] == "WIN"
+    assert trades[0]["tier"] == "1H"
+
+    stats = compute_stats(trades)
+    assert stats["total"] == 1
+    assert stats["tier_stats"] == {"1H": {"win": 1, "loss": 0}}
+
+
+def test_load_universe_file_skips_comments(tmp_path):
+    path = tmp_path / "tickers.txt"
+    path.write_text("# universe\naapl\n\n  # note\n  msft \n", encoding="utf-8")
+    assert load_universe_file(str(path)) == ["AAPL", "MSFT"]
@@ -0,0 +1,57 @@
+import copy
+
+import pandas as pd
+
+from backtester import ScannerParams, compute_htf_pools, find_reclaim
+from benchmarks.__main__ import main as bench_main
+from benchmarks.runner import compare, run_suite, save
+from benchmarks.synthetic import make_daily_hourly, make_intraday
+from strategy.candles import engulfing_directions
+from strategy.wick_retrace_3c import compute_pattern_signals, detect_latest_pattern
+
+
+def test_generator_is_seeded_and_plants_detectable_patterns():
+    df, planted = make_intraday(1500, seed=3)
+    again, _ = make_intraday(1500, seed=3)
+    pd.testing.assert_frame_equal(df, again)
+
+    signals = compute_pattern_signals(df).to_numpy()
+    assert planted["3c_bullish"] and all(signals[i] == 1 for i in planted["3c_bullish"])
+    assert planted["3c_bearish"] and all(signals[i] == -1 for i in planted["3c_bearish"])
+    assert detect_latest_pattern(df.iloc[:planted["3c_bearish"][-1] + 1], "15M")["direction"] == "BEARISH"
+    assert all(engulfing_directions(df)[i] != 0 for i in planted["engulfing"])
+
+
+def _pdh_reclaims(daily, hourly) -> int:
+    params = ScannerParams()
+    found = 0
+    for i in range(30, len(daily)):
+        window = daily.iloc[:i]
+        pools = compute_htf_pools(window, params.wall_wick_pct, params.fuel_wick_pct)
+        hw = hourly[hourly.index < window.index[-1] + pd.Timedelta(days=1)].tail(25)
+        signal = find_reclaim(pools, hw, float(window["Close"].iat[-1]), params)
+        found += signal is not None and signal["tier"] == "PDH"
+    return found
+
+
+def test_planted_reclaims_are_found():
+    planted = _pdh_reclaims(*make_daily_hourly(100, seed=0, reclaim_every=5))
+    baseline = _pdh_reclaims(*make_daily_hourly(100, seed=0, reclaim_every=10**6))
+    assert planted >= 10 > baseline
+
+
+def test_run_and_compare(tmp_path):
+    report = run_suite(["compute_rsi", "latest_engulfing"], {"compute_rsi": (300,), "latest_engulfing": (300,)},
+                       repeat=2, min_time=0.001)
+    assert [(r["case"], r["size"]) for r in report["results"]] == [("compute_rsi", 300), ("latest_engulfing", 300)]
+    assert all(r["median_s"] > 0 for r in report["results"])
+
+    slower = copy.deepcopy(report)
+    slower["results"][0]["median_s"] *= 2
+    statuses = {r["case"]: r["status"] for r in compare(report, slower, threshold=0.15)}
+    assert statuses == {"compute_rsi": "regression", "latest_engulfing": "ok"}
+
+    save(report, str(tmp_path / "base.json"))
+    save(slower, str(tmp_path / "cur.json"))
+    assert bench_main(["compare", str(tmp_path / "base.json"), str(tmp_path / "base.json")]) == 0
+    assert bench_main(["compare", str(tmp_path / "base.json"), str(tmp_path / "cur.json")]) == 1
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester import ScannerParams, compute_htf_pools, find_reclaim
+
+
+def _find_reclaim_reference(pools: dict, hourly_window: pd.DataFrame, current_price: float, params: ScannerParams) -> dict | None:
+    """
+    Scans a 1H window (last 24 candles) for a valid reclaim of any HTF wall.
+    Returns a signal dict or None.
+    Mirrors the FASE 3 (ENTRY) block in update_signal_lifecycle().
+    """
+    levels = []
+    for code, l_type, score in [
+        ("PMH", "bearish", "A+++"), ("PML", "bullish", "A+++"),
+        ("PWH", "bearish", "A++"),  ("PWL", "bullish", "A++"),
+        ("PDH", "bearish", "A+"),   ("PDL", "bullish", "A+"),
+    ]:
+        if not pools.get(f"{code}_WALL"):
+            continue
+        lv_val = pools.get(code)
+        if lv_val is None:
+            continue
+        levels.append((code, l_type, score, lv_val))
+
+    for code, l_type, d_score, lv_val in levels:
+        lookback_window = hourly_window.iloc[-min(24, len(hourly_window) - 1):-1]
+        if lookback_window.empty:
+            continue
+
+        for i in range(len(lookback_window) - 1, -1, -1):
+            c = lookback_window.iloc[i]
+            c_o, c_c = float(c["Open"]), float(c["Close"])
+            c_h, c_l = float(c["High"]), float(c["Low"])
+
+            # Reclaim bearish
+            if l_type == "bearish" and c_h > lv_val and c_c < lv_val and c_c < c_o:
+                pass
+            # Reclaim bullish
+            elif l_type == "bullish" and c_l < lv_val and c_c > lv_val and c_c > c_o:
+                pass
+            else:
+                continue
+
+            # Displacement check
+            c_body = abs(c_c - c_o)
+            prev_slice = lookback_window.iloc[max(0, i - 10):i]
+            avg_body = (prev_slice["Close"] - prev_slice["Open"]).abs().mean() if not prev_slice.empty else 0.001
+            avg_body = avg_body or 0.001
+
+            has_displacement = c_body > avg_body * params.displacement_mult
+            if l_type == "bearish":
+                has_displacement = has_displacement and (c_h - max(c_o, c_c) < c_body * params.opposite_wick_tol)
+            else:
+                has_displacement = has_displacement and (min(c_o, c_c) - c_l < c_body * params.opposite_wick_tol)
+
+            if not has_displacement:
+                continue
+
+            # Proximity filter
+            if l_type == "bullish" and current_price > lv_val * (1 + params.proximity_filter_pct):
+                continue
+            if l_type == "bearish" and current_price < lv_val * (1 - params.proximity_filter_pct):
+                continue
+
+            entry = lv_val
+            sl = (c_h * (1 + params.sl_buffer_pct)) if l_type == "bearish" else (c_l * (1 - params.sl_buffer_pct))
+            wall_candle = pools.get(f"{code}_CANDLE", {})
+            tp = wall_candle.get("l") if l_type == "bearish" else wall_candle.get("h")
+            if tp is None:
+                continue
+
+            # Sanity checks
+            if l_type == "bullish" and current_price <= sl:
+                continue
+            if l_type == "bearish" and current_price >= sl:
+                continue
+            if l_type == "bearish" and current_price <= tp:
+                continue
+            if l_type == "bullish" and current_price >= tp:
+                continue
+
+            sl_dist = abs(entry - sl)
+            tp_dist = abs(entry - tp)
+            if sl_dist == 0 or tp_dist == 0:
+                continue
+
+            return {
+                "direction": l_type,
+                "tier": code,
+                "diamond_score": d_score,
+                "entry": entry,
+                "stop": sl,
+                "target": tp,
+                "rr": round(tp_dist / sl_dist, 2),
+                "reclaim_candle_time": str(c.name),
+            }
+
+    return None
+
+
+def _synthetic_history(seed: int, days: int = 200) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Random-walk 1H bars (7 per session) with clean-wall daily candles planted."""
+    rng = np.random.default_rng(seed)
+    sessions = pd.bdate_range("2022-01-03", periods=days)
+    idx = pd.DatetimeIndex(
+        [d + pd.Timedelta(hours=14 + k, minutes=30) for d in sessions for k in range(7)], tz="UTC"
+    )
+    n = len(idx)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.006, n)))
+    open_ = np.r_[100, close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.exponential(0.002, n))
+    low = np.minimum(open_, close) * (1 - rng.exponential(0.002, n))
+    for d in range(days):
+        s, e = d * 7, d * 7 + 7
+        if rng.random() < 0.4 and close[e - 1] < open_[s]:
+            open_[s] = high[s] = high[s:e].max()
+        elif rng.random() < 0.4 and close[e - 1] > open_[s]:
+            open_[s] = low[s] = low[s:e].min()
+    hourly = pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": 1e5}, index=idx
+    )
+    agg = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    return hourly.resample("1D").agg(agg).dropna(), hourly
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        ScannerParams(),
+        ScannerParams(wall_wick_pct=0.002, fuel_wick_pct=0.2, displacement_mult=0.8,
+                      opposite_wick_tol=0.5, proximity_filter_pct=0.05),
+    ],
+)
+def test_find_reclaim_matches_reference_loop(params):
+    found = 0
+    for seed in range(2):
+        daily, hourly = _synthetic_history(seed)
+        for i in range(30, len(daily)):
+            window = daily.iloc[:i]
+            pools = compute_htf_pools(window, params.wall_wick_pct, params.fuel_wick_pct)
+            current_price = float(window.iloc[-1]["Close"])
+            prior_1h = hourly[hourly.index <= window.index[-1]].tail(25)
+            for hw in (prior_1h, prior_1h.tail(6), prior_1h.tail(2)):
+                expected = _find_reclaim_reference(pools, hw, current_price, params)
+                assert find_reclaim(pools, hw, current_price, params) == expected
+                found += expected is not None
+    assert found > 0
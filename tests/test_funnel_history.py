@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from strategy import engulfing_mtf, ha_rsi_mtf
+from strategy.funnel import closed_bar_positions, summarize_funnel
+
+
+def _mtf_frames(seed: int, n: int = 3000):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.3, n))
+    open_ = np.r_[100, close[:-1]] + rng.normal(0, 0.2, n)
+    idx = pd.date_range("2024-01-01", periods=n, freq="15min", tz="America/New_York")
+    df_15m = pd.DataFrame(
+        {
+            "Open": open_,
+            "High": np.maximum(open_, close) + 0.1,
+            "Low": np.minimum(open_, close) - 0.1,
+            "Close": close,
+            "Volume": 1000.0,
+        },
+        index=idx,
+    )
+    agg = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+    return df_15m.resample("4h").agg(agg).dropna(), df_15m.resample("1h").agg(agg).dropna(), df_15m
+
+
+@pytest.mark.parametrize("module", [engulfing_mtf, ha_rsi_mtf])
+def test_funnel_history_matches_latest_bar_funnel(module):
+    df_4h, df_1h, df_15m = _mtf_frames(seed=0)
+    history = module.evaluate_funnel_history(df_4h, df_1h, df_15m)
+    k = closed_bar_positions(df_4h.index, df_15m.index)
+    j = closed_bar_positions(df_1h.index, df_15m.index)
+
+    for t in range(0, len(df_15m), 11):
+        stage, direction = module.evaluate_funnel(
+            df_4h.iloc[: k[t] + 1], df_1h.iloc[: j[t] + 1], df_15m.iloc[: t + 1]
+        )
+        assert history["stage"].iloc[t] == stage
+        assert history["direction"].iloc[t] == direction
+
+
+def test_closed_bar_positions_hide_forming_bar():
+    df_4h, _, df_15m = _mtf_frames(seed=1, n=64)
+    k = closed_bar_positions(df_4h.index, df_15m.index)
+    # 15m bars 0..14 close inside the first 4H bar; bar 15 closes it
+    assert (k[:15] == -1).all()
+    assert k[15] == 0
+
+
+def test_summarize_funnel_counts_and_signals():
+    df_4h, df_1h, df_15m = _mtf_frames(seed=2)
+    history = engulfing_mtf.evaluate_funnel_history(df_4h, df_1h, df_15m, itf_lookback=8)
+    summary = summarize_funnel(history)
+    assert summary["bars"] == len(df_15m)
+    assert sum(summary["stage_counts"].values()) == len(df_15m)
+    assert len(summary["signals"]) == summary["stage_counts"].get("signal", 0)
@@ -0,0 +1,106 @@
+import pickle
+
+import pandas as pd
+import pytest
+
+import optimizer_agent
+from backtester import ScannerParams, compute_stats, simulate
+from benchmarks.synthetic import make_daily_hourly
+from incremental_sim import IncrementalSimStore, warmup_slices
+
+PARAMS = ScannerParams(proximity_filter_pct=0.015)
+
+
+@pytest.fixture(scope="module")
+def bars():
+    return make_daily_hourly(260, seed=3)
+
+
+def _until(bars, n):
+    """The first n sessions, as a download on the day of session n would return them."""
+    daily, hourly = bars
+    daily = daily.iloc[:n]
+    return daily, hourly[hourly.index < daily.index[-1] + pd.Timedelta(days=1)]
+
+
+def test_start_day_matches_full_run_on_warmup_slice(bars):
+    daily, hourly = bars
+    full = simulate("AAA", daily, hourly, PARAMS).to_frame()
+    start = pd.Timestamp(full["day"].iloc[len(full) // 2]).date()
+
+    part = simulate("AAA", *warmup_slices(daily, hourly, start), PARAMS, start_day=start).to_frame()
+    expected = full[full["day"] >= str(start)].reset_index(drop=True)
+    pd.testing.assert_frame_equal(part, expected)
+
+
+def test_weekly_runs_equal_full_simulation(tmp_path, bars):
+    store = IncrementalSimStore(str(tmp_path))
+    for n in (220, 225, 240, 260):
+        daily, hourly = _until(bars, n)
+        trades, stats = store.evaluate("AAA", daily, hourly, PARAMS)
+        expected = simulate("AAA", daily, hourly, PARAMS)
+        pd.testing.assert_frame_equal(trades.to_frame(), expected.to_frame())
+        assert stats == compute_stats(expected)
+
+    assert (store.full, store.incremental) == (1, 3)
+    assert store.days_simulated < store.days_total / 2
+
+
+def test_open_trade_resolved_by_later_bars(tmp_path, bars):
+    store = IncrementalSimStore(str(tmp_path))
+    for n in range(200, 260):
+        first, _ = store.evaluate("AAA", *_until(bars, n), PARAMS)
+        if "OPEN" in first.to_frame()["result"].tolist():
+            break
+    else:
+        pytest.skip("no trade left OPEN at a cut-off")
+
+    resumed = store.incremental
+    later = _until(bars, 260)
+    trades, _ = store.evaluate("AAA", *later, PARAMS)
+    assert store.incremental == resumed + 1
+    pd.testing.assert_frame_equal(trades.to_frame(), simulate("AAA", *later, PARAMS).to_frame())
+
+
+def test_adjusted_history_is_resimulated(tmp_path, bars):
+    store = IncrementalSimStore(str(tmp_path))
+    store.evaluate("AAA", *_until(bars, 240), PARAMS)
+
+    daily, hourly = _until(bars, 250)
+    # A dividend re-adjustment rescales every bar, including the warm-up region
+    daily, hourly = daily.copy(), hourly.copy()
+    cols = ["Open", "High", "Low", "Close"]
+    daily[cols] *= 0.99
+    hourly[cols] *= 0.99
+    trades, _ = store.evaluate("AAA", daily, hourly, PARAMS)
+    assert (store.full, store.incremental) == (2, 0)
+    pd.testing.assert_frame_equal(trades.to_frame(), simulate("AAA", daily, hourly, PARAMS).to_frame())
+
+
+def test_history_dropping_out_of_window_is_kept(tmp_path, bars):
+    store = IncrementalSimStore(str(tmp_path))
+    store.evaluate("AAA", *_until(bars, 240), PARAMS)
+
+    # The next download starts 40 sessions later (rolling period)
+    daily, hourly = _until(bars, 260)
+    daily = daily.iloc[40:]
+    hourly = hourly[hourly.index >= daily.index[0]]
+    trades, _ = store.evaluate("AAA", daily, hourly, PARAMS)
+
+    assert store.incremental == 1
+    pd.testing.assert_frame_equal(trades.to_frame(), simulate("AAA", *_until(bars, 260), PARAMS).to_frame())
+
+
+def test_store_in_parallel_grid(tmp_path, monkeypatch):
+    monkeypatch.setattr(optimizer_agent, "DEFAULT_GRID_PARAMS", ["displacement_mult", "proximity_filter_pct"])
+    store = IncrementalSimStore(str(tmp_path))
+    assert pickle.loads(pickle.dumps(store)).counters() == store.counters()
+
+    def fetch(ticker):
+        return make_daily_hourly(70, seed=sum(map(ord, ticker)) % 7)
+
+    tickers = ["AAA", "BBB", "CCC"]
+    first, _ = optimizer_agent.run_grid_search_on_tickers(tickers, sim_cache=store, workers=2, fetch=fetch)
+    again, _ = optimizer_agent.run_grid_search_on_tickers(tickers, sim_cache=store, workers=2, fetch=fetch)
+    assert first == again
+    assert store.full == 12 and store.incremental == 12
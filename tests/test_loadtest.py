@@ -0,0 +1,50 @@
+import pytest
+from postgrest.exceptions import APIError
+from supabase import create_client
+
+from loadtest import SyntheticMarket, run_load, universe
+from local_supabase import LocalSupabase, PostgrestServer
+from supabase_writer import missing_column
+
+
+def test_postgrest_server_speaks_to_the_real_client():
+    db = LocalSupabase(schema={"crt_signals": {"signal_key", "symbol", "score"}})
+    with PostgrestServer(db) as server:
+        client = create_client(server.url, "local-key")
+        table = lambda: client.table("crt_signals")
+        rows = [{"signal_key": "AAPL|15M|BULLISH|2024-01-02T15:00:00", "symbol": "AAPL", "score": 1},
+                {"signal_key": "MSFT|1H|BEARISH|2024-01-02T15:00:00", "symbol": "MSFT", "score": 2}]
+        assert len(table().upsert(rows, on_conflict="signal_key", ignore_duplicates=True).execute().data) == 2
+        assert table().upsert(rows[0], on_conflict="signal_key", ignore_duplicates=True).execute().data == []
+
+        keys = table().select("signal_key").in_("signal_key", [rows[0]["signal_key"], "nope"]).execute().data
+        assert keys == [{"signal_key": rows[0]["signal_key"]}]
+        assert [r["symbol"] for r in table().select("*").gte("score", 2).execute().data] == ["MSFT"]
+        assert [r["symbol"] for r in table().select("*").order("score", desc=True).limit(1).execute().data] == ["MSFT"]
+
+        with pytest.raises(APIError) as err:
+            table().insert({"signal_key": "x", "unknown": 1}).execute()
+        assert missing_column(err.value) == "unknown"
+        assert len(db.rows("crt_signals")) == 2
+
+
+def test_run_load_persists_every_signal_through_http():
+    market = SyntheticMarket.generated(count=8, signal_rate=0.5, seed=1)
+    report = run_load(universe(40), market, workers=4)
+
+    assert report["tickers"] == 40 and report["mode"] == "threads"
+    assert report["signals"] > 0
+    assert report["rows"]["crt_signals"] == report["signals"] == report["crt_signals"]["rows_written"]
+    assert report["rows"]["system_logs"] > 0
+    assert report["stages"]["fetch"]["count"] == 40
+    assert report["peak_rss_mb"] > 0
+
+    # Same universe, same templates: deterministic signal count
+    assert run_load(universe(40), market, workers=2)["signals"] == report["signals"]
+
+
+def test_fetch_errors_surface_as_no_data():
+    market = SyntheticMarket.generated(count=4, seed=0, error_rate=1.0)
+    report = run_load(universe(10), market, workers=2)
+    assert report["fetch_errors"] == 10
+    assert report["funnel"]["no_data"] == 10 and report["signals"] == 0
@@ -0,0 +1,56 @@
+import logging
+import time
+
+from local_supabase import LocalSupabase
+from scanner import SupabaseLoggingHandler
+
+
+def _logger(handler: logging.Handler, name: str) -> logging.Logger:
+    log = logging.getLogger(name)
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    log.handlers = [handler]
+    return log
+
+
+def test_emit_does_not_wait_on_inserts():
+    db = LocalSupabase(latency=0.05)
+    handler = SupabaseLoggingHandler(db, chunk_size=100, flush_interval=60.0)
+    log = _logger(handler, "test.sb.batched")
+
+    t0 = time.perf_counter()
+    for i in range(500):
+        log.info(f"scan step {i}")
+    assert time.perf_counter() - t0 < 0.5
+
+    handler.close()
+    assert len(db.rows("system_logs")) == 500
+    assert db.requests["system_logs"] == 5
+    assert handler.stats()["written"] == 500
+
+
+def test_sampling_keeps_warnings_and_counts_drops():
+    db = LocalSupabase()
+    handler = SupabaseLoggingHandler(db, flush_interval=60.0, sample_rates={logging.INFO: 0.0})
+    log = _logger(handler, "test.sb.sampled")
+    for i in range(50):
+        log.info(f"info {i}")
+        log.warning(f"warn {i}")
+    log.info("system_logs insert failed")
+    handler.close()
+
+    assert [r["level"] for r in db.rows("system_logs")] == ["WARNING"] * 50
+    assert handler.stats()["sampled_out"] == 51
+
+
+def test_bounded_queue_drops_are_counted():
+    db = LocalSupabase(latency=0.05)
+    handler = SupabaseLoggingHandler(db, chunk_size=1, flush_interval=None, max_queue=10)
+    log = _logger(handler, "test.sb.bounded")
+    for i in range(200):
+        log.error(f"err {i}")
+    handler.close()
+
+    stats = handler.stats()
+    assert stats["dropped_queue_full"] > 0
+    assert stats["written"] + stats["dropped_queue_full"] == 200
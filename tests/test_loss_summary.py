@@ -0,0 +1,79 @@
+import os
+import random
+import re
+import sqlite3
+from collections import Counter
+
+from supabase import create_client
+
+from local_supabase import LocalSupabase, PostgrestServer
+from optimizer_agent import LOSS_LIMIT, analyze_loss_patterns, fetch_loss_summary
+
+MIGRATION = os.path.join(os.path.dirname(__file__), "..", "migrations", "create_crt_loss_summary.sql")
+COLUMNS = ["symbol", "type", "timeframe", "entry_price", "stop_loss", "exit_reason", "closed_at", "result",
+           "liquidity_tier"]
+
+
+def sqlite_loss_summary(client: LocalSupabase, params: dict) -> list[dict]:
+    """crt_loss_summary's SQL body from the migration, run on SQLite over the local crt_signals rows."""
+    with open(MIGRATION, encoding="utf-8") as fh:
+        body = re.search(r"AS \$\$(.*?)\$\$;", fh.read(), re.S).group(1)
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA case_sensitive_like = ON")      # Postgres LIKE is case-sensitive
+    conn.execute(f"CREATE TABLE crt_signals ({', '.join(COLUMNS)})")
+    conn.executemany(f"INSERT INTO crt_signals VALUES ({', '.join('?' * len(COLUMNS))})",
+                     [[r.get(c) for c in COLUMNS] for r in client.rows("crt_signals")])
+    rows = conn.execute(re.sub(r"\btop_n\b", ":top_n", body), {"top_n": params.get("top_n", 5)})
+    return [dict(r) for r in rows]
+
+
+def _rows(n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        entry = rng.choice([100.0, 250.0, 0.0, None])
+        rows.append({
+            "symbol": rng.choice(["AAPL", "NVDA", "MSFT", "TSLA", "AMD", "META", "AMZN", None]),
+            "type": rng.choice(["bearish_reclaim", "bullish_reclaim", "Bearish", None]),
+            "timeframe": rng.choice(["15M", "1H", "4H", None]),
+            "entry_price": entry,
+            "stop_loss": None if entry is None else round(entry * rng.uniform(0.97, 1.03), 2),
+            "exit_reason": rng.choice(["SL hit", "SL hit (wick)", "Time stop", "", None]),
+            "closed_at": f"2025-01-01T{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+            "result": rng.choice(["LOSS", "LOSS", "WIN"]),
+            "liquidity_tier": rng.choice(["PDH Sweep", "PWL Sweep", None]),
+        })
+    return rows
+
+
+def test_sql_summary_matches_python_analysis_over_full_history():
+    db = LocalSupabase(functions={"crt_loss_summary": sqlite_loss_summary})
+    rows = _rows(700)
+    db.table("crt_signals").insert(rows).execute()
+    losses = sorted((r for r in rows if r["result"] == "LOSS"), key=lambda r: r["closed_at"], reverse=True)
+    assert len(losses) > LOSS_LIMIT
+
+    summary = fetch_loss_summary(db)
+    expected = analyze_loss_patterns(losses)
+    for key in ("total_losses", "avg_sl_distance_pct", "by_direction"):
+        assert summary[key] == expected[key]
+    for key in ("exit_reasons", "by_tier", "by_timeframe"):      # most_common order
+        assert list(summary[key].items()) == list(expected[key].items()), key
+    # Rows without a symbol no longer take one of the top-N slots
+    by_symbol = Counter(r["symbol"] for r in losses if r["symbol"])
+    assert summary["top_loss_tickers"] == [sym for sym, _ in by_symbol.most_common(5)]
+    assert set(expected["top_loss_tickers"]) <= set(summary["top_loss_tickers"])
+
+
+def test_rpc_over_http_and_fallback(capsys):
+    db = LocalSupabase(functions={"crt_loss_summary": sqlite_loss_summary})
+    db.table("crt_signals").insert(_rows(50, seed=1)).execute()
+    with PostgrestServer(db) as server:
+        over_http = fetch_loss_summary(create_client(server.url, "local-key"), top_n=2)
+    assert over_http == fetch_loss_summary(db, top_n=2)
+    assert len(over_http["top_loss_tickers"]) == 2
+
+    assert fetch_loss_summary(LocalSupabase()) is None
+    assert "crt_loss_summary unavailable" in capsys.readouterr().out
+    assert fetch_loss_summary(LocalSupabase(functions={"crt_loss_summary": lambda c, p: []})) == {}
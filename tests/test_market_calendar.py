@@ -0,0 +1,107 @@
+import argparse
+import json
+from datetime import date
+
+import pandas as pd
+
+import scanner
+from market_calendar import (
+    bar_closes,
+    due_timeframes,
+    next_bar_close,
+    nyse_early_closes,
+    nyse_holidays,
+    session,
+)
+from market_data import closed_frames, resample_to_4h
+
+ET = "America/New_York"
+
+
+def test_nyse_holidays_and_early_closes():
+    assert sorted(nyse_holidays(2024)) == [
+        date(2024, 1, 1), date(2024, 1, 15), date(2024, 2, 19), date(2024, 3, 29), date(2024, 5, 27),
+        date(2024, 6, 19), date(2024, 7, 4), date(2024, 9, 2), date(2024, 11, 28), date(2024, 12, 25),
+    ]
+    assert date(2025, 1, 9) in nyse_holidays(2025)
+    assert date(2026, 7, 3) in nyse_holidays(2026)          # July 4th on a Saturday
+    assert date(2021, 12, 31) not in nyse_holidays(2021)    # Saturday New Year is not observed
+    assert sorted(nyse_early_closes(2024)) == [date(2024, 7, 3), date(2024, 11, 29), date(2024, 12, 24)]
+    assert session(date(2024, 12, 24))[1] == pd.Timestamp("2024-12-24 13:00", tz=ET)
+    assert session(date(2024, 3, 9)) is None
+
+
+def test_bar_close_schedule():
+    closes = bar_closes(date(2024, 7, 8))
+    assert len(closes) == 26
+    assert closes[0] == pd.Timestamp("2024-07-08 09:45", tz=ET)
+    assert next_bar_close(pd.Timestamp("2024-12-24 13:00", tz=ET)) == pd.Timestamp("2024-12-26 09:45", tz=ET)
+
+    due = {c.strftime("%H:%M"): due_timeframes(c) for c in closes}
+    assert due["09:45"] == ["15M"]
+    assert due["10:30"] == ["15M", "1H"]
+    # The 16:00 UTC bin holds the 1H bars from 12:30 ET in summer: the 12:00 UTC bin closes at 12:30 ET
+    assert due["12:00"] == ["15M"]
+    assert due["12:30"] == ["15M", "1H", "4H"]
+    assert due["13:30"] == ["15M", "1H"]
+    assert due["16:00"] == ["15M", "1H", "4H"]
+    assert [t for t, d in due.items() if "4H" in d] == ["12:30", "16:00"]
+    winter = {c.strftime("%H:%M"): due_timeframes(c) for c in bar_closes(date(2024, 1, 8))}
+    assert winter["11:00"] == ["15M"]
+    assert winter["11:30"] == ["15M", "1H", "4H"]   # 16:30 UTC, first 1H close after 16:00 UTC
+    assert [t for t, d in winter.items() if "4H" in d] == ["11:30", "15:30", "16:00"]
+
+
+def test_closed_frames_drop_forming_bars():
+    # Summer session: 1h bars from 09:30 ET, the 12:30 ET bar opened at the 4H close
+    close = pd.Timestamp("2024-07-08 12:30", tz=ET)
+    hours = pd.date_range("2024-07-08 09:30", "2024-07-08 12:30", freq="60min", tz=ET)
+    quarters = pd.date_range("2024-07-08 09:30", "2024-07-08 12:30", freq="15min", tz=ET)
+    bars = lambda idx: pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": 1.5, "Volume": 1.0}, index=idx)
+    df_1h, df_15m = bars(hours), bars(quarters)
+
+    df_4h, h, m = closed_frames((resample_to_4h(df_1h), df_1h, df_15m), close)
+    assert h.index[-1] == pd.Timestamp("2024-07-08 11:30", tz=ET)
+    assert m.index[-1] == pd.Timestamp("2024-07-08 12:15", tz=ET)
+    assert df_4h.index[-1] == pd.Timestamp("2024-07-08 12:00")     # UTC bin of 09:30-11:30 ET, now complete
+    assert df_4h["Volume"].iat[-1] == 3.0
+    assert closed_frames((None, None, None), close) == (None, None, None)
+
+
+def test_daemon_scans_only_closed_timeframes(tmp_path):
+    clock = {"now": pd.Timestamp("2024-03-08 15:50", tz=ET)}
+    seen: list[set] = []
+    universes = []
+
+    def fetch(ticker):
+        return None, None, None
+
+    def scan(ticker, persist, fetch_frames=None, market_cap_lookup=None, timeframes=None):
+        seen.append(set(timeframes))
+        return [], "no_data", 0
+
+    def sleep(seconds):
+        clock["now"] += pd.Timedelta(seconds=seconds)
+
+    args = argparse.Namespace(persist=False, workers=2, close_delay=5.0, status_file=str(tmp_path / "status.json"))
+    original = scanner.scan_ticker
+    scanner.scan_ticker = scan
+    try:
+        status = scanner.run_daemon(
+            args,
+            universe_loader=lambda a: universes.append(1) or ["AAA", "BBB"],
+            fetch_frames=fetch,
+            now=lambda: clock["now"],
+            sleep=sleep,
+            max_cycles=2,
+        )
+    finally:
+        scanner.scan_ticker = original
+
+    assert seen == [{"15M", "1H", "4H"}] * 2 + [{"15M"}] * 2
+    assert len(universes) == 2
+    on_disk = json.loads(open(args.status_file).read())
+    assert on_disk["bar_close"] == pd.Timestamp("2024-03-11 09:45", tz=ET).isoformat()
+    assert on_disk["timeframes"] == ["15M"] == status["timeframes"]
+    assert on_disk["latency_s"] == 5.0
+    assert on_disk["funnel"]["no_data"] == 2
@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+import optimizer_agent
+from benchmarks.synthetic import make_daily_hourly
+
+
+@pytest.fixture(autouse=True)
+def small_grid(monkeypatch):
+    monkeypatch.setattr(optimizer_agent, "DEFAULT_GRID_PARAMS", ["displacement_mult", "proximity_filter_pct"])
+
+
+def _fetch(ticker: str):
+    if ticker == "THIN":
+        return None
+    if ticker == "LONG":
+        return make_daily_hourly(250, seed=1)
+    return make_daily_hourly(70, seed=sum(map(ord, ticker)) % 7)
+
+
+def test_parallel_grid_matches_serial_consensus(tmp_path):
+    tickers = ["AAA", "BBB", "THIN", "CCC", "DDD"]
+    consensus, data = optimizer_agent.run_grid_search_on_tickers(tickers, workers=2, fetch=_fetch)
+    assert sorted(data) == ["AAA", "BBB", "CCC", "DDD"]
+
+    bests = []
+    for t in ["AAA", "BBB", "CCC", "DDD"]:
+        best = optimizer_agent.grid_search(t, *data[t], param_keys=optimizer_agent.DEFAULT_GRID_PARAMS)
+        if best:
+            bests.append(best)
+    assert len(bests) >= optimizer_agent.MIN_CONSENSUS_TICKERS
+    assert consensus == optimizer_agent.build_consensus(bests)
+
+
+def test_timeout_drops_stragglers_once_enough_finished(capsys):
+    release = threading.Event()
+
+    def fetch(ticker):
+        if ticker == "SLOW":
+            release.wait(30)
+        return _fetch(ticker)
+
+    started = time.perf_counter()
+    consensus, data = optimizer_agent.run_grid_search_on_tickers(
+        ["AAA", "BBB", "CCC", "DDD", "SLOW", "LONG"], workers=4, timeout=0.5, fetch=fetch,
+    )
+    release.set()
+    assert time.perf_counter() - started < 15
+    assert consensus and "SLOW" not in data
+    # Dropped tickers must not reach validate_improvement
+    late = capsys.readouterr().out.split("continuing without ")[1].splitlines()[0].split(", ")
+    assert "SLOW" in late and not set(late) & set(data)
+
+
+def test_grid_search_stops_when_asked():
+    stop = threading.Event()
+    stop.set()
+    daily, hourly = _fetch("AAA")
+    assert optimizer_agent.grid_search("AAA", daily, hourly, param_keys=["displacement_mult"], stop=stop) is None
@@ -0,0 +1,85 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from local_supabase import LocalSupabase
+from outcome_labeler import DailyBarCache, forward_extremes, run_labeler
+from supabase_writer import BufferedWriter
+from tests.test_find_reclaim import _synthetic_history
+
+CONFLICT = "symbol,timestamp,event_type"
+
+
+def _events(daily: pd.DataFrame, rng) -> list[dict]:
+    rows = []
+    for ts, close in zip(daily.index, daily["Close"]):
+        direction = "bearish" if rng.random() < 0.5 else "bullish"
+        has_trade = rng.random() < 0.6
+        sign = -1 if direction == "bearish" else 1
+        rows.append({
+            "symbol": "TEST",
+            "timestamp": ts.isoformat(),
+            "event_type": "SETUP" if has_trade else "HISTORICAL_FAILURE",
+            "direction": direction,
+            "entry_price": float(close) if has_trade else None,
+            "take_profit": float(close) * (1 + sign * rng.uniform(0.005, 0.05)) if has_trade else None,
+            "hit_target_10d": None,
+            "max_gain_10d_pct": None,
+        })
+    return rows
+
+
+def _reference(event: dict, daily: pd.DataFrame, k: int) -> dict:
+    window = daily.iloc[k + 1:k + 11]
+    entry = event["entry_price"] if event["entry_price"] is not None else float(daily["Close"].iloc[k])
+    if event["direction"] == "bearish":
+        gain = (entry - window["Low"].min()) / entry * 100
+        hit = event["take_profit"] is not None and window["Low"].min() <= event["take_profit"]
+    else:
+        gain = (window["High"].max() - entry) / entry * 100
+        hit = event["take_profit"] is not None and window["High"].max() >= event["take_profit"]
+    return {"hit_target_10d": bool(hit), "max_gain_10d_pct": round(gain, 2)}
+
+
+def test_forward_extremes_window():
+    high = np.arange(15, dtype=float)
+    fwd_max, fwd_min = forward_extremes(high, high, days=10)
+    assert fwd_max[0] == 10 and fwd_min[0] == 1
+    assert fwd_max[4] == 14
+    assert np.isnan(fwd_max[5:]).all()
+
+
+def test_labels_only_completed_windows_and_is_incremental(tmp_path):
+    daily, _ = _synthetic_history(0, days=60)
+    daily.index = daily.index + pd.Timedelta(hours=5)   # session stamps like yfinance daily bars
+    rng = np.random.default_rng(0)
+
+    db = LocalSupabase()
+    events = _events(daily, rng)
+    db.table("squeeze_signals").insert(events).execute()
+
+    served = {"bars": daily.iloc[:40]}
+    cache = DailyBarCache(str(tmp_path), download=lambda symbol, start: served["bars"])
+
+    writer = BufferedWriter(db, "squeeze_signals", update_on=CONFLICT, flush_interval=None)
+    report = run_labeler(db, ["TEST"], cache, writer)
+    assert report["TEST"] == {"pending": 60, "labeled": 30}
+
+    rows = {r["timestamp"]: r for r in db.rows("squeeze_signals")}
+    assert len(db.rows("squeeze_signals")) == 60
+    assert writer.summary.requests == 30          # one UPDATE per labeled row, never an insert
+    for k, event in enumerate(events):
+        row = rows[event["timestamp"]]
+        assert row["entry_price"] == event["entry_price"]
+        if k < 30:
+            assert {key: row[key] for key in ("hit_target_10d", "max_gain_10d_pct")} == _reference(event, daily, k)
+        else:
+            assert row["hit_target_10d"] is None and row["max_gain_10d_pct"] is None
+    json.dumps(list(rows.values()))
+
+    # Next night: ten more sessions → exactly ten more windows complete
+    served["bars"] = daily.iloc[35:50]
+    report = run_labeler(db, ["TEST"], cache, writer)
+    assert report["TEST"] == {"pending": 30, "labeled": 10}
+    assert len(DailyBarCache(str(tmp_path))._read("TEST")) == 50
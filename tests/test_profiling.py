@@ -0,0 +1,62 @@
+import argparse
+import concurrent.futures
+import glob
+import multiprocessing
+import threading
+import time
+
+from profiling import (
+    ProfileSession,
+    StackSampler,
+    add_profile_args,
+    function_stats,
+    read_collapsed,
+    start_profiling,
+)
+
+
+def _busy_loop(seconds: float = 0.3) -> int:
+    deadline = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+    return n
+
+
+def test_sampler_sees_worker_threads():
+    sampler = StackSampler(interval=0.002).start()
+    worker = threading.Thread(target=_busy_loop, name="busy-1")
+    worker.start()
+    worker.join()
+    sampler.stop()
+
+    assert any(stack[0] == "busy" and stack[-1] == "test_profiling:_busy_loop" for stack in sampler.counts)
+    hottest = [r for r in function_stats(sampler.counts) if not r["idle"]][0]
+    assert hottest["function"] == "test_profiling:_busy_loop"
+
+
+def test_session_merges_forked_workers(tmp_path):
+    prefix = str(tmp_path / "prof" / "run")
+    session = ProfileSession(prefix, interval=0.002).start()
+    ctx = multiprocessing.get_context("fork")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=2, mp_context=ctx) as pool:
+        assert all(pool.map(_busy_loop, [0.3, 0.3]))
+    counts = session.finish()
+
+    on_disk = read_collapsed(prefix + ".collapsed")
+    assert on_disk == counts
+    # The parent only waits on the pool, so the busy frames come from the worker part files
+    busy = sum(n for stack, n in counts.items() if stack[-1] == "test_profiling:_busy_loop")
+    assert busy > 50
+    assert glob.glob(prefix + ".part-*") == []
+    assert "test_profiling:_busy_loop" in open(prefix + ".stats.txt").read()
+    assert session.finish() is None
+
+
+def test_cli_flags():
+    parser = argparse.ArgumentParser()
+    add_profile_args(parser)
+    assert start_profiling(parser.parse_args([])) is None
+    args = parser.parse_args(["--profile-top", "5"])
+    assert args.profile is None and args.profile_top == 5
+    assert parser.parse_args(["--profile"]).profile == "profile"
@@ -0,0 +1,40 @@
+import pandas as pd
+
+import scanner
+from local_supabase import LocalSupabase
+from replay import ReplayFeed, run_replay
+from tests.test_wick_retrace_3c import _bullish_smc_bars, _flat
+
+
+def _recorded_bars() -> dict:
+    start = pd.Timestamp("2024-03-01", tz="UTC")
+    hourly = [_flat(100.0) for _ in range(7 * 24)]
+    df_1h = pd.DataFrame(hourly, index=pd.date_range(start, periods=len(hourly), freq="1h"))
+
+    bars_15m = [_flat(100.0) for _ in range(40)] + _bullish_smc_bars() + [_flat(103.0) for _ in range(4)]
+    idx_15m = pd.date_range(start + pd.Timedelta(days=7), periods=len(bars_15m), freq="15min")
+    df_15m = pd.DataFrame(bars_15m, index=idx_15m)
+    return {"TEST": {"1h": df_1h, "15m": df_15m}}
+
+
+def test_feed_only_serves_closed_bars():
+    feed = ReplayFeed(_recorded_bars())
+    close = feed.bar_closes()[40][0]
+    feed.clock = close + pd.Timedelta(minutes=5)
+    _, df_1h, _ = feed.fetch("TEST")
+    assert df_1h.index[-1] + pd.Timedelta(hours=1) <= feed.clock
+
+
+def test_replay_persists_planted_signal_once():
+    db = LocalSupabase()
+    report = run_replay(ReplayFeed(_recorded_bars()), db, market_caps={"TEST": 5_000_000_000})
+    assert scanner.supabase is None      # the local store does not leak into later callers
+
+    assert report["signals"] == 1
+    assert report["signals_by_tf"] == {"15M": 1}
+    rows = db.rows("crt_signals")
+    assert len(rows) == 1
+    assert rows[0]["type"] == "bullish_wick_3c"
+    assert rows[0]["market_cap"] == 5_000_000_000
+    assert report["bars"] == report["bar_closes"] == 68
+    assert report["bars_per_s"] > 0
@@ -0,0 +1,94 @@
+import json
+
+import pandas as pd
+
+import scanner
+from local_supabase import LocalSupabase
+from scan_checkpoint import ScanCheckpoint, checkpoint_key
+from tests.test_scan_pipeline import TICKERS, _fetch
+
+OPTIONS = {"index": "all", "symbol": None, "shard": None}
+
+
+def test_key_follows_the_last_closed_bar():
+    saturday = checkpoint_key(OPTIONS, pd.Timestamp("2024-03-09 12:00", tz="UTC"))
+    assert saturday["bar_close"] == pd.Timestamp("2024-03-08 16:00", tz="America/New_York").isoformat()
+    assert checkpoint_key(OPTIONS, pd.Timestamp("2024-03-11 14:44", tz="UTC"))["bar_close"].endswith("10:30:00-04:00")
+
+
+def test_batched_atomic_flushes(tmp_path):
+    path = str(tmp_path / "ckpt.json")
+    checkpoint = ScanCheckpoint(path, {"bar_close": "x"}, universe=TICKERS, flush_every=5, flush_interval=None)
+    checkpoint.flush()
+    for t in TICKERS[:4]:
+        checkpoint.record(t, "no_pattern")
+    assert json.load(open(path))["done"] == {}
+    checkpoint.record(TICKERS[4], "signal", 2, persisted=True)
+    state = json.load(open(path))
+    assert len(state["done"]) == 5 and state["done"][TICKERS[4]] == {"stage": "signal", "signals": 2, "persisted": True}
+    assert not (tmp_path / "ckpt.json.tmp").exists()
+
+
+def test_resume_scans_only_unfinished_tickers(tmp_path):
+    path = str(tmp_path / "ckpt.json")
+    key = checkpoint_key(OPTIONS, pd.Timestamp("2024-03-11 14:44", tz="UTC"))
+    reference = scanner.run_scan_cycle(TICKERS, False, 4, fetch_frames=_fetch)
+
+    # First run dies after 25 tickers; only the flushed batches survive
+    first = ScanCheckpoint.open(path, key, flush_every=10, flush_interval=None)
+    first.set_universe(TICKERS)
+    scanner.run_scan_cycle(TICKERS[:25], False, 4, fetch_frames=_fetch, checkpoint=first)
+
+    fetched = []
+    resumed = ScanCheckpoint.open(path, key, resume=True)
+    assert resumed.resumed and resumed.universe == TICKERS
+    todo = resumed.remaining()
+    assert len(todo) == len(TICKERS) - 20
+    scanner.run_scan_cycle(todo, False, 4, fetch_frames=lambda t: fetched.append(t) or _fetch(t), checkpoint=resumed)
+    resumed.finish()
+
+    assert sorted(fetched) == sorted(todo)
+    assert resumed.totals(TICKERS) == {"funnel": reference["funnel"], "signals": reference["signals"]}
+    assert json.load(open(path))["completed"] is True
+
+    # A new bar has closed: the stored progress is stale and the scan starts over
+    later = checkpoint_key(OPTIONS, pd.Timestamp("2024-03-11 15:01", tz="UTC"))
+    assert not ScanCheckpoint.open(path, later, resume=True).resumed
+    assert not ScanCheckpoint.open(path, {**key, "index": "us"}, resume=True).resumed
+
+
+def test_persisted_waits_for_writer_confirmation(tmp_path):
+    checkpoint = ScanCheckpoint(str(tmp_path / "ckpt.json"), {"bar_close": "x"}, flush_interval=None)
+    checkpoint.queued("AAA", 2)
+    checkpoint.record("AAA", "signal", 2, persisted=True)
+    assert checkpoint.done["AAA"]["persisted"] is False
+    checkpoint.confirmed("AAA")
+    assert checkpoint.done["AAA"]["persisted"] is False
+    checkpoint.confirmed("AAA")
+    assert checkpoint.done["AAA"]["persisted"] is True and checkpoint.unwritten == {}
+
+
+def test_resume_rescans_tickers_with_unwritten_signals(tmp_path):
+    path = str(tmp_path / "ckpt.json")
+    key = checkpoint_key(OPTIONS, pd.Timestamp("2024-03-11 14:44", tz="UTC"))
+    first = ScanCheckpoint.open(path, key, flush_interval=None)
+    first.set_universe(TICKERS)
+
+    scanner.supabase = LocalSupabase(fail_rate=1.0)
+    scanner.signal_checkpoint = first
+    try:
+        scanner.start_signal_writer()
+        scanner.signal_writer.max_retries, scanner.signal_writer.backoff = 0, 0.0
+        scanner.run_scan_cycle(TICKERS, True, 4, fetch_frames=_fetch,
+                               market_cap_lookup=lambda t: 1_000_000_000, checkpoint=first)
+        scanner.stop_signal_writer()
+    finally:
+        scanner.stop_signal_writer()
+        scanner.signal_checkpoint = None
+        scanner.supabase = None
+    first.finish()
+
+    with_signals = {t for t, e in first.done.items() if e["stage"] == "signal"}
+    assert with_signals and not any(first.done[t]["persisted"] for t in with_signals)
+    resumed = ScanCheckpoint.open(path, key, resume=True)
+    assert sorted(resumed.remaining()) == sorted(with_signals)
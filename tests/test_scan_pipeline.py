@@ -0,0 +1,64 @@
+import time
+
+import pandas as pd
+
+import scanner
+from scan_pipeline import ScanPipeline, detect_packed, detect_signals, pack_frame
+from tests.test_wick_retrace_3c import _bearish_smc_bars, _bullish_smc_bars, _warmup_flat
+
+TICKERS = [f"T{i:03d}" for i in range(60)]
+
+
+def _frame(bars: list[dict]) -> pd.DataFrame:
+    idx = pd.date_range("2024-03-04 09:30", periods=len(bars), freq="15min", tz="America/New_York")
+    return pd.DataFrame(bars, index=idx)
+
+
+def _fetch(ticker: str):
+    n = int(ticker[1:])
+    if n % 6 == 0:
+        return None, None, None
+    if n % 5 == 0:
+        return None, None, _frame(_warmup_flat(20) + _bullish_smc_bars())
+    if n % 7 == 0:
+        return None, None, _frame(_warmup_flat(20) + _bearish_smc_bars())
+    return None, None, _frame(_warmup_flat(44))
+
+
+def test_packed_frames_detect_like_dataframes():
+    frames = _fetch("T005")
+    signals, stage = detect_signals("T005", frames)
+    assert stage == "signal" and signals[0]["direction"] == "BULLISH"
+    assert detect_packed("T005", tuple(pack_frame(df) for df in frames))[:2] == (signals, stage)
+    assert detect_signals("T005", frames, timeframes=["1H"]) == ([], "no_data")
+
+
+def test_pipeline_matches_threaded_scan():
+    reference = scanner.run_scan_cycle(TICKERS, False, 4, fetch_frames=_fetch)
+    stats = scanner.run_pipelined_cycle(TICKERS, False, io_workers=4, cpu_workers=2, enrich_workers=2,
+                                        queue_size=4, fetch_frames=_fetch)
+
+    assert stats["funnel"] == reference["funnel"]
+    assert stats["signals"] == reference["signals"] > 0
+    stages = stats["stages"]
+    assert stages["fetch"]["items"] == len(TICKERS)
+    assert stages["detect"]["items"] == len(TICKERS) - reference["funnel"]["no_data"]
+    assert stages["enrich"]["items"] == reference["funnel"]["signal"]
+    assert all(0 <= s["occupancy"] <= 1 for s in stages.values())
+
+
+def test_slow_stage_applies_backpressure():
+    def slow_finish(ticker, signals):
+        time.sleep(0.02)
+        return signals, "signal", len(signals)
+
+    every_ticker_signals = lambda t: (None, None, _frame(_warmup_flat(20) + _bullish_smc_bars()))
+    pipeline = ScanPipeline(every_ticker_signals, slow_finish, io_workers=4, cpu_workers=2,
+                            enrich_workers=1, queue_size=2)
+    stats = pipeline.run(TICKERS[:30])
+
+    assert stats["funnel"]["signal"] == 30
+    enrich, detect = stats["stages"]["enrich"], stats["stages"]["detect"]
+    assert detect["max_queue"] <= 2
+    assert detect["blocked_s"] > 0
+    assert enrich["occupancy"] > detect["occupancy"]
@@ -0,0 +1,64 @@
+import argparse
+import os
+import subprocess
+import sys
+
+import pytest
+
+import scanner
+from scan_shards import merge_shard_summaries, parse_shard, select_shard, shard_of, write_shard_summary
+
+UNIVERSE = [f"T{i:04d}" for i in range(2000)] + ["BRK-B", "AAPL", "NVDA"]
+
+
+def test_shards_partition_the_universe():
+    shards = [select_shard(UNIVERSE + UNIVERSE[:50], i, 4) for i in range(4)]
+    assert sorted(t for s in shards for t in s) == sorted(UNIVERSE)
+    assert min(map(len, shards)) > 400        # roughly balanced
+
+    # Stable across interpreters (unlike the salted built-in hash)
+    code = "from scan_shards import shard_of; print([shard_of(t, 7) for t in ('AAPL', 'NVDA', 'BRK-B')])"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         env={"PYTHONHASHSEED": "123"}, cwd=os.path.dirname(scanner.__file__))
+    assert out.stdout.strip() == str([shard_of(t, 7) for t in ("AAPL", "NVDA", "BRK-B")])
+
+    assert parse_shard("2/4") == (2, 4)
+    for bad in ("4/4", "-1/4", "1", "a/b"):
+        with pytest.raises(ValueError):
+            parse_shard(bad)
+
+
+def test_merged_shards_match_single_node_funnel(tmp_path, monkeypatch):
+    def scan(ticker, persist, fetch_frames=None, market_cap_lookup=None, timeframes=None):
+        n = int(ticker[1:]) if ticker[1:].isdigit() else 0
+        if n % 5 == 0:
+            return [], "no_data", 0
+        if n % 7 == 0:
+            return [{}] * 2, "signal", 2
+        return [], "no_pattern", 0
+
+    monkeypatch.setattr(scanner, "scan_ticker", scan)
+    full = scanner.run_scan_cycle(UNIVERSE, False, 4)
+    for i in range(3):
+        tickers = select_shard(UNIVERSE, i, 3)
+        write_shard_summary(str(tmp_path), "run1", i, 3, tickers, scanner.run_scan_cycle(tickers, False, 4))
+
+    merged = merge_shard_summaries(str(tmp_path), "run1")
+    assert merged["missing"] == []
+    assert merged["tickers"] == len(UNIVERSE)
+    assert merged["funnel"] == full["funnel"]
+    assert merged["signals"] == full["signals"]
+
+    (tmp_path / "run1" / "shard-1-of-3.json").unlink()
+    assert merge_shard_summaries(str(tmp_path), "run1")["missing"] == [1]
+
+
+def test_load_universe_shards_before_market_cap_filter(monkeypatch):
+    looked_up = []
+    monkeypatch.setattr(scanner, "get_sp500_tickers", lambda: UNIVERSE[:300])
+    monkeypatch.setattr(scanner, "get_nasdaq100_tickers", lambda: UNIVERSE[200:400])
+    monkeypatch.setattr(scanner, "check_mcap", lambda t: looked_up.append(t) or t)
+
+    args = argparse.Namespace(symbol=None, index="us", shard=(1, 2))
+    tickers = scanner.load_universe(args)
+    assert tickers == sorted(looked_up) == select_shard(UNIVERSE[:400], 1, 2)
@@ -0,0 +1,72 @@
+import json
+import random
+
+import numpy as np
+import pytest
+
+import scanner
+from local_supabase import LocalSupabase
+from scanner_metrics import METRICS, LatencyHistogram, ScannerMetrics
+from supabase_writer import BufferedWriter
+from tests.test_scan_pipeline import TICKERS, _fetch
+
+
+def test_histogram_quantiles_and_slowest():
+    rng = random.Random(7)
+    samples = [rng.lognormvariate(-2.5, 0.8) for _ in range(5000)]
+    hist = LatencyHistogram()
+    for i, s in enumerate(samples):
+        hist.observe(s, ticker=f"T{i}")
+
+    snap = hist.snapshot()
+    assert snap["count"] == 5000
+    for q in (50, 95, 99):
+        exact = float(np.percentile(samples, q))
+        assert abs(snap[f"p{q}_s"] - exact) / exact < 0.35
+    slowest = sorted(range(5000), key=lambda i: samples[i], reverse=True)[:10]
+    assert [s["ticker"] for s in snap["slowest"]] == [f"T{i}" for i in slowest]
+
+
+def test_timer_counts_errors_and_exports(tmp_path):
+    metrics = ScannerMetrics()
+    with metrics.timer("fetch", "AAPL"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.timer("fetch", "NVDA"):
+            raise ValueError("boom")
+
+    run = {"elapsed_s": 2.0, "tickers": 2, "tickers_per_s": 1.0, "signals": 0, "funnel": {"no_data": 2}}
+    metrics.write(str(tmp_path / "m.json"), str(tmp_path / "m.prom"), run)
+    data = json.load(open(tmp_path / "m.json"))
+    assert data["stages"]["fetch"]["count"] == 2 and data["stages"]["fetch"]["errors"] == 1
+    assert data["run"]["tickers"] == 2
+
+    prom = open(tmp_path / "m.prom").read().splitlines()
+    buckets = [int(line.rsplit(" ", 1)[1]) for line in prom if line.startswith('crt_scanner_stage_seconds_bucket{stage="fetch"')]
+    assert buckets == sorted(buckets) and buckets[-1] == 2
+    assert 'crt_scanner_stage_errors_total{stage="fetch"} 1' in prom
+    assert 'crt_scanner_run_funnel{stage="no_data"} 2' in prom
+
+
+def test_scan_paths_record_every_stage():
+    METRICS.reset()
+    scanner.run_scan_cycle(TICKERS, False, 4, fetch_frames=_fetch)
+    threaded = METRICS.to_dict()["stages"]
+    with_data = sum(1 for t in TICKERS if _fetch(t)[2] is not None)
+    assert threaded["fetch"]["count"] == len(TICKERS)
+    assert threaded["detect_15M"]["count"] == with_data
+
+    METRICS.reset()
+    scanner.run_pipelined_cycle(TICKERS, False, io_workers=4, cpu_workers=2, enrich_workers=2, fetch_frames=_fetch)
+    pipelined = METRICS.to_dict()["stages"]
+    assert pipelined["fetch"]["count"] == len(TICKERS)
+    assert pipelined["detect_15M"]["count"] == with_data      # timings shipped back from the workers
+    METRICS.reset()
+
+
+def test_writer_reports_request_latency():
+    metrics = ScannerMetrics()
+    db = LocalSupabase()
+    with BufferedWriter(db, "crt_signals", chunk_size=10, flush_interval=None, observe=metrics.observe) as writer:
+        writer.extend([{"symbol": f"T{i}"} for i in range(25)])
+    assert metrics.to_dict()["stages"]["write_crt_signals"]["count"] == writer.summary.requests == 3
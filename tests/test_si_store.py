@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from si_store import ShortInterestStore
+from squeeze_engine import load_si_data, resolve_si_row
+
+
+def _si_file(path, seed: int, dates: list[str]):
+    rng = np.random.default_rng(seed)
+    rows = [
+        {
+            "symbol": sym,
+            "as_of_date": d,
+            "short_float_pct": round(float(rng.uniform(0, 40)), 2),
+            "days_to_cover": round(float(rng.uniform(0, 12)), 2),
+        }
+        for sym in ("AAPL", "gme", "NVDA")
+        for d in dates
+    ]
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+
+def test_asof_matches_resolve_si_row(tmp_path):
+    path = _si_file(tmp_path / "si.csv", 0, ["2024-01-15", "2024-02-15", "2024-03-15", "2024-04-15"])
+    si_df = load_si_data(path)
+    store = ShortInterestStore.from_frame(si_df)
+
+    days = pd.date_range("2024-01-01", "2024-05-01", freq="D", tz="UTC")
+    for symbol in ("AAPL", "GME", "TSLA"):
+        short_float, dtc = store.asof_batch(symbol, days)
+        for k, ts in enumerate(days):
+            expected = resolve_si_row(si_df, symbol, ts)
+            assert store.asof(symbol, ts) == expected
+            sf = None if np.isnan(short_float[k]) else short_float[k]
+            assert sf == expected["short_float_pct"]
+
+
+def test_incremental_ingest_persists_and_skips_known_files(tmp_path):
+    root = str(tmp_path / "store")
+    first = _si_file(tmp_path / "h1.csv", 1, ["2024-01-15", "2024-02-15"])
+    second = _si_file(tmp_path / "h2.csv", 2, ["2024-02-15", "2024-03-15"])
+
+    store = ShortInterestStore(root)
+    assert store.ingest(first) == 6
+    assert store.ingest(first) == 0
+    assert store.ingest(second) == 6
+
+    reopened = ShortInterestStore(root)
+    assert reopened.symbols() == ["AAPL", "GME", "NVDA"]
+    assert reopened.ingest(second) == 0
+
+    latest = load_si_data(second)
+    feb = latest[(latest["symbol"] == "GME")].iloc[0]
+    got = reopened.asof("GME", pd.Timestamp("2024-02-20", tz="UTC"))
+    assert got["short_float_pct"] == feb["short_float_pct"]
+    assert reopened.asof("GME", pd.Timestamp("2024-01-01", tz="UTC")) == {
+        "short_float_pct": None,
+        "days_to_cover": None,
+    }
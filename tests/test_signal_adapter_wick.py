@@ -20,3 +20,16 @@ def test_signal_adapter_wick_3c():
     assert row["timeframe"] == "1H"
     assert row["subtype"] == "3C SMC"
     assert len(row["pattern_candles"]) == 3
+
+
+def test_signal_key_is_deterministic_per_c3_bar():
+    from signal_adapter import signal_key, signal_to_crt_row
+
+    signal = {
+        "direction": "BEARISH",
+        "timeframe": "15M",
+        "pattern_candles": [{"time": 1, "index": "C1"}, {"time": 2, "index": "C2"}, {"time": 3, "index": "C3"}],
+        "entry_price": 10.0,
+    }
+    assert signal_key(signal, "MSFT") == "MSFT|15M|bearish_wick_3c|3"
+    assert signal_to_crt_row(dict(signal, entry_price=11.0), ticker="MSFT")["signal_key"] == signal_key(signal, "MSFT")
@@ -0,0 +1,116 @@
+import time
+
+from postgrest.exceptions import APIError
+
+import scanner
+from local_supabase import LocalQuery, LocalSupabase
+from replay import ReplayFeed
+from signal_dedup import SignalDeduper
+from tests.test_replay import _recorded_bars
+
+
+def _key(symbol: str, c3_time: float) -> str:
+    return f"{symbol}|1H|bullish_wick_3c|{int(c3_time)}"
+
+
+def test_filter_new_checks_local_set_then_db(tmp_path):
+    now = time.time()
+    db = LocalSupabase()
+    db.table("crt_signals").insert({"signal_key": _key("IN_DB", now)}).execute()
+    path = str(tmp_path / "seen.txt")
+
+    dedup = SignalDeduper(path, client=db)
+    dedup.mark([_key("LOCAL", now)])
+    assert dedup.filter_new([_key("LOCAL", now), _key("IN_DB", now), _key("NEW", now)]) == [_key("NEW", now)]
+    assert dedup.db_lookups == 1
+
+    # Second run on the same host: both keys come from the seen-file, no DB round-trip
+    again = SignalDeduper(path, client=db)
+    assert again.filter_new([_key("LOCAL", now), _key("IN_DB", now)]) == []
+    assert again.db_lookups == 0
+
+
+def test_old_keys_are_pruned(tmp_path):
+    now = time.time()
+    path = str(tmp_path / "seen.txt")
+    SignalDeduper(path).mark([_key("OLD", now - 90 * 86400), _key("NEW", now)])
+    reloaded = SignalDeduper(path, retention_days=30)
+    assert reloaded.seen == {_key("NEW", now)}
+    assert open(path).read().count("\n") == 1
+
+
+def test_rerun_over_same_bars_persists_once(tmp_path):
+    db = LocalSupabase()
+    lookups = []
+
+    def market_cap(ticker):
+        lookups.append(ticker)
+        return 5_000_000_000
+
+    scanner.supabase = db
+    try:
+        for _ in range(2):
+            scanner.start_signal_deduper(str(tmp_path / "seen.txt"))
+            feed = ReplayFeed(_recorded_bars())
+            stages = []
+            for close_ts, _ in feed.bar_closes():
+                feed.clock = close_ts
+                stages.append(scanner.scan_ticker("TEST", True, fetch_frames=feed.fetch,
+                                                  market_cap_lookup=market_cap)[1])
+            assert "signal" in stages or "duplicate" in stages
+    finally:
+        scanner.signal_deduper = None
+
+    assert len(db.rows("crt_signals")) == 1
+    assert lookups == ["TEST"]
+    assert stages.count("duplicate") == 1
+
+
+def _scan_replay(market_cap):
+    feed = ReplayFeed(_recorded_bars())
+    stages = []
+    for close_ts, _ in feed.bar_closes():
+        feed.clock = close_ts
+        stages.append(scanner.scan_ticker("TEST", True, fetch_frames=feed.fetch, market_cap_lookup=market_cap)[1])
+    return stages
+
+
+def test_failed_batch_is_not_marked_seen(tmp_path):
+    seen = str(tmp_path / "seen.txt")
+    dead = LocalSupabase(fail_rate=1.0)
+    scanner.supabase = dead
+    try:
+        scanner.start_signal_deduper(seen)
+        scanner.start_signal_writer()
+        scanner.signal_writer.max_retries, scanner.signal_writer.backoff = 0, 0.0
+        assert "signal" in _scan_replay(lambda t: 5_000_000_000)
+        scanner.stop_signal_writer()
+        assert scanner.signal_deduper.seen == set()
+
+        # Next run against a healthy database retries the signal and only then marks it
+        db = LocalSupabase()
+        scanner.supabase = db
+        scanner.start_signal_deduper(seen)
+        scanner.start_signal_writer()
+        assert "signal" in _scan_replay(lambda t: 5_000_000_000)
+        scanner.stop_signal_writer()
+        assert len(db.rows("crt_signals")) == 1
+        assert scanner.signal_deduper.seen == {db.rows("crt_signals")[0]["signal_key"]}
+    finally:
+        scanner.stop_signal_writer()
+        scanner.signal_deduper = None
+        scanner.supabase = None
+
+
+def test_persist_without_unique_index_falls_back_to_insert(monkeypatch):
+    def no_unique_index(self, *args, **kwargs):
+        raise APIError({"code": "42P10", "message": "no unique or exclusion constraint matching the ON CONFLICT"})
+
+    monkeypatch.setattr(LocalQuery, "upsert", no_unique_index)
+    monkeypatch.setattr(scanner, "_signal_upsert", True)
+    db = LocalSupabase()
+    monkeypatch.setattr(scanner, "supabase", db)
+    scanner._persist_signal_row({"symbol": "AAA", "signal_key": "AAA|1"})
+    scanner._persist_signal_row({"symbol": "BBB", "signal_key": "BBB|1"})
+    assert [r["symbol"] for r in db.rows("crt_signals")] == ["AAA", "BBB"]
+    assert scanner._signal_upsert is False
@@ -0,0 +1,70 @@
+import contextlib
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from backtester import ScannerParams, compute_stats, grid_search, simulate
+from benchmarks.synthetic import make_daily_hourly
+from sim_cache import SimulationCache, cache_key
+
+
+@pytest.fixture(scope="module")
+def bars():
+    return make_daily_hourly(90, seed=0)
+
+
+def test_results_persist_across_instances(tmp_path, bars):
+    daily, hourly = bars
+    params = ScannerParams()
+    trades, stats = SimulationCache(str(tmp_path)).evaluate("AAA", daily, hourly, params)
+
+    fresh = SimulationCache(str(tmp_path))
+    cached, cached_stats = fresh.evaluate("BBB", daily, hourly, params)
+    assert (fresh.hits, fresh.misses) == (1, 0)
+    assert cached_stats == stats == compute_stats(trades)
+
+    expected = simulate("BBB", daily, hourly, params).to_frame()
+    pd.testing.assert_frame_equal(cached.to_frame(), expected)
+
+
+def test_key_covers_prices_and_params_only(bars):
+    daily, hourly = bars
+    params = ScannerParams()
+    key = cache_key(daily, hourly, params)
+
+    assert cache_key(daily.assign(Volume=1.0), hourly, params) == key
+    assert cache_key(daily, hourly, ScannerParams(displacement_mult=1.5)) != key
+    moved = hourly.copy()
+    moved.iloc[-1, moved.columns.get_loc("Close")] *= 1.001
+    assert cache_key(daily, moved, params) != key
+
+
+def test_lru_eviction_by_size(tmp_path, bars):
+    daily, hourly = bars
+    cache = SimulationCache(str(tmp_path), max_bytes=10**9, memory_entries=0)
+    keys = []
+    for i, mult in enumerate((1.0, 1.2, 1.5)):
+        params = ScannerParams(displacement_mult=mult)
+        cache.evaluate("AAA", daily, hourly, params)
+        keys.append(cache_key(daily, hourly, params))
+        os.utime(cache._path(keys[-1]), (1000 + i, 1000 + i))
+    os.utime(cache._path(keys[0]), (2000, 2000))        # oldest entry used most recently
+
+    one_entry = os.path.getsize(cache._path(keys[0]))
+    cache.evict(target_bytes=2 * one_entry + 1)
+    assert [os.path.exists(cache._path(k)) for k in keys] == [True, False, True]
+
+
+def test_grid_search_reuses_results(tmp_path, bars):
+    daily, hourly = bars
+    cache = SimulationCache(str(tmp_path))
+    keys = ["displacement_mult", "proximity_filter_pct"]
+    with contextlib.redirect_stdout(io.StringIO()):
+        first = grid_search("AAA", daily, hourly, param_keys=keys, cache=cache)
+        misses = cache.misses
+        second = grid_search("AAA", daily, hourly, param_keys=keys, cache=SimulationCache(str(tmp_path)))
+        uncached = grid_search("AAA", daily, hourly, param_keys=keys)
+    assert misses == 4
+    assert first is not None and first == second == uncached
@@ -0,0 +1,158 @@
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester import ScannerParams, compute_htf_pools, find_reclaim
+from local_supabase import LocalSupabase
+from squeeze_engine import (
+    build_event_table,
+    classify_event,
+    event_payloads,
+    make_writer,
+    resolve_si_row,
+    run_symbols_parallel,
+    score_squeeze,
+    write_events,
+)
+from si_store import ShortInterestStore
+from tests.test_find_reclaim import _synthetic_history
+
+
+def _reference_payloads(symbol, daily, hourly, params, si_df, rvol_period, min_rvol, mode):
+    """Per-day loop the batch engine replaces."""
+    daily = daily.copy()
+    daily["rvol"] = daily["Volume"] / daily["Volume"].rolling(rvol_period).mean()
+    payloads = []
+    scan_indices = [len(daily) - 1] if mode == "scan" else list(range(30, len(daily)))
+    for i in scan_indices:
+        daily_slice = daily.iloc[: i + 1]
+        pools = compute_htf_pools(daily_slice, params.wall_wick_pct, params.fuel_wick_pct)
+        if not pools:
+            continue
+        day_ts = daily_slice.index[-1]
+        current_price = float(daily_slice.iloc[-1]["Close"])
+        prior_1h = hourly[hourly.index <= day_ts].tail(25)
+        if len(prior_1h) < 5:
+            continue
+
+        signal = find_reclaim(pools, prior_1h, current_price, params)
+        si_row = resolve_si_row(si_df, symbol, day_ts)
+        rvol = float(daily_slice.iloc[-1]["rvol"]) if pd.notna(daily_slice.iloc[-1]["rvol"]) else 0.0
+        score = score_squeeze(si_row["short_float_pct"], si_row["days_to_cover"], rvol)
+        event_type, is_active = classify_event(signal, score)
+        if rvol < min_rvol and event_type == "ACTIVE_SQUEEZE":
+            event_type = "SETUP"
+            is_active = False
+
+        payloads.append({
+            "symbol": symbol,
+            "timestamp": day_ts.isoformat(),
+            "event_type": event_type,
+            "direction": signal["direction"] if signal else "bullish",
+            "liquidity_tier": signal["tier"] if signal else None,
+            "entry_price": signal["entry"] if signal else None,
+            "stop_loss": signal["stop"] if signal else None,
+            "take_profit": signal["target"] if signal else None,
+            "rr_ratio": signal["rr"] if signal else None,
+            "short_float_pct": si_row["short_float_pct"],
+            "days_to_cover": si_row["days_to_cover"],
+            "rvol": round(rvol, 3),
+            "squeeze_score": score,
+            "is_active_squeeze": is_active,
+            "hit_target_10d": None,
+            "max_gain_10d_pct": None,
+            "meta": {
+                "mode": mode,
+                "params": asdict(params),
+                "reclaim_candle_time": signal.get("reclaim_candle_time") if signal else None,
+            },
+        })
+    return payloads
+
+
+def _history(seed: int):
+    daily, hourly = _synthetic_history(seed, days=260)
+    rng = np.random.default_rng(seed)
+    daily["Volume"] = daily["Volume"] * rng.lognormal(0, 0.5, len(daily))
+    si_df = pd.DataFrame({
+        "symbol": "TEST",
+        "as_of_date": pd.to_datetime(["2022-03-15", "2022-06-15", "2022-09-15"], utc=True),
+        "short_float_pct": [12.0, 30.0, np.nan],
+        "days_to_cover": [4.0, 9.5, 6.0],
+    })
+    return daily, hourly, si_df
+
+
+@pytest.mark.parametrize("mode", ["backfill", "scan"])
+def test_event_table_matches_per_day_loop(mode):
+    params = ScannerParams(wall_wick_pct=0.002, fuel_wick_pct=0.2, displacement_mult=0.8,
+                           opposite_wick_tol=0.5, proximity_filter_pct=0.05)
+    for seed in range(2):
+        daily, hourly, si_df = _history(seed)
+        table = build_event_table("TEST", daily, hourly, params, si_df, 20, 1.2, mode)
+        got = event_payloads(table, mode, params)
+        expected = _reference_payloads("TEST", daily, hourly, params, si_df, 20, 1.2, mode)
+
+        assert len(got) == len(expected) > 0
+        for g, e in zip(got, expected):
+            assert g.keys() == e.keys()
+            for key in e:
+                if isinstance(e[key], float):
+                    assert g[key] == pytest.approx(e[key], abs=1e-9)
+                else:
+                    assert g[key] == e[key], key
+        if mode == "backfill":
+            assert {p["event_type"] for p in got} >= {"SETUP", "HISTORICAL_FAILURE"}
+
+
+def test_event_table_too_short():
+    daily, hourly, si_df = _history(0)
+    table = build_event_table("TEST", daily.iloc[:39], hourly, ScannerParams(), si_df, 20, 1.2, "backfill")
+    assert table.empty
+
+
+def test_backfill_written_in_bulk():
+    daily, hourly, si_df = _history(0)
+    params = ScannerParams()
+    payloads = event_payloads(build_event_table("TEST", daily, hourly, params, si_df, 20, 1.2, "backfill"),
+                              "backfill", params)
+    db = LocalSupabase()
+    writer = make_writer(db, dry_run=False, chunk_size=100)
+    assert write_events(writer, payloads) == len(payloads)
+    writer.close()
+
+    assert len(db.rows("squeeze_signals")) == len(payloads)
+    assert db.requests["squeeze_signals"] == -(-len(payloads) // 100)
+
+
+def _fake_fetch(symbol, start, end):
+    if symbol == "BAD":
+        raise RuntimeError("no data")
+    daily, hourly, _ = _history(int(symbol[-1]))
+    return daily, hourly
+
+
+def test_parallel_run_matches_sequential():
+    _, _, si_df = _history(0)
+    si = ShortInterestStore.from_frame(si_df.assign(symbol="SYM0"))
+    params = ScannerParams()
+
+    db = LocalSupabase()
+    writer = make_writer(db, dry_run=False)
+    results = run_symbols_parallel(writer, ["SYM0", "BAD", "SYM1"], params, "backfill", None, None, si,
+                                   rvol_period=20, min_rvol=1.2, workers=2, fetch=_fake_fetch)
+    writer.close()
+
+    assert isinstance(results["BAD"], RuntimeError)
+    expected = []
+    for symbol in ("SYM0", "SYM1"):
+        daily, hourly = _fake_fetch(symbol, None, None)
+        payloads = event_payloads(build_event_table(symbol, daily, hourly, params, si, 20, 1.2, "backfill"),
+                                  "backfill", params)
+        assert results[symbol] == len(payloads)
+        expected.extend(payloads)
+
+    key = lambda r: (r["symbol"], r["timestamp"])
+    assert sorted(db.rows("squeeze_signals"), key=key) == sorted(expected, key=key)
@@ -0,0 +1,163 @@
+import concurrent.futures
+import time
+
+from local_supabase import LocalSupabase
+from supabase_writer import BackgroundWriter, BufferedWriter, discover_columns
+
+CONFLICT = "symbol,timestamp,event_type"
+
+
+def _payloads(n: int, symbol: str = "TEST") -> list[dict]:
+    return [
+        {"symbol": symbol, "timestamp": f"2024-01-{i % 28 + 1:02d}T{i // 28:02d}:00:00+00:00",
+         "event_type": "SETUP", "squeeze_score": float(i)}
+        for i in range(n)
+    ]
+
+
+def test_bulk_upsert_in_chunks():
+    db = LocalSupabase()
+    with BufferedWriter(db, "squeeze_signals", on_conflict=CONFLICT, chunk_size=100, flush_interval=None) as writer:
+        writer.extend(_payloads(250))
+        assert writer.pending() == 50
+
+    assert len(db.rows("squeeze_signals")) == 250
+    assert db.requests["squeeze_signals"] == 3
+    assert writer.summary.rows_written == 250
+
+
+def test_duplicate_keys_collapse_to_last_write():
+    db = LocalSupabase()
+    rows = _payloads(10)
+    rows.append({**rows[3], "squeeze_score": 99.0})
+    with BufferedWriter(db, "squeeze_signals", on_conflict=CONFLICT, flush_interval=None) as writer:
+        writer.extend(rows)
+
+    stored = {r["timestamp"]: r for r in db.rows("squeeze_signals")}
+    assert len(stored) == 10
+    assert stored[rows[3]["timestamp"]]["squeeze_score"] == 99.0
+    assert writer.summary.duplicates_collapsed == 1
+
+
+def test_failed_chunks_are_retried_then_reported():
+    db = LocalSupabase(fail_rate=0.5, seed=3)
+    writer = BufferedWriter(db, "squeeze_signals", on_conflict=CONFLICT, chunk_size=20,
+                            flush_interval=None, max_retries=5, backoff=0.0)
+    writer.extend(_payloads(400))
+    writer.close()
+    s = writer.summary
+    assert s.retries > 0
+    assert s.rows_written + s.rows_failed == 400
+    assert len(db.rows("squeeze_signals")) == s.rows_written
+    assert len(writer.failed) == s.rows_failed
+
+    dead = LocalSupabase(fail_rate=1.0)
+    writer = BufferedWriter(dead, "squeeze_signals", on_conflict=CONFLICT, max_retries=2, backoff=0.0)
+    writer.extend(_payloads(5))
+    writer.close()
+    assert writer.summary.rows_failed == 5
+    assert dead.requests["squeeze_signals"] == 3
+
+
+def test_dry_run_and_flush_interval():
+    db = LocalSupabase()
+    writer = BufferedWriter(db, "squeeze_signals", on_conflict=CONFLICT, dry_run=True)
+    writer.extend(_payloads(5))
+    writer.close()
+    assert writer.summary.rows_written == 5
+    assert db.rows("squeeze_signals") == []
+
+    writer = BufferedWriter(db, "squeeze_signals", on_conflict=CONFLICT, chunk_size=1000, flush_interval=0.0)
+    writer.add(_payloads(1)[0])
+    assert writer.pending() == 0
+    assert len(db.rows("squeeze_signals")) == 1
+
+
+SIGNAL_COLUMNS = {"ticker", "type", "timeframe", "entry"}
+
+
+def _signal_rows(n: int) -> list[dict]:
+    return [{"ticker": f"T{i}", "type": "bullish_wick_3c", "timeframe": "1H", "entry": float(i),
+             "market_cap": 1_000_000} for i in range(n)]
+
+
+def test_background_writer_batches_and_drops_missing_column_once():
+    db = LocalSupabase(schema={"crt_signals": SIGNAL_COLUMNS})
+    writer = BackgroundWriter(db, "crt_signals", chunk_size=100, flush_interval=60.0)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(writer.add, _signal_rows(300)))
+    writer.close()
+
+    rows = db.rows("crt_signals")
+    assert len(rows) == 300
+    assert all("market_cap" not in r for r in rows)
+    assert writer.dropped_columns == {"market_cap"}
+    # 3 chunks + the single PGRST204 probe
+    assert db.requests["crt_signals"] == 4
+
+
+def test_discovered_schema_avoids_failed_requests():
+    db = LocalSupabase(schema={"crt_signals": SIGNAL_COLUMNS})
+    assert discover_columns(db, "crt_signals") is None
+    db.table("crt_signals").insert({"ticker": "X", "type": "t", "timeframe": "1H", "entry": 1.0}).execute()
+    columns = discover_columns(db, "crt_signals")
+    assert columns == SIGNAL_COLUMNS
+
+    requests_before = db.requests["crt_signals"]
+    writer = BackgroundWriter(db, "crt_signals", chunk_size=50, flush_interval=60.0, columns=columns)
+    writer.extend(_signal_rows(120))
+    writer.close()
+    assert db.requests["crt_signals"] - requests_before == 3
+    assert writer.summary.rows_written == 120
+
+
+def test_background_writer_flushes_on_interval_and_counts_drops():
+    db = LocalSupabase()
+    writer = BackgroundWriter(db, "crt_signals", chunk_size=1000, flush_interval=0.05)
+    writer.add(_signal_rows(1)[0])
+    for _ in range(100):
+        if db.rows("crt_signals"):
+            break
+        time.sleep(0.01)
+    assert len(db.rows("crt_signals")) == 1
+    writer.close()
+
+    slow = LocalSupabase(latency=0.2)
+    bounded = BackgroundWriter(slow, "crt_signals", chunk_size=1, flush_interval=None, max_queue=5)
+    bounded.extend(_signal_rows(50))
+    bounded.close()
+    assert bounded.dropped > 0
+    assert bounded.summary.rows_written + bounded.dropped == 50
+
+
+def test_close_timeout_counts_unflushed_rows():
+    slow = LocalSupabase(latency=0.2)
+    writer = BackgroundWriter(slow, "crt_signals", chunk_size=1, flush_interval=None)
+    writer.extend(_signal_rows(5))
+    writer.close(timeout=0.05)
+    assert writer.running
+    assert 0 < writer.summary.rows_unflushed <= 5
+    writer.close()
+    assert not writer.running and writer.summary.rows_written == 5
+
+
+def test_on_written_only_sees_confirmed_chunks():
+    confirmed = []
+    db = LocalSupabase(fail_rate=0.5, seed=1)
+    writer = BufferedWriter(db, "squeeze_signals", on_conflict=CONFLICT, chunk_size=10, flush_interval=None,
+                            max_retries=0, backoff=0.0, on_written=confirmed.extend)
+    writer.extend(_payloads(100))
+    writer.close()
+    assert 0 < len(confirmed) < 100
+    assert len(confirmed) == writer.summary.rows_written == len(db.rows("squeeze_signals"))
+
+
+def test_drain_flushes_queued_rows_and_keeps_running():
+    db = LocalSupabase()
+    writer = BackgroundWriter(db, "crt_signals", chunk_size=1000, flush_interval=60.0)
+    writer.extend(_signal_rows(3))
+    assert writer.drain(timeout=5.0)
+    assert len(db.rows("crt_signals")) == 3 and writer.running
+    writer.add(_signal_rows(1)[0])
+    writer.close()
+    assert writer.summary.rows_written == 4
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from backtester import compute_stats
+from trade_log import SIMULATE_COLUMNS, TradeLog
+
+
+def _trades(n: int, seed: int = 0) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    tiers = ["PDH", "PDL", "PWH", "PML"]
+    results = ["WIN", "LOSS", "OPEN"]
+    return [
+        {
+            "ticker": "TEST",
+            "day": f"2024-01-{i % 28 + 1:02d}",
+            "tier": tiers[rng.integers(len(tiers))],
+            "direction": "bullish",
+            "diamond_score": "A+",
+            "entry": 100.0,
+            "stop": 99.0,
+            "target": 102.0,
+            "rr": round(float(rng.uniform(0.5, 4.0)), 2),
+            "result": results[rng.integers(len(results))],
+            "close_ts": None,
+        }
+        for i in range(n)
+    ]
+
+
+def _reference_stats(trades: list[dict]) -> dict:
+    closed = [t for t in trades if t["result"] in ("WIN", "LOSS")]
+    wins = [t for t in closed if t["result"] == "WIN"]
+    losses = [t for t in closed if t["result"] == "LOSS"]
+    total_r = sum(t["rr"] for t in wins) - len(losses)
+    tier_stats: dict = {}
+    for t in closed:
+        tier_stats.setdefault(t["tier"], {"win": 0, "loss": 0})[t["result"].lower()] += 1
+    return {
+        "total": len(closed),
+        "wins": len(wins),
+        "losses": len(losses),
+        "winrate": round(len(wins) / len(closed) * 100, 1),
+        "total_r": round(total_r, 2),
+        "expectancy": round(total_r / len(closed), 3),
+        "avg_rr": round(sum(t["rr"] for t in wins) / len(wins), 2),
+        "tier_stats": tier_stats,
+    }
+
+
+def test_compute_stats_matches_list_reference():
+    trades = _trades(500)
+    assert compute_stats(trades) == _reference_stats(trades)
+    assert compute_stats(TradeLog.from_records(trades)) == _reference_stats(trades)
+
+
+def test_compute_stats_no_closed_trades():
+    assert compute_stats([]) is None
+    assert compute_stats(TradeLog()) is None
+
+
+def test_streamed_log_keeps_memory_flat_and_stats_exact(tmp_path):
+    trades = _trades(1000, seed=1)
+    sink = tmp_path / "trades.csv"
+    log = TradeLog(sink=str(sink), chunk_size=64)
+    for t in trades:
+        log.append(**t)
+        assert len(log._data["result"]) < 64
+    log.close()
+
+    assert len(log) == 1000
+    assert compute_stats(log) == _reference_stats(trades)
+
+    reloaded = TradeLog.read(str(sink))
+    assert reloaded.columns == SIMULATE_COLUMNS
+    assert len(reloaded) == 1000
+    assert compute_stats(reloaded) == _reference_stats(trades)
+
+
+def test_second_run_to_same_sink_replaces_the_first(tmp_path):
+    sink = str(tmp_path / "trades.csv")
+    grid = TradeLog(columns=SIMULATE_COLUMNS + ("displacement_mult",), sink=sink, chunk_size=10)
+    grid.extend_log(TradeLog.from_records(_trades(25)), displacement_mult=1.2)
+    grid.close()
+
+    single = TradeLog(sink=sink, chunk_size=10)
+    single.extend_log(TradeLog.from_records(_trades(3, seed=2)))
+    single.close()
+
+    reloaded = TradeLog.read(sink)
+    assert reloaded.columns == SIMULATE_COLUMNS
+    assert len(reloaded) == 3
+    assert compute_stats(reloaded) == compute_stats(_trades(3, seed=2))
+
+
+def test_flushed_log_refuses_partial_row_access(tmp_path):
+    log = TradeLog(sink=str(tmp_path / "trades.csv"), chunk_size=10)
+    for t in _trades(15):
+        log.append(**t)
+    assert len(log) == 15 and len(log._data["result"]) == 5
+    for access in (log.arrays, log.to_frame, lambda: list(log)):
+        with pytest.raises(RuntimeError, match="flushed"):
+            access()
+    log.close()
+    assert compute_stats(log) == compute_stats(_trades(15))
@@ -0,0 +1,195 @@
+"""
+Columnar trade log for the backtesters.
+
+Trades are kept as one list per column and exposed as numpy arrays; statistics
+are computed by vectorized aggregation (see aggregate_trades). With a sink path,
+rows are appended to a CSV every `chunk_size` trades and only their aggregate is
+kept in memory, so grid/portfolio runs stay flat and can be re-analysed later
+with TradeLog.read(path) instead of re-simulating. Each TradeLog rewrites its
+sink from the header on its first flush (or at close when it never flushed),
+so a second run to the same path replaces the previous one.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+SIMULATE_COLUMNS = (
+    "ticker", "day", "tier", "direction", "diamond_score",
+    "entry", "stop", "target", "rr", "result", "close_ts",
+)
+NUMERIC_COLUMNS = frozenset({"entry", "stop", "target", "rr"})
+REQUIRED_COLUMNS = frozenset({"tier", "rr", "result"})
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def aggregate_trades(tier: np.ndarray, rr: np.ndarray, result: np.ndarray) -> dict:
+    """Additive partial statistics for one batch of trades."""
+    win = result == "WIN"
+    loss = result == "LOSS"
+    closed = win | loss
+    tiers, inverse = np.unique(tier[closed].astype(str), return_inverse=True)
+    tier_wins = np.bincount(inverse, weights=win[closed], minlength=len(tiers))
+    tier_losses = np.bincount(inverse, weights=loss[closed], minlength=len(tiers))
+    return {
+        "wins": int(win.sum()),
+        "losses": int(loss.sum()),
+        "win_rr": float(rr[win].sum()),
+        "tiers": {
+            t: [int(w), int(lo)] for t, w, lo in zip(tiers.tolist(), tier_wins, tier_losses)
+        },
+    }
+
+
+def merge_aggregates(a: dict, b: dict) -> dict:
+    tiers = {t: list(v) for t, v in a["tiers"].items()}
+    for t, (w, lo) in b["tiers"].items():
+        cur = tiers.setdefault(t, [0, 0])
+        cur[0] += w
+        cur[1] += lo
+    return {
+        "wins": a["wins"] + b["wins"],
+        "losses": a["losses"] + b["losses"],
+        "win_rr": a["win_rr"] + b["win_rr"],
+        "tiers": tiers,
+    }
+
+
+EMPTY_AGGREGATE = {"wins": 0, "losses": 0, "win_rr": 0.0, "tiers": {}}
+
+
+class TradeLog:
+    """
+    Append-only columnar trade log, optionally streamed to a CSV sink.
+
+    len() and aggregate() cover every row; arrays(), to_frame() and iteration
+    raise once rows have been flushed, rather than return only the tail.
+    """
+
+    def __init__(
+        self,
+        columns: Iterable[str] = SIMULATE_COLUMNS,
+        sink: str | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.columns = tuple(columns)
+        missing = REQUIRED_COLUMNS - set(self.columns)
+        if missing:
+            raise ValueError(f"TradeLog columns missing {sorted(missing)}")
+        self.sink = sink
+        self.chunk_size = chunk_size
+        self._data: dict[str, list] = {c: [] for c in self.columns}
+        self._flushed = dict(EMPTY_AGGREGATE)
+        self._flushed_rows = 0
+        self._started = False   # sink truncated and header written by this instance
+
+    # ── recording ────────────────────────────────────────────
+    def append(self, **fields) -> None:
+        for c in self.columns:
+            self._data[c].append(fields.get(c))
+        self._maybe_flush()
+
+    def extend(self, columns: dict, **constants) -> None:
+        """Append a batch given as column -> sequence; constants fill whole columns."""
+        n = len(next(iter(columns.values()))) if columns else 0
+        for c in self.columns:
+            if c in columns:
+                self._data[c].extend(list(columns[c]))
+            else:
+                self._data[c].extend([constants.get(c)] * n)
+        self._maybe_flush()
+
+    def extend_log(self, other: "TradeLog", **constants) -> None:
+        self.extend(other.arrays(), **constants)
+
+    def _maybe_flush(self) -> None:
+        if self.sink and len(self._data["result"]) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Append in-memory rows to the sink and keep only their aggregate."""
+        if not self.sink or not self._data["result"]:
+            return
+        arrays = self._arrays()
+        self._flushed = merge_aggregates(self._flushed, self._aggregate(arrays))
+        self._flushed_rows += len(arrays["result"])
+        self._write(arrays)
+        self._data = {c: [] for c in self.columns}
+
+    def _write(self, arrays: dict) -> None:
+        pd.DataFrame(arrays, columns=self.columns).to_csv(
+            self.sink, mode="a" if self._started else "w", header=not self._started, index=False
+        )
+        self._started = True
+
+    def close(self) -> None:
+        self.flush()
+        if self.sink and not self._started:
+            self._write(self._arrays())
+
+    # ── access ───────────────────────────────────────────────
+    def _check_unflushed(self) -> None:
+        if self._flushed_rows:
+            raise RuntimeError(
+                f"TradeLog already flushed {self._flushed_rows} rows to {self.sink}; "
+                f"use aggregate() or TradeLog.read() for the full log"
+            )
+
+    def arrays(self) -> dict[str, np.ndarray]:
+        """All rows as column -> numpy array; raises once rows were flushed to the sink."""
+        self._check_unflushed()
+        return self._arrays()
+
+    def _arrays(self) -> dict[str, np.ndarray]:
+        out = {}
+        for c in self.columns:
+            if c in NUMERIC_COLUMNS:
+                out[c] = np.asarray(self._data[c], dtype=float)
+            else:
+                out[c] = np.asarray(self._data[c], dtype=object)
+        return out
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.arrays(), columns=self.columns)
+
+    def __len__(self) -> int:
+        """Rows recorded, flushed ones included."""
+        return self._flushed_rows + len(self._data["result"])
+
+    def __iter__(self) -> Iterator[dict]:
+        """Rows as trade dicts (the pre-columnar simulate() format); raises once rows were flushed."""
+        self._check_unflushed()
+        for values in zip(*(self._data[c] for c in self.columns)):
+            yield dict(zip(self.columns, values))
+
+    # ── statistics ───────────────────────────────────────────
+    @staticmethod
+    def _aggregate(arrays: dict) -> dict:
+        if not len(arrays["result"]):
+            return dict(EMPTY_AGGREGATE)
+        return aggregate_trades(arrays["tier"], arrays["rr"], arrays["result"])
+
+    def aggregate(self) -> dict:
+        """Aggregate over flushed and in-memory rows."""
+        return merge_aggregates(self._flushed, self._aggregate(self._arrays()))
+
+    # ── constructors ─────────────────────────────────────────
+    @classmethod
+    def from_records(cls, trades: list[dict]) -> "TradeLog":
+        columns = tuple(trades[0].keys()) if trades else SIMULATE_COLUMNS
+        log = cls(columns=columns)
+        for t in trades:
+            log.append(**t)
+        return log
+
+    @classmethod
+    def read(cls, path: str) -> "TradeLog":
+        """Load a streamed trade log back for analysis."""
+        df = pd.read_csv(path)
+        df = df.astype({c: object for c in df.columns if c not in NUMERIC_COLUMNS})
+        log = cls(columns=df.columns)
+        log.extend({c: df[c].to_numpy() for c in df.columns})
+        return log